@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+bench_interpolation.py - Micro-benchmark de l'interpolation pointops patchée
+
+Compare, à des tailles réalistes du décodeur SVGNet (plans de 2048 points
+paddés, batchs de plusieurs plans), l'ancienne boucle sur k à la version
+de pointops_patch.py (avec et sans buffer de sortie).
+Les voisins (idx, dist) sont tirés au hasard: seul le gather + somme pondérée est mesuré.
+
+Usage:
+    python bench_interpolation.py
+    python bench_interpolation.py --device cuda --repeat 200
+"""
+
+import time
+import argparse
+import torch
+
+from pointops_patch import weighted_gather
+
+# (points source N, points cible M, canaux C): étages de remontée du décodeur
+STAGES = [
+    (512, 2048, 256),
+    (2048, 8192, 128),
+    (8192, 32768, 64),
+    (32768, 131072, 32),
+]
+
+
+def loop_interpolation(feat, idx, weight, k):
+    """Ancienne implémentation (boucle sur k, accumulation)."""
+    new_feat = feat.new_zeros((idx.shape[0], feat.shape[1]))
+    for i in range(k):
+        valid_idx = torch.clamp(idx[:, i].long(), 0, feat.shape[0] - 1)
+        new_feat += feat[valid_idx, :] * weight[:, i].unsqueeze(-1)
+    return new_feat
+
+
+def timeit(fn, repeat, device):
+    fn()  # échauffement
+    if device == 'cuda':
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    if device == 'cuda':
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark interpolation pointops')
+    parser.add_argument('--device', choices=['cpu', 'cuda'],
+                        default='cuda' if torch.cuda.is_available() else 'cpu')
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--k', type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"📊 Interpolation pointops (k={args.k}, {args.device}, {args.repeat} répétitions)\n")
+    print(f"{'N':>7} {'M':>7} {'C':>4} | {'boucle':>9} {'patch':>9} {'patch+out':>9} | {'gain':>5}  {'écart max':>9}")
+
+    gen = torch.Generator().manual_seed(0)
+    for n, m, c in STAGES:
+        feat = torch.randn(n, c, generator=gen).to(args.device)
+        idx = torch.randint(0, n, (m, args.k), generator=gen, dtype=torch.int32).to(args.device)
+        dist = torch.rand(m, args.k, generator=gen).to(args.device)
+        weight = 1.0 / (dist + 1e-8)
+        weight = weight / weight.sum(dim=1, keepdim=True)
+        out = torch.empty(m, c, device=args.device)
+
+        t_loop = timeit(lambda: loop_interpolation(feat, idx, weight, args.k), args.repeat, args.device)
+        t_patch = timeit(lambda: weighted_gather(feat, idx, weight), args.repeat, args.device)
+        t_out = timeit(lambda: weighted_gather(feat, idx, weight, out), args.repeat, args.device)
+
+        diff = (loop_interpolation(feat, idx, weight, args.k) - weighted_gather(feat, idx, weight)).abs().max()
+        print(f"{n:7d} {m:7d} {c:4d} | {t_loop:7.2f}ms {t_patch:7.2f}ms {t_out:7.2f}ms | "
+              f"{t_loop / min(t_patch, t_out):4.1f}x  {diff.item():9.2e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,203 @@
+#!/usr/bin/env python
+"""
+bench_parsers.py - Benchmarks parsers et sérialisation sur plans synthétiques
+
+Génère des plans (synthetic_plan.py) à plusieurs tailles, puis mesure:
+
+- analyze_pdf (parser universel)
+- parse_pdf de chaque version (universal, v2, v3, v4, v5), JSON de sortie
+- sérialisation de l'échantillon universel: écriture / lecture _s2.json et _s2.npz
+
+Tout tourne hors ligne sur CPU (PyMuPDF + NumPy seulement), cache disque du
+parser universel désactivé. Chaque mesure est répétée (médiane et min) et les
+résultats écrits en JSON; --compare signale les ralentissements par rapport à
+un fichier de résultats précédent (code de sortie 1 au-delà de --tolerance).
+
+Usage:
+    python bench_parsers.py
+    python bench_parsers.py --scales 1 4 16 --repeat 5 --output bench.json
+    python bench_parsers.py --compare bench_prev.json --tolerance 0.2
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import platform
+import tempfile
+import argparse
+import statistics
+import contextlib
+from datetime import datetime
+
+import numpy as np
+import fitz
+
+from synthetic_plan import PlanSpec, generate_plan
+from sample_io import write_sample, load_sample
+from fast_json import write_json
+import universal_pdf_parser as universal
+import smart_pdf_parser_v2 as v2
+import smart_pdf_parser_v3 as v3
+import smart_pdf_parser_v4 as v4
+import smart_pdf_parser_v5 as v5
+
+DEFAULT_SCALES = (1, 4, 16)
+DEFAULT_REPEAT = 3
+MIN_REGRESSION_SECONDS = 0.005  # Écarts plus petits ignorés (bruit des mesures de quelques ms)
+
+
+def timed(fn, repeat):
+    """(médiane, min) en secondes de fn() sur repeat exécutions (sorties console masquées)."""
+    times = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+    return statistics.median(times), min(times)
+
+
+def parser_cases(pdf_path, out_dir):
+    """Mesures par parser: nom -> fonction sans argument."""
+    out = lambda name: os.path.join(out_dir, f"{name}_s2.json")
+
+    def universal_analyze():
+        universal._extraction_cache.clear()
+        universal.analyze_pdf(pdf_path)
+
+    def universal_parse():
+        universal._extraction_cache.clear()
+        universal.parse_pdf(pdf_path, out('universal'))
+
+    return {
+        'universal.analyze_pdf': universal_analyze,
+        'universal.parse_pdf': universal_parse,
+        'v2.parse': lambda: v2.SmartPDFParserV2(verbose=False).parse(pdf_path, out('v2')),
+        'v3.parse_pdf': lambda: v3.parse_pdf(pdf_path, out('v3')),
+        'v4.parse_pdf': lambda: v4.parse_pdf(pdf_path, out('v4')),
+        'v5.parse_pdf': lambda: v5.parse_pdf(pdf_path, out('v5')),
+    }
+
+
+def serialization_cases(sample_path, out_dir):
+    """Écriture / lecture JSON et npz de l'échantillon universel."""
+    sample = load_sample(sample_path)
+    json_path = os.path.join(out_dir, 'io_s2.json')
+    npz_path = os.path.join(out_dir, 'io_s2.npz')
+    write_sample(sample, json_path, 'both')
+    return {
+        'io.write_json': lambda: write_sample(sample, json_path, 'json'),
+        'io.write_json_p4': lambda: write_sample(sample, json_path, 'json', precision=4),
+        'io.write_json_stdlib': lambda: write_json(sample, json_path, engine='stdlib'),
+        'io.write_npz': lambda: write_sample(sample, json_path, 'npz'),
+        'io.load_json': lambda: load_sample(json_path),
+        'io.load_npz': lambda: load_sample(npz_path),
+    }
+
+
+def run_benchmarks(scales, pages, repeat, work_dir):
+    results = []
+    for scale in scales:
+        spec = PlanSpec(scale=scale, pages=pages)
+        pdf_path = os.path.join(work_dir, f"synth_x{scale:g}.pdf")
+        generate_plan(pdf_path, spec)
+        doc = fitz.open(pdf_path)
+        paths = len(doc[0].get_drawings())
+        doc.close()
+        print(f"\n📐 Plan x{scale:g} (grille {spec.grid}x{spec.grid}, {paths} paths page 1)")
+
+        cases = parser_cases(pdf_path, work_dir)
+        sample_path = os.path.join(work_dir, 'universal_s2.json')
+        for name, fn in cases.items():
+            results.append(_measure(name, fn, repeat, scale, paths))
+            if name == 'universal.parse_pdf':
+                primitives = len(load_sample(sample_path)['commands'])
+                results[-1]['primitives'] = primitives
+                for io_name, io_fn in serialization_cases(sample_path, work_dir).items():
+                    results.append(_measure(io_name, io_fn, repeat, scale, paths, primitives))
+    return results
+
+
+def _measure(name, fn, repeat, scale, paths, primitives=None):
+    try:
+        median, best = timed(fn, repeat)
+    except Exception as e:
+        print(f"   ❌ {name:24s} {type(e).__name__}: {e}")
+        return {'benchmark': name, 'scale': scale, 'paths': paths, 'error': str(e)}
+    print(f"   {name:24s} {median * 1000:9.1f} ms (min {best * 1000:.1f})")
+    entry = {'benchmark': name, 'scale': scale, 'paths': paths,
+             'seconds_median': round(median, 6), 'seconds_min': round(best, 6)}
+    if primitives is not None:
+        entry['primitives'] = primitives
+    return entry
+
+
+def environment():
+    return {
+        'timestamp': datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'pymupdf': fitz.VersionBind,
+    }
+
+
+def compare(results, previous_path, tolerance):
+    """Affiche les ratios vs un fichier précédent; retourne la liste des régressions."""
+    with open(previous_path) as f:
+        previous = {(r['benchmark'], r['scale']): r for r in json.load(f)['results']}
+    print(f"\n🔍 Comparaison avec {previous_path} (tolérance {tolerance:.0%})")
+    regressions = []
+    for r in results:
+        old = previous.get((r['benchmark'], r['scale']))
+        if old is None or 'seconds_min' not in old or 'seconds_min' not in r:
+            continue
+        ratio = r['seconds_min'] / max(old['seconds_min'], 1e-9)
+        slower = ratio > 1 + tolerance and r['seconds_min'] - old['seconds_min'] > MIN_REGRESSION_SECONDS
+        flag = '❌' if slower else ('✅' if ratio < 1 - tolerance else '  ')
+        print(f"   {flag} {r['benchmark']:24s} x{r['scale']:<4g} {ratio:5.2f}x")
+        if slower:
+            regressions.append(dict(r, ratio=round(ratio, 3)))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmarks parsers / sérialisation (plans synthétiques)')
+    parser.add_argument('--scales', type=float, nargs='+', default=list(DEFAULT_SCALES),
+                        help=f'Tailles de plan (défaut: {" ".join(map(str, DEFAULT_SCALES))})')
+    parser.add_argument('--pages', type=int, default=1, help='Pages par plan')
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--output', default='bench_results.json', help='Fichier de résultats JSON')
+    parser.add_argument('--work-dir', help='Dossier des plans et sorties (défaut: temporaire)')
+    parser.add_argument('--compare', metavar='JSON', help='Résultats précédents à comparer')
+    parser.add_argument('--tolerance', type=float, default=0.25,
+                        help='Ralentissement toléré avant échec de --compare (défaut: 0.25)')
+    args = parser.parse_args()
+
+    universal.configure_cache(False)
+    print(f"📊 Benchmarks parsers (échelles {args.scales}, {args.repeat} répétitions)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        work_dir = args.work_dir or tmp
+        os.makedirs(work_dir, exist_ok=True)
+        results = run_benchmarks(args.scales, args.pages, args.repeat, work_dir)
+
+    report = {'environment': environment(), 'repeat': args.repeat, 'results': results}
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\n💾 Résultats: {args.output}")
+
+    if args.compare:
+        regressions = compare(results, args.compare, args.tolerance)
+        if regressions:
+            print(f"\n❌ {len(regressions)} ralentissement(s) au-delà de {args.tolerance:.0%}")
+            sys.exit(1)
+        print("\n✅ Pas de ralentissement")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+"""
+check_pointops_cpu.py - Parité des opérateurs pointops CPU (pointops_cpu.py)
+
+Compare sur un petit nuage synthétique (2 plans concaténés, offset) :
+- à une référence NumPy brute-force (toujours)
+- aux noyaux CUDA de SymPointV2 (si GPU et extension disponibles)
+
+Usage:
+    python check_pointops_cpu.py
+    python check_pointops_cpu.py --points 3000 --seed 1
+"""
+
+import sys
+import argparse
+import numpy as np
+import torch
+
+sys.path.insert(0, '/workspace/SymPointV2')
+
+import pointops_cpu
+
+
+def make_sample(n_points, seed):
+    """Deux plans concaténés (tailles inégales), features aléatoires."""
+    rng = np.random.default_rng(seed)
+    sizes = [n_points * 2 // 3, n_points - n_points * 2 // 3]
+    xyz = rng.uniform(0, 140, size=(n_points, 3)).astype(np.float32)
+    xyz[:, 2] = 0  # Plans 2D (z constant, comme SVGDataset)
+    feat = rng.normal(size=(n_points, 32)).astype(np.float32)
+    offset = np.cumsum(sizes)
+    new_sizes = [s // 4 for s in sizes]
+    new_offset = np.cumsum(new_sizes)
+    return torch.from_numpy(xyz), torch.from_numpy(feat), torch.IntTensor(offset), torch.IntTensor(new_offset)
+
+
+def reference_knn(k, xyz, new_xyz, offset, new_offset):
+    xyz, new_xyz = xyz.numpy().astype(np.float64), new_xyz.numpy().astype(np.float64)
+    idx = np.zeros((len(new_xyz), k), dtype=np.int64)
+    dist = np.zeros((len(new_xyz), k))
+    starts, new_starts = np.r_[0, offset[:-1]], np.r_[0, new_offset[:-1]]
+    for s, e, ns, ne in zip(starts, offset.tolist(), new_starts, new_offset.tolist()):
+        d = np.sqrt(((new_xyz[ns:ne, None, :] - xyz[None, s:e, :]) ** 2).sum(-1))
+        order = np.argsort(d, axis=1, kind='stable')[:, :k]
+        idx[ns:ne] = order + s
+        dist[ns:ne] = np.take_along_axis(d, order, axis=1)
+    return idx, dist
+
+
+def reference_interpolation(xyz, new_xyz, feat, offset, new_offset, k=3):
+    idx, dist = reference_knn(k, xyz, new_xyz, offset, new_offset)
+    w = 1.0 / (dist + 1e-8)
+    w /= w.sum(axis=1, keepdims=True)
+    return (feat.numpy().astype(np.float64)[idx] * w[..., None]).sum(axis=1)
+
+
+def check(name, ok, detail=''):
+    print(f"   {'✅' if ok else '❌'} {name} {detail}")
+    return ok
+
+
+def run_checks(xyz, feat, offset, new_offset, ops, label):
+    """Compare les opérateurs 'ops' à la référence NumPy."""
+    print(f"\n🔍 {label}")
+    results = []
+    sample_idx = ops['furthestsampling'](xyz, offset, new_offset).long()
+    new_xyz = xyz[sample_idx.cpu()]
+
+    # knnquery: mêmes distances (les indices peuvent différer à distance égale)
+    idx, dist = ops['knnquery'](16, xyz, new_xyz, offset, new_offset)
+    ref_idx, ref_dist = reference_knn(16, xyz, new_xyz, offset, new_offset)
+    err = np.abs(dist.cpu().numpy() - ref_dist).max()
+    results.append(check('knnquery distances', err < 1e-3, f'(erreur max {err:.2e})'))
+    same = (np.sort(idx.cpu().numpy(), 1) == np.sort(ref_idx, 1)).mean()
+    results.append(check('knnquery indices', same > 0.999, f'({100 * same:.2f}% identiques)'))
+
+    # furthestsampling: chaque point choisi dans son segment, sans doublon
+    picked = sample_idx.cpu().numpy()
+    starts = np.r_[0, offset[:-1].numpy()]
+    new_starts = np.r_[0, new_offset[:-1].numpy()]
+    in_segment = all(((picked[ns:ne] >= s) & (picked[ns:ne] < e)).all() and
+                     len(np.unique(picked[ns:ne])) == ne - ns
+                     for s, e, ns, ne in zip(starts, offset.tolist(), new_starts, new_offset.tolist()))
+    results.append(check('furthestsampling', in_segment, '(segments respectés, sans doublon)'))
+
+    # interpolation (sous-échantillon -> nuage complet)
+    sub_feat = feat[sample_idx.cpu()]
+    out = ops['interpolation'](new_xyz, xyz, sub_feat, new_offset, offset).cpu().numpy()
+    ref = reference_interpolation(new_xyz, xyz, sub_feat, new_offset, offset)
+    err = np.abs(out - ref).max()
+    results.append(check('interpolation', err < 1e-3, f'(erreur max {err:.2e})'))
+
+    # grouping / queryandgroup
+    grouped = ops['queryandgroup'](16, xyz, new_xyz, feat, None, offset, new_offset).cpu().numpy()
+    ref_grouped = np.concatenate([xyz.numpy()[ref_idx] - new_xyz.numpy()[:, None, :],
+                                  feat.numpy()[ref_idx]], axis=-1)
+    err = np.abs(np.sort(grouped, axis=1) - np.sort(ref_grouped, axis=1)).max()
+    results.append(check('queryandgroup', err < 1e-3, f'(erreur max {err:.2e})'))
+    return all(results)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parité pointops CPU')
+    parser.add_argument('--points', type=int, default=2048)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    xyz, feat, offset, new_offset = make_sample(args.points, args.seed)
+    ok = run_checks(xyz, feat, offset, new_offset, pointops_cpu.CPU_OPS, 'pointops_cpu vs NumPy')
+
+    if torch.cuda.is_available():
+        try:
+            from modules.pointops.functions import pointops
+        except ImportError as e:
+            print(f"\n⚠️ pointops CUDA indisponible ({e})")
+        else:
+            cuda_ops = {name: getattr(pointops, name) for name in pointops_cpu.CPU_OPS}
+            cuda = [t.cuda() for t in (xyz, feat, offset, new_offset)]
+            ok &= run_checks(*cuda, cuda_ops, 'pointops CUDA vs NumPy (même référence)')
+
+    print(f"\n{'✅ Parité OK' if ok else '❌ Écarts détectés'}")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
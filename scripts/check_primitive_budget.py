@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+"""
+check_primitive_budget.py - Sélection --max-primitives indépendante de l'ordre de tracé
+
+Construit un plan synthétique plein d'égalités (segments tracés dans les deux
+sens, diagonales égales d'un X, doublons exacts, grilles régulières), puis
+vérifie que select_by_budget garde la même géométrie après permutation des
+primitives et inversion du sens de parcours d'une partie d'entre elles.
+
+Usage:
+    python check_primitive_budget.py
+    python check_primitive_budget.py --primitives 5000 --trials 20 --seed 1
+"""
+
+import sys
+import argparse
+from collections import Counter
+
+import numpy as np
+
+from primitive_budget import select_by_budget, _canonical_geometry
+
+
+def _line(p0, p3):
+    p0, p3 = np.asarray(p0, dtype=np.float64), np.asarray(p3, dtype=np.float64)
+    return np.stack([p0, p0 + (p3 - p0) / 3, p0 + 2 * (p3 - p0) / 3, p3])
+
+
+def make_plan(n_primitives, seed):
+    """controls (N, 4, 2), lengths (N,), layer_ids (N,) avec beaucoup d'égalités."""
+    rng = np.random.default_rng(seed)
+    lines = []
+    while len(lines) < n_primitives:
+        x, y = rng.integers(0, 28, size=2) * 5.0
+        size = float(rng.choice([2.0, 5.0]))
+        kind = rng.integers(0, 4)
+        if kind == 0:    # Segment tracé dans les deux sens
+            lines += [_line((x, y), (x + size, y)), _line((x + size, y), (x, y))]
+        elif kind == 1:  # X: deux diagonales de même milieu et même longueur
+            lines += [_line((x, y), (x + size, y + size)), _line((x + size, y), (x, y + size))]
+        elif kind == 2:  # Doublon exact
+            lines += [_line((x, y), (x, y + size))] * 2
+        else:            # Carré: côtés de même longueur
+            corners = [(x, y), (x + size, y), (x + size, y + size), (x, y + size)]
+            lines += [_line(corners[i], corners[(i + 1) % 4]) for i in range(4)]
+    controls = np.stack(lines[:n_primitives])
+    lengths = np.linalg.norm(controls[:, 3] - controls[:, 0], axis=1)
+    layer_ids = rng.integers(0, 3, size=n_primitives)
+    return controls, lengths, layer_ids
+
+
+def kept_geometry(controls, lengths, layer_ids, budget):
+    """Multiensemble (layer, géométrie canonique) des primitives gardées."""
+    keep = select_by_budget(controls, lengths, layer_ids, budget)
+    geometry = _canonical_geometry(controls[keep])
+    return Counter(zip(layer_ids[keep].tolist(), map(tuple, geometry.tolist())))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='select_by_budget indépendant de l\'ordre de tracé')
+    parser.add_argument('--primitives', type=int, default=700)
+    parser.add_argument('--trials', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    controls, lengths, layer_ids = make_plan(args.primitives, args.seed)
+    rng = np.random.default_rng(args.seed + 1)
+    ok = True
+    for budget in (args.primitives // 10, args.primitives // 3, args.primitives * 2 // 3):
+        reference = kept_geometry(controls, lengths, layer_ids, budget)
+        differing = 0
+        for _ in range(args.trials):
+            perm = rng.permutation(len(controls))
+            permuted = controls[perm].copy()
+            flip = rng.random(len(perm)) < 0.5
+            permuted[flip] = permuted[flip, ::-1]
+            kept = kept_geometry(permuted, lengths[perm], layer_ids[perm], budget)
+            differing = max(differing, sum(((kept - reference) + (reference - kept)).values()))
+        same = differing == 0
+        ok &= same
+        print(f"   {'✅' if same else '❌'} budget {budget:5d}: "
+              f"{sum(reference.values())} gardées, {args.trials} permutations"
+              f"{'' if same else f' ({differing} primitives différentes)'}")
+
+    print("\n✅ Sélection indépendante de l'ordre" if ok else "\n❌ La sélection dépend de l'ordre de tracé")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+#!/usr/bin/env python
+"""
+corpus.py - Corpus d'échantillons _s2 en un shard mappé en mémoire
+
+Un corpus de fine-tuning (centaines de plans convertis) lu fichier par
+fichier coûte un json.load par plan et par epoch. Le shard regroupe les
+échantillons en tableaux contigus, un fichier binaire brut par champ:
+
+    corpus.s2shard/
+        index.json      format, plans (nom, width, height, _metadata...), dtype/forme des champs
+        offsets.bin     (P + 1,) int64: primitives du plan i = [offsets[i], offsets[i + 1])
+        commands.bin    (N,) int8
+        args.bin        (N, 8) float64
+        lengths.bin     (N,) float64
+        layerIds.bin    (N,) int32
+        widths.bin / semanticIds.bin / instanceIds.bin / rgb.bin (N, 3)
+
+pack_corpus écrit le shard en un passage (un plan en mémoire à la fois,
+écriture atomique). CorpusShard l'ouvre avec np.memmap: shard[i] renvoie un
+dict au format _s2.json dont les champs sont des vues sur le fichier (pas
+de copie, pas de parsing). Les processus qui lisent le même shard partagent
+le cache de pages du système; CorpusShard se pickle sans ses memmaps (rouverts
+à la demande), utilisable comme Dataset d'un DataLoader torch.
+
+Usage:
+    python corpus.py pack converted/ -o corpus.s2shard
+    python corpus.py pack a_s2.json b_s2.npz "plans/**/*_s2.json" -o corpus.s2shard
+    python corpus.py info corpus.s2shard
+    python run_inference_v2.py corpus.s2shard   # _pred.json écrits à côté du shard
+"""
+
+import os
+import sys
+import glob
+import json
+import shutil
+import argparse
+import numpy as np
+from typing import Dict, Iterator, List, Optional, Union
+
+from sample_io import ARRAY_FIELDS, load_sample
+from primitives import UNIFORM_WIDTH
+
+FORMAT_NAME = 's2shard'
+FORMAT_VERSION = 1
+SHARD_SUFFIX = '.s2shard'
+INDEX_FILE = 'index.json'
+OFFSETS_FILE = 'offsets.bin'
+
+# Forme d'une primitive par champ, et valeur si le champ manque (valeurs écrites par le parser)
+FIELD_SHAPES = {'args': (8,), 'rgb': (3,)}
+FIELD_DEFAULTS = {'layerIds': 0, 'widths': UNIFORM_WIDTH, 'semanticIds': 35, 'instanceIds': -1, 'rgb': 0}
+
+
+def is_shard(path: str) -> bool:
+    return os.path.isfile(os.path.join(path, INDEX_FILE))
+
+
+def find_corpus_inputs(inputs: List[str]) -> List[str]:
+    """Fichiers, dossiers (-> *_s2.json / *_s2.npz) et motifs glob en liste triée sans doublons."""
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, '*_s2.json')) +
+                                glob.glob(os.path.join(item, '*_s2.npz'))))
+        elif any(c in item for c in '*?['):
+            paths.extend(sorted(glob.glob(item, recursive=True)))
+        else:
+            paths.append(item)
+    return list(dict.fromkeys(paths))
+
+
+# ============================================================================
+# ÉCRITURE
+# ============================================================================
+
+def _field_array(sample: dict, key: str, n: int) -> np.ndarray:
+    shape = (n,) + FIELD_SHAPES.get(key, ())
+    if key not in sample:
+        return np.full(shape, FIELD_DEFAULTS[key], dtype=ARRAY_FIELDS[key])
+    return np.ascontiguousarray(np.asarray(sample[key], dtype=ARRAY_FIELDS[key]).reshape(shape))
+
+
+def pack_corpus(sample_paths: List[str], shard_path: str, overwrite: bool = False) -> dict:
+    """
+    Regroupe des _s2.json / _s2.npz en un shard (un plan chargé à la fois).
+
+    Returns:
+        Contenu de index.json
+    """
+    if os.path.exists(shard_path):
+        if not overwrite:
+            raise FileExistsError(f"{shard_path} existe déjà (--overwrite pour remplacer)")
+    tmp_path = shard_path.rstrip(os.sep) + '.tmp'
+    shutil.rmtree(tmp_path, ignore_errors=True)
+    os.makedirs(tmp_path)
+
+    plans, offsets = [], [0]
+    files = {key: open(os.path.join(tmp_path, key + '.bin'), 'wb') for key in ARRAY_FIELDS}
+    try:
+        names = set()
+        for path in sample_paths:
+            name = os.path.basename(path)
+            if name in names:
+                raise ValueError(f"nom en double dans le corpus: {name} ({path})")
+            names.add(name)
+            sample = load_sample(path)
+            n = len(sample['commands'])
+            for key, f in files.items():
+                _field_array(sample, key, n).tofile(f)
+            offsets.append(offsets[-1] + n)
+            plans.append({
+                'name': name,
+                'keys': list(sample.keys()),
+                'extra': {k: v for k, v in sample.items() if k not in ARRAY_FIELDS},
+            })
+    except BaseException:
+        for f in files.values():
+            f.close()
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        raise
+    for f in files.values():
+        f.close()
+
+    np.asarray(offsets, dtype=np.int64).tofile(os.path.join(tmp_path, OFFSETS_FILE))
+    index = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'num_plans': len(plans),
+        'num_primitives': offsets[-1],
+        'fields': {key: {'dtype': np.dtype(dtype).str, 'shape': list(FIELD_SHAPES.get(key, ()))}
+                   for key, dtype in ARRAY_FIELDS.items()},
+        'plans': plans,
+    }
+    with open(os.path.join(tmp_path, INDEX_FILE), 'w') as f:
+        json.dump(index, f)
+
+    if os.path.exists(shard_path):
+        shutil.rmtree(shard_path)
+    os.replace(tmp_path, shard_path)
+    return index
+
+
+# ============================================================================
+# LECTURE
+# ============================================================================
+
+class CorpusShard:
+    """
+    Lecture paresseuse d'un shard: len(shard), shard[i] / shard['plan_s2.json']
+    -> dict _s2 dont les champs par primitive sont des vues memmap (lecture seule).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, INDEX_FILE)) as f:
+            self.index = json.load(f)
+        if self.index.get('format') != FORMAT_NAME:
+            raise ValueError(f"{path}: format inconnu ({self.index.get('format')})")
+        self.plans = self.index['plans']
+        self._names = {plan['name']: i for i, plan in enumerate(self.plans)}
+        self._arrays: Optional[Dict[str, np.ndarray]] = None
+        self._offsets: Optional[np.ndarray] = None
+
+    def _open(self):
+        """Mappe offsets et champs (une fois par processus)."""
+        total = self.index['num_primitives']
+        self._offsets = np.fromfile(os.path.join(self.path, OFFSETS_FILE), dtype=np.int64)
+        self._arrays = {}
+        for key, field in self.index['fields'].items():
+            shape = (total,) + tuple(field['shape'])
+            if total == 0:  # np.memmap refuse les fichiers vides
+                self._arrays[key] = np.zeros(shape, dtype=field['dtype'])
+            else:
+                self._arrays[key] = np.memmap(os.path.join(self.path, key + '.bin'),
+                                              dtype=field['dtype'], mode='r', shape=shape)
+
+    def __getstate__(self):
+        # Les memmaps ne passent pas aux workers: chaque processus remappe le shard
+        state = self.__dict__.copy()
+        state['_arrays'] = state['_offsets'] = None
+        return state
+
+    def __len__(self) -> int:
+        return len(self.plans)
+
+    @property
+    def names(self) -> List[str]:
+        return [plan['name'] for plan in self.plans]
+
+    @property
+    def index_path(self) -> str:
+        return os.path.join(self.path, INDEX_FILE)
+
+    @property
+    def offsets(self) -> np.ndarray:
+        if self._offsets is None:
+            self._open()
+        return self._offsets
+
+    def num_primitives(self, i: int) -> int:
+        return int(self.offsets[i + 1] - self.offsets[i])
+
+    def __getitem__(self, item: Union[int, str]) -> dict:
+        i = self._names[item] if isinstance(item, str) else item
+        if i < 0:
+            i += len(self.plans)
+        if self._arrays is None:
+            self._open()
+        start, end = self._offsets[i], self._offsets[i + 1]
+        plan = self.plans[i]
+        sample = {}
+        for key in plan['keys']:
+            if key in plan['extra']:
+                sample[key] = plan['extra'][key]
+            elif key in self._arrays:
+                sample[key] = self._arrays[key][start:end]
+        return sample
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self[i]
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='Corpus _s2 en shard mappé en mémoire')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_pack = sub.add_parser('pack', help='Regrouper des _s2.json / _s2.npz en un shard')
+    p_pack.add_argument('inputs', nargs='+', help='Fichiers, dossiers ou motifs glob')
+    p_pack.add_argument('-o', '--output', required=True, help=f'Shard à écrire (ex: corpus{SHARD_SUFFIX})')
+    p_pack.add_argument('--overwrite', action='store_true', help='Remplacer un shard existant')
+
+    p_info = sub.add_parser('info', help='Résumé d\'un shard')
+    p_info.add_argument('shard')
+
+    args = parser.parse_args()
+
+    if args.command == 'pack':
+        paths = find_corpus_inputs(args.inputs)
+        missing = [p for p in paths if not os.path.exists(p)]
+        if missing or not paths:
+            print(f"❌ Fichier non trouvé: {', '.join(missing) or ' '.join(args.inputs)}")
+            sys.exit(1)
+        try:
+            index = pack_corpus(paths, args.output, args.overwrite)
+        except (FileExistsError, ValueError) as e:
+            print(f"❌ {e}")
+            sys.exit(1)
+        size = sum(os.path.getsize(os.path.join(args.output, name)) for name in os.listdir(args.output))
+        print(f"✅ {args.output}: {index['num_plans']} plans, {index['num_primitives']} primitives "
+              f"({size / 1024 / 1024:.1f} Mo)")
+        return
+
+    if not is_shard(args.shard):
+        print(f"❌ Shard non trouvé: {args.shard}")
+        sys.exit(1)
+    shard = CorpusShard(args.shard)
+    counts = np.diff(shard.offsets)
+    print(f"📦 {args.shard}: {len(shard)} plans, {shard.index['num_primitives']} primitives")
+    if len(shard):
+        print(f"   Primitives par plan: min={counts.min()}, max={counts.max()}, moyenne={counts.mean():.0f}")
+    for name, n in zip(shard.names, counts):
+        print(f"   {name:40s} {n:7d}")
+
+
+if __name__ == '__main__':
+    main()
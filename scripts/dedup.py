@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+"""
+dedup.py - Suppression des doublons et fusion des segments colinéaires
+
+Les exports ArchiCAD tracent souvent plusieurs fois le même bord de mur
+(contour du remplissage + trait + bord de hachure) et découpent les murs
+longs en nombreux morceaux colinéaires: le nombre de primitives dépasse de
+loin la cible ~900-2000 de FORMAT_SPEC.md.
+
+Deux passes vectorisées sur les primitives SymPointV2 (commands, controls):
+
+1. Doublons: extrémités (lignes) ou points de contrôle (courbes) quantifiés
+   au pas DEDUP_TOLERANCE, orientation canonique, regroupés par hachage
+   (np.unique). Deux grilles décalées d'un demi-pas rattrapent les points
+   proches d'une frontière de cellule. Dans chaque groupe on garde la
+   primitive du layer le plus bas (murs d'abord), puis la première tracée.
+2. Fusion colinéaire: lignes d'un même layer regroupées par (angle, distance
+   à l'origine) quantifiés, projetées sur leur direction; les intervalles qui
+   se touchent ou se chevauchent (écart <= DEDUP_TOLERANCE) sont fusionnés en
+   un seul segment.
+"""
+
+import numpy as np
+from typing import Tuple
+
+from primitives import CMD_LINE, interpolate_lines
+
+# Tolérances dans le repère normalisé (plan ramené à 140 unités)
+DEDUP_TOLERANCE = 0.05
+ANGLE_TOLERANCE_DEG = 0.5
+
+
+def canonical_keys(commands: np.ndarray, controls: np.ndarray, tol: float, shift: float) -> np.ndarray:
+    """Clé entière (N, 9) indépendante du sens de parcours: commande + 4 points quantifiés."""
+    q = np.floor(controls / tol + shift).astype(np.int64)          # (N, 4, 2)
+    line = commands == CMD_LINE
+
+    # Lignes: seules les extrémités comptent (points intermédiaires interpolés)
+    q[line, 1] = 0
+    q[line, 2] = 0
+    fwd = q.reshape(-1, 8)
+    rev = q[:, ::-1].reshape(-1, 8)
+
+    # Orientation canonique: la plus petite des deux (ordre lexicographique)
+    diff = fwd - rev
+    first = np.argmax(diff != 0, axis=1)
+    swap = diff[np.arange(len(diff)), first] > 0
+    keys = np.where(swap[:, None], rev, fwd)
+    return np.concatenate([commands[:, None].astype(np.int64), keys], axis=1)
+
+
+def duplicate_mask(commands: np.ndarray, controls: np.ndarray, layer_ids: np.ndarray,
+                   tol: float = DEDUP_TOLERANCE) -> np.ndarray:
+    """Masque (N,) des primitives à supprimer (doublon d'une primitive prioritaire)."""
+    n = len(commands)
+    removed = np.zeros(n, dtype=bool)
+    if n < 2:
+        return removed
+
+    # Priorité: layer le plus bas (murs), puis ordre de tracé
+    rank = np.empty(n, dtype=np.int64)
+    rank[np.lexsort((np.arange(n), layer_ids))] = np.arange(n)
+
+    for shift in (0.0, 0.5):
+        _, inverse = np.unique(canonical_keys(commands, controls, tol, shift),
+                               axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        best = np.full(inverse.max() + 1, n, dtype=np.int64)
+        np.minimum.at(best, inverse, rank)
+        removed |= rank != best[inverse]
+    return removed
+
+
+def merge_collinear(p1: np.ndarray, p2: np.ndarray, layer_ids: np.ndarray,
+                    tol: float = DEDUP_TOLERANCE,
+                    angle_tol_deg: float = ANGLE_TOLERANCE_DEG) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Fusionne les segments colinéaires qui se touchent, par layer.
+
+    Args:
+        p1, p2: extrémités (N, 2) des lignes
+        layer_ids: layer (N,) de chaque ligne
+
+    Returns:
+        keep (N,) lignes conservées, new_p1, new_p2 (N, 2) extrémités après
+        fusion (une ligne fusionnée reprend la place de la première du groupe)
+    """
+    n = len(p1)
+    keep = np.ones(n, dtype=bool)
+    new_p1, new_p2 = p1.copy(), p2.copy()
+    d = p2 - p1
+    length = np.hypot(d[:, 0], d[:, 1])
+    valid = np.flatnonzero(length > 0)
+    if len(valid) < 2:
+        return keep, new_p1, new_p2
+
+    # Direction orientée vers x croissant (angle dans ]-90°, 90°])
+    a, b, dv = p1[valid], p2[valid], d[valid]
+    flip = (dv[:, 0] < 0) | ((dv[:, 0] == 0) & (dv[:, 1] < 0))
+    a[flip], b[flip] = p2[valid][flip], p1[valid][flip]
+    u = (b - a) / length[valid, None]
+    angle = np.degrees(np.arctan2(u[:, 1], u[:, 0]))
+    rho = a[:, 0] * -u[:, 1] + a[:, 1] * u[:, 0]  # distance signée à l'origine
+
+    keys = np.stack([layer_ids[valid],
+                     np.round(angle / angle_tol_deg).astype(np.int64),
+                     np.round(rho / tol).astype(np.int64)], axis=1)
+    _, group = np.unique(keys, axis=0, return_inverse=True)
+    group = group.reshape(-1)
+
+    # Projection sur la direction de référence du groupe
+    ref = np.zeros((group.max() + 1, 2))
+    ref[group] = u
+    t0 = (a * ref[group]).sum(axis=1)
+    t1 = (b * ref[group]).sum(axis=1)
+    swap = t0 > t1
+    a[swap], b[swap] = b[swap].copy(), a[swap].copy()
+    t0, t1 = np.minimum(t0, t1), np.maximum(t0, t1)
+
+    # Tri par groupe puis début d'intervalle; max cumulé des fins par groupe
+    order = np.lexsort((t0, group))
+    g, s, e = group[order], t0[order], t1[order]
+    span = float(np.abs(np.concatenate([s, e])).max()) * 2 + 1
+    run_end = np.maximum.accumulate(e + g * span) - g * span
+    new_group = np.r_[True, g[1:] != g[:-1]]
+    new_run = new_group | np.r_[True, s[1:] > run_end[:-1] + tol]
+    run = np.cumsum(new_run) - 1
+
+    counts = np.bincount(run)
+    merged_runs = np.flatnonzero(counts > 1)
+    if len(merged_runs) == 0:
+        return keep, new_p1, new_p2
+
+    starts = np.flatnonzero(new_run)
+    # Fin du segment fusionné: extrémité de plus grand t1 du run
+    by_end = np.lexsort((e, run))
+    last = by_end[np.cumsum(counts) - 1]
+
+    for_runs = np.isin(run, merged_runs)
+    members = valid[order[for_runs]]
+    keep[members] = False
+
+    # Le segment fusionné prend la place de la primitive d'indice le plus bas du run
+    first_index = np.full(len(counts), n, dtype=np.int64)
+    np.minimum.at(first_index, run, valid[order])
+    slots = first_index[merged_runs]
+    keep[slots] = True
+    new_p1[slots] = a[order[starts[merged_runs]]]
+    new_p2[slots] = b[order[last[merged_runs]]]
+    return keep, new_p1, new_p2
+
+
+def simplify_primitives(commands: np.ndarray, controls: np.ndarray, layer_ids: np.ndarray,
+                        tol: float = DEDUP_TOLERANCE) -> Tuple[np.ndarray, np.ndarray, np.ndarray, dict]:
+    """
+    Doublons puis fusion colinéaire (ordre des primitives conservé).
+
+    Returns:
+        commands, controls, layer_ids, stats {'duplicates', 'merged'}
+    """
+    removed = duplicate_mask(commands, controls, layer_ids, tol)
+    commands, controls, layer_ids = commands[~removed], controls[~removed], layer_ids[~removed]
+    stats = {'duplicates': int(removed.sum()), 'merged': 0}
+
+    lines = np.flatnonzero(commands == CMD_LINE)
+    keep_line, p1, p2 = merge_collinear(controls[lines, 0], controls[lines, 3], layer_ids[lines], tol)
+    changed = keep_line & ((p1 != controls[lines, 0]) | (p2 != controls[lines, 3])).any(axis=1)
+    if changed.any():
+        controls = controls.copy()
+        controls[lines[changed]] = interpolate_lines(p1[changed], p2[changed])
+
+    keep = np.ones(len(commands), dtype=bool)
+    keep[lines] = keep_line
+    stats['merged'] = int((~keep).sum())
+    return commands[keep], controls[keep], layer_ids[keep], stats
@@ -0,0 +1,189 @@
+#!/usr/bin/env python
+"""
+fast_json.py - Écriture JSON rapide des _s2.json / _pred.json
+
+json.dump sur un échantillon demande d'abord des listes Python (tolist) puis
+écrit chaque float avec toute sa précision (repr, ~18 caractères). Ici les
+tableaux NumPy sont écrits directement:
+
+- orjson (si installé, SYMPOINT_JSON_ENGINE=auto|orjson): sérialise les
+  tableaux en natif (OPT_SERIALIZE_NUMPY), ~10x plus rapide que json.dump
+- repli stdlib: les tableaux sont écrits par blocs de CHUNK_SIZE valeurs,
+  sans construire la liste complète; le reste (métadonnées) passe par json
+
+precision=N arrondit les floats à N décimales (4 suffisent à l'échelle 140):
+fichiers ~2x plus petits. Sortie compacte (séparateurs ',' et ':') dans les
+deux cas; les valeurs relues sont les mêmes quel que soit le moteur (seule
+l'écriture des exposants diffère: 1e-05 / 0.00001).
+
+Les NaN / inf deviennent null avec orjson, NaN / Infinity avec json.
+"""
+
+import os
+import json
+import numpy as np
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+JSON_ENGINES = ('auto', 'orjson', 'stdlib')
+DEFAULT_ENGINE = os.environ.get('SYMPOINT_JSON_ENGINE', 'auto')
+CHUNK_SIZE = 65536  # Valeurs par bloc (repli stdlib)
+
+_SEPARATORS = (',', ':')
+
+
+def _engine(engine: Optional[str]) -> str:
+    engine = engine or DEFAULT_ENGINE
+    if engine not in JSON_ENGINES:
+        raise ValueError(f"moteur JSON inconnu: {engine} ({', '.join(JSON_ENGINES)})")
+    if engine == 'orjson' and orjson is None:
+        raise RuntimeError("orjson non installé (pip install orjson)")
+    if engine == 'auto':
+        return 'orjson' if orjson is not None else 'stdlib'
+    return engine
+
+
+def _default(value):
+    """Types NumPy hors tableaux (scalaires) pour json."""
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"type non sérialisable en JSON: {type(value).__name__}")
+
+
+def round_floats(value, precision: Optional[int]):
+    """
+    Arrondit les floats (tableaux, floats, listes imbriquées) à precision
+    décimales; les tableaux sont rendus contigus (requis par orjson).
+    """
+    if isinstance(value, dict):
+        return {key: round_floats(v, precision) for key, v in value.items()}
+    if isinstance(value, np.ndarray):
+        if precision is not None and value.dtype.kind == 'f':
+            value = np.round(value, precision)
+        return np.ascontiguousarray(value)
+    if isinstance(value, (list, tuple)) and value and precision is not None \
+            and isinstance(value[0], (float, list)):
+        # Listes de floats (échantillons relus avec json.load): arrondi vectorisé
+        try:
+            arr = np.asarray(value)
+        except ValueError:  # Listes irrégulières
+            arr = None
+        if arr is not None and arr.dtype.kind == 'f':
+            return np.round(arr, precision)
+    if isinstance(value, (list, tuple)) and value and (
+            precision is not None or isinstance(value[0], (dict, np.ndarray))):
+        return [round_floats(v, precision) for v in value]
+    if precision is not None and isinstance(value, float):
+        return round(value, precision)
+    return value
+
+
+# ============================================================================
+# REPLI STDLIB (ÉCRITURE PAR BLOCS)
+# ============================================================================
+
+def _format_values(flat: np.ndarray, precision: Optional[int]) -> list:
+    """Valeurs d'un bloc 1-D -> textes JSON (même écriture que json.dumps)."""
+    kind = flat.dtype.kind
+    if kind == 'b':
+        return ['true' if v else 'false' for v in flat.tolist()]
+    if kind in 'iu':
+        return list(map(str, flat.tolist()))
+    if kind != 'f':
+        return [json.dumps(v, default=_default) for v in flat.tolist()]
+    if precision is not None:
+        flat = np.round(flat, precision)
+    if not np.isfinite(flat).all():
+        return [json.dumps(v) for v in flat.tolist()]
+    return list(map(float.__repr__, flat.astype(np.float64).tolist()))
+
+
+def _iter_array(arr: np.ndarray, precision: Optional[int]):
+    """Morceaux de texte JSON d'un tableau, CHUNK_SIZE valeurs à la fois."""
+    if arr.ndim == 0:
+        yield json.dumps(arr.item())
+        return
+    if arr.ndim > 2:
+        yield '['
+        for i, row in enumerate(arr):
+            if i:
+                yield ','
+            yield from _iter_array(row, precision)
+        yield ']'
+        return
+
+    width = arr.shape[1] if arr.ndim == 2 else 1
+    rows_per_chunk = max(1, CHUNK_SIZE // max(width, 1))
+    yield '['
+    for start in range(0, len(arr), rows_per_chunk):
+        block = arr[start:start + rows_per_chunk]
+        values = _format_values(block.reshape(-1), precision)
+        if arr.ndim == 2:
+            values = ['[' + ','.join(values[i:i + width]) + ']' for i in range(0, len(values), width)]
+        yield (',' if start else '') + ','.join(values)
+    yield ']'
+
+
+def iter_json(value, precision: Optional[int] = None):
+    """Morceaux de texte JSON compact de value (dicts, tableaux, valeurs json)."""
+    if isinstance(value, np.ndarray):
+        yield from _iter_array(value, precision)
+    elif isinstance(value, dict):
+        yield '{'
+        for i, (key, v) in enumerate(value.items()):
+            yield (',' if i else '') + json.dumps(str(key)) + ':'
+            yield from iter_json(v, precision)
+        yield '}'
+    else:
+        yield json.dumps(round_floats(value, precision), separators=_SEPARATORS, default=_default)
+
+
+# ============================================================================
+# API
+# ============================================================================
+
+def _orjson_dumps(obj, precision: Optional[int]) -> Optional[bytes]:
+    """orjson.dumps, None si un type n'est pas géré (dtype exotique): repli stdlib."""
+    try:
+        return orjson.dumps(round_floats(obj, precision),
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    except orjson.JSONEncodeError:
+        return None
+
+
+def dumps(obj, precision: Optional[int] = None, engine: Optional[str] = None) -> str:
+    """obj -> texte JSON compact (tableaux NumPy acceptés)."""
+    if _engine(engine) == 'orjson':
+        data = _orjson_dumps(obj, precision)
+        if data is not None:
+            return data.decode()
+    return ''.join(iter_json(obj, precision))
+
+
+def write_json(obj, path: str, precision: Optional[int] = None, engine: Optional[str] = None) -> str:
+    """Écrit obj en JSON compact dans path et retourne path."""
+    if _engine(engine) == 'orjson':
+        data = _orjson_dumps(obj, precision)
+        if data is not None:
+            with open(path, 'wb') as f:
+                f.write(data)
+            return path
+    with open(path, 'w') as f:
+        for piece in iter_json(obj, precision):
+            f.write(piece)
+    return path
+
+
+def load_json(path: str):
+    """json.load (orjson.loads si disponible)."""
+    if orjson is not None and DEFAULT_ENGINE != 'stdlib':
+        with open(path, 'rb') as f:
+            return orjson.loads(f.read())
+    with open(path) as f:
+        return json.load(f)
@@ -0,0 +1,355 @@
+#!/usr/bin/env python
+"""
+inference_server.py - Serveur d'inférence SymPointV2 résident (HTTP localhost)
+
+run_inference_v2.py reconstruit SVGNet, relit le YAML et recharge le
+checkpoint à chaque fichier: sur nos petits plans, le chargement du modèle
+domine la latence. Ce serveur charge le modèle une seule fois et traite les
+requêtes dans une file (un seul thread d'inférence, GPU non partagé).
+
+Endpoints:
+    GET  /health    état du serveur (modèle, file, compteurs)
+    POST /predict   corps JSON {"path": "/abs/plan_s2.json", "save": true}
+                    ou corps JSON {"sample": {...contenu _s2.json...}}
+                    ou corps binaire _s2.npz (Content-Type: application/octet-stream)
+                    -> contenu du _pred.json (+ "output" si sauvegardé)
+
+Modèles:
+    --model sympointv2        SVGNet (GPU, nécessite SymPointV2)
+    --model stub              Modèle factice déterministe (CPU, sans torch)
+    --model module:Classe     Classe(config_path, checkpoint_path) avec .name et .predict(path)
+                              (et optionnellement .predict_batch(paths); pour pipeline.py,
+                              .prepare(path) statique + .predict_prepared(préparés))
+
+Avec --max-batch N, les requêtes en attente sont regroupées (jusqu'à N plans)
+dans une seule passe avant si le modèle fournit predict_batch.
+
+Usage:
+    python inference_server.py serve --port 8765
+    python inference_server.py serve --model stub
+    python inference_server.py predict plan_s2.json plan2_s2.npz
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import tempfile
+import argparse
+import importlib
+import threading
+import urllib.request
+import urllib.error
+import numpy as np
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+
+from sample_io import load_sample
+from predictions import postprocess, prediction_output_path, save_prediction_output
+from fast_json import dumps
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 64
+DEFAULT_CONFIG = '/workspace/SymPointV2/checkpoints/sympointv2/svg_pointT.yaml'
+DEFAULT_CHECKPOINT = '/workspace/SymPointV2/checkpoints/sympointv2/best.pth'
+
+
+# ============================================================================
+# MODÈLES
+# ============================================================================
+
+class StubModel:
+    """
+    Modèle factice pour tester le service sans GPU ni SymPointV2.
+    Layer 0 -> Railing (32, remappé en Wall), autres layers -> Background (34).
+    """
+
+    name = 'stub'
+
+    def __init__(self, config_path=None, checkpoint_path=None):
+        pass
+
+    @staticmethod
+    def prepare(sample_path):
+        """Partie CPU (workers de pipeline.py): layerIds du plan."""
+        return np.asarray(load_sample(sample_path)['layerIds'])
+
+    def predict_prepared(self, prepared):
+        return [(np.where(layer_ids == 0, 32, 34).astype(np.int64), 0) for layer_ids in prepared]
+
+    def predict(self, sample_path):
+        return self.predict_prepared([self.prepare(sample_path)])[0]
+
+    def predict_batch(self, sample_paths):
+        return [self.predict(path) for path in sample_paths]
+
+
+def model_class(spec: str):
+    """Classe du modèle sans l'instancier (aussi résolue dans les workers de pipeline.py)."""
+    if spec == 'stub':
+        return StubModel
+    if spec == 'sympointv2':
+        from run_inference_v2 import SymPointV2Model
+        return SymPointV2Model
+    module_name, _, attr = spec.partition(':')
+    if not attr:
+        raise ValueError(f"Modèle inconnu '{spec}' (sympointv2, stub ou module:Classe)")
+    return getattr(importlib.import_module(module_name), attr)
+
+
+def load_model_backend(spec: str, config_path: str, checkpoint_path: str,
+                       device: Optional[str] = None):
+    """Instancie le modèle: 'sympointv2', 'stub' ou 'module:Classe'."""
+    factory = model_class(spec)
+    if spec == 'sympointv2':
+        return factory(config_path, checkpoint_path, device)
+    return factory(config_path, checkpoint_path)
+
+
+# ============================================================================
+# FILE D'INFÉRENCE
+# ============================================================================
+
+class _Job:
+    def __init__(self, sample_path: str, save: bool, source_name: Optional[str] = None):
+        self.sample_path = sample_path
+        self.save = save
+        self.source_name = source_name
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class InferenceService:
+    """Modèle résident + file de requêtes traitée par un seul thread."""
+
+    def __init__(self, model, queue_size: int = DEFAULT_QUEUE_SIZE, max_batch: int = 1):
+        self.model = model
+        self.max_batch = max_batch if hasattr(model, 'predict_batch') else 1
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.served = 0
+        self.failed = 0
+        self.started = time.time()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def submit(self, sample_path: str, save: bool = False,
+               source_name: Optional[str] = None) -> _Job:
+        """Ajoute une requête (lève queue.Full si la file est pleine)."""
+        job = _Job(sample_path, save, source_name)
+        self.jobs.put_nowait(job)
+        return job
+
+    def _run(self):
+        while True:
+            jobs = [self.jobs.get()]
+            while len(jobs) < self.max_batch:
+                try:
+                    jobs.append(self.jobs.get_nowait())
+                except queue.Empty:
+                    break
+
+            start = time.time()
+            try:
+                if len(jobs) > 1:
+                    predictions = self.model.predict_batch([job.sample_path for job in jobs])
+                else:
+                    predictions = [self.model.predict(jobs[0].sample_path)]
+                if len(predictions) != len(jobs):
+                    raise RuntimeError(f"predict_batch: {len(predictions)} résultats pour {len(jobs)} requêtes")
+            except Exception as e:
+                predictions = [e] * len(jobs)
+
+            for job, prediction in zip(jobs, predictions):
+                try:
+                    if isinstance(prediction, Exception):
+                        raise prediction
+                    job.result = self._finish(job, *prediction, start)
+                    self.served += 1
+                except Exception as e:
+                    job.error = f"{type(e).__name__}: {e}"
+                    self.failed += 1
+                finally:
+                    job.done.set()
+
+    def _finish(self, job: _Job, sem_preds_raw, num_instances: int, start: float) -> dict:
+        """Post-traitement (remapping murs) et sauvegarde d'une requête."""
+        layer_ids = np.asarray(load_sample(job.sample_path).get('layerIds', []))
+        output = postprocess(job.source_name or job.sample_path, np.asarray(sem_preds_raw),
+                             layer_ids, num_instances)
+
+        if job.save:
+            output['output'] = save_prediction_output(output, prediction_output_path(job.sample_path))
+
+        print(f"   ✅ {os.path.basename(job.source_name or job.sample_path)}: "
+              f"{output['num_primitives']} primitives ({time.time() - start:.2f}s)")
+        return output
+
+    def health(self) -> dict:
+        return {
+            'model': getattr(self.model, 'name', type(self.model).__name__),
+            'queued': self.jobs.qsize(),
+            'served': self.served,
+            'failed': self.failed,
+            'uptime_seconds': round(time.time() - self.started, 1)
+        }
+
+
+# ============================================================================
+# HTTP
+# ============================================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    service: InferenceService = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def _reply(self, status: int, payload: dict):
+        body = dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        if self.path == '/health':
+            self._reply(200, self.service.health())
+        else:
+            self._reply(404, {'error': f'Endpoint inconnu: {self.path}'})
+
+    def do_POST(self):
+        if self.path != '/predict':
+            self._reply(404, {'error': f'Endpoint inconnu: {self.path}'})
+            return
+
+        body = self.rfile.read(int(self.headers.get('Content-Length', 0)))
+        tmp_path = None
+        try:
+            if self.headers.get('Content-Type', '').startswith('application/octet-stream'):
+                tmp_path = self._spool(body, '_s2.npz')
+                sample_path, save, source_name = tmp_path, False, self.headers.get('X-Source-Name')
+            else:
+                request = json.loads(body or b'{}')
+                if 'sample' in request:
+                    tmp_path = self._spool(json.dumps(request['sample']).encode(), '_s2.json')
+                    sample_path, save = tmp_path, False
+                elif 'path' in request:
+                    sample_path, save = request['path'], bool(request.get('save', False))
+                    if not os.path.exists(sample_path):
+                        self._reply(404, {'error': f'Fichier non trouvé: {sample_path}'})
+                        return
+                else:
+                    self._reply(400, {'error': "Requête sans 'path' ni 'sample'"})
+                    return
+                source_name = request.get('source_name')
+        except ValueError as e:
+            self._reply(400, {'error': f'Requête invalide: {e}'})
+            return
+
+        try:
+            try:
+                job = self.service.submit(sample_path, save, source_name)
+            except queue.Full:
+                self._reply(503, {'error': "File d'inférence pleine"})
+                return
+            job.done.wait()
+            if job.error:
+                self._reply(500, {'error': job.error})
+            else:
+                self._reply(200, job.result)
+        finally:
+            if tmp_path:
+                os.remove(tmp_path)
+
+    @staticmethod
+    def _spool(data: bytes, suffix: str) -> str:
+        """Échantillon envoyé dans le corps -> fichier temporaire (SVGDataset.load lit un chemin)."""
+        fd, path = tempfile.mkstemp(suffix=suffix)
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+        return path
+
+
+def serve(model, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+          queue_size: int = DEFAULT_QUEUE_SIZE, max_batch: int = 1):
+    """Lance le serveur (bloquant)."""
+    service = InferenceService(model, queue_size, max_batch)
+    handler = type('Handler', (_Handler,), {'service': service})
+    server = ThreadingHTTPServer((host, port), handler)
+    print(f"🚀 Serveur d'inférence: http://{host}:{port} (modèle: {service.health()['model']})")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        print("\n⏹️ Arrêt du serveur")
+    finally:
+        server.server_close()
+
+
+# ============================================================================
+# CLIENT
+# ============================================================================
+
+def request_prediction(sample_path: str, url: str = f'http://{DEFAULT_HOST}:{DEFAULT_PORT}',
+                       save: bool = True, timeout: float = 600) -> dict:
+    """Envoie un échantillon local au serveur et retourne le _pred.json."""
+    payload = json.dumps({'path': os.path.abspath(sample_path), 'save': save}).encode()
+    req = urllib.request.Request(url.rstrip('/') + '/predict', data=payload,
+                                 headers={'Content-Type': 'application/json'})
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as resp:
+            return json.load(resp)
+    except urllib.error.HTTPError as e:
+        raise RuntimeError(json.load(e).get('error', str(e))) from None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serveur d'inférence SymPointV2")
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_serve = sub.add_parser('serve', help='Lancer le serveur')
+    p_serve.add_argument('--host', default=DEFAULT_HOST)
+    p_serve.add_argument('--port', type=int, default=DEFAULT_PORT)
+    p_serve.add_argument('--model', default='sympointv2',
+                         help="sympointv2, stub ou module:Classe")
+    p_serve.add_argument('--config', default=DEFAULT_CONFIG)
+    p_serve.add_argument('--checkpoint', default=DEFAULT_CHECKPOINT)
+    p_serve.add_argument('--device', choices=['cpu', 'cuda'], default=None,
+                         help='Device SymPointV2 (défaut: cuda si disponible)')
+    p_serve.add_argument('--queue-size', type=int, default=DEFAULT_QUEUE_SIZE,
+                         help='Requêtes en attente max (au-delà: HTTP 503)')
+    p_serve.add_argument('--max-batch', type=int, default=1,
+                         help='Plans regroupés par passe avant (requêtes en attente)')
+
+    p_pred = sub.add_parser('predict', help='Envoyer des échantillons à un serveur lancé')
+    p_pred.add_argument('samples', nargs='+', help='Fichiers _s2.json / _s2.npz')
+    p_pred.add_argument('--url', default=f'http://{DEFAULT_HOST}:{DEFAULT_PORT}')
+    p_pred.add_argument('--no-save', action='store_true', help='Ne pas écrire les _pred.json')
+
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        print(f"📦 Chargement du modèle ({args.model})...")
+        model = load_model_backend(args.model, args.config, args.checkpoint, args.device)
+        serve(model, args.host, args.port, args.queue_size, args.max_batch)
+        return
+
+    failed = 0
+    for sample in args.samples:
+        try:
+            output = request_prediction(sample, args.url, save=not args.no_save)
+        except (RuntimeError, urllib.error.URLError) as e:
+            print(f"❌ {sample}: {e}")
+            failed += 1
+            continue
+        print(f"✅ {sample}: {output['num_primitives']} primitives, "
+              f"{output['num_instances']} instances"
+              + (f" -> {output['output']}" if 'output' in output else ''))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+#!/usr/bin/env python
+"""
+jit_cache.py - Sous-modules TorchScript du modèle, mis en cache à côté du checkpoint
+
+SVGNet mélange des blocs torch.nn standards (MLP, BatchNorm, LayerNorm...)
+et du code Python dépendant des données (pointops, offsets, décodage des
+instances) que ni trace ni script ne capturent. Seuls les blocs stables
+sont compilés: les sous-modules maximaux dont tout le sous-arbre est fait
+de modules torch.nn (au moins MIN_LEAVES couches) sont scriptés
+(torch.jit.script) et remplacent l'original dans le modèle.
+
+Cache: <checkpoint>.jit/<sha256 du checkpoint[:16]>_<sha256 du config[:8]>_torch<version>_<device>/<nom>.pt
+(poids inclus, d'où le hash du checkpoint; le config fixe l'architecture). Un bloc qui ne se scripte pas
+reste en eager (compté dans 'failed').
+
+torch.jit est déprécié dans les versions récentes de PyTorch (FutureWarning
+masqué ici), mais reste la seule compilation sérialisable sans compilateur C++.
+"""
+
+import os
+import hashlib
+import warnings
+from typing import Dict, List, Tuple
+
+import torch
+
+from model_state import checkpoint_sha256
+
+JIT_CACHE_SUFFIX = '.jit'
+MIN_LEAVES = 2
+
+
+def _is_torch_nn(module: torch.nn.Module) -> bool:
+    return type(module).__module__.startswith('torch.nn')
+
+
+def stable_submodules(model: torch.nn.Module, min_leaves: int = MIN_LEAVES) -> List[Tuple[str, torch.nn.Module]]:
+    """Sous-modules maximaux entièrement torch.nn, avec au moins min_leaves couches."""
+    found = []
+
+    def visit(prefix, module):
+        for name, child in module.named_children():
+            path = f"{prefix}.{name}" if prefix else name
+            subtree = list(child.modules())
+            if all(_is_torch_nn(m) for m in subtree):
+                leaves = sum(1 for m in subtree if not list(m.children()))
+                if leaves >= min_leaves:
+                    found.append((path, child))
+            else:
+                visit(path, child)
+
+    visit('', model)
+    return found
+
+
+def jit_cache_dir(checkpoint_path: str, config_path: str, device: str) -> str:
+    with open(config_path, 'rb') as f:
+        config_sha = hashlib.sha256(f.read()).hexdigest()
+    key = (f"{checkpoint_sha256(checkpoint_path)[:16]}_{config_sha[:8]}"
+           f"_torch{torch.__version__.split('+')[0]}_{device}")
+    return os.path.join(checkpoint_path + JIT_CACHE_SUFFIX, key)
+
+
+def _replace(model: torch.nn.Module, path: str, module: torch.nn.Module):
+    parent_path, _, name = path.rpartition('.')
+    parent = model.get_submodule(parent_path) if parent_path else model
+    parent._modules[name] = module
+
+
+def compile_stable_modules(model: torch.nn.Module, checkpoint_path: str, config_path: str,
+                           device: str) -> Dict:
+    """
+    Remplace les blocs stables du modèle (en eval) par leur version TorchScript,
+    relue du cache si présente, sinon scriptée puis sauvegardée.
+
+    Returns:
+        {'compiled': n scriptés, 'cached': n relus du cache, 'failed': n restés eager, 'dir': cache}
+    """
+    cache_dir = jit_cache_dir(checkpoint_path, config_path, device)
+    os.makedirs(cache_dir, exist_ok=True)
+    stats = {'compiled': 0, 'cached': 0, 'failed': 0, 'dir': cache_dir}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', FutureWarning)
+        for path, module in stable_submodules(model):
+            artifact = os.path.join(cache_dir, path + '.pt')
+            if os.path.exists(artifact):
+                try:
+                    _replace(model, path, torch.jit.load(artifact, map_location=device).eval())
+                    stats['cached'] += 1
+                    continue
+                except Exception:
+                    os.remove(artifact)  # Artefact illisible (tronqué, vide...): recompilé
+            try:
+                scripted = torch.jit.script(module.eval())
+            except Exception:
+                stats['failed'] += 1
+                continue
+            tmp_path = artifact + '.tmp'
+            torch.jit.save(scripted, tmp_path)
+            os.replace(tmp_path, artifact)
+            _replace(model, path, scripted)
+            stats['compiled'] += 1
+    return stats
@@ -0,0 +1,205 @@
+#!/usr/bin/env python
+"""
+model_state.py - État du modèle préparé, mis en cache à côté du checkpoint
+
+Le checkpoint d'entraînement (best.pth) est un pickle complet: poids, état de
+l'optimiseur, clés absentes du modèle d'inférence. Le charger à chaque
+lancement (torch.load puis filtrage des clés) domine le démarrage d'un job
+sur un seul plan.
+
+Au premier chargement, l'état filtré (clés de model.state_dict() uniquement,
+tenseurs contigus) est écrit une fois:
+
+    <checkpoint>.state/<sha256 du checkpoint[:16]>_<sha256 du config[:8]>.safetensors
+    (ou .pt si safetensors n'est pas installé)
+
+Les lancements suivants le relisent en mmap (safetensors, ou
+torch.load(mmap=True, weights_only=True)): pas de dépickling du checkpoint,
+les pages sont lues à la copie dans le modèle. Le hash du checkpoint est
+mémorisé dans <checkpoint>.state/fingerprint.json (taille + mtime), pour ne
+pas relire tout le fichier à chaque démarrage.
+
+Usage:
+    python model_state.py prepare --config svg_pointT.yaml --checkpoint best.pth
+    python model_state.py info --checkpoint best.pth
+"""
+
+import os
+import sys
+import json
+import hashlib
+import argparse
+from typing import Dict, Optional, Tuple
+
+import torch
+
+from parse_cache import file_sha256
+
+try:
+    from safetensors.torch import load_file as _safetensors_load, save_file as _safetensors_save
+except ImportError:
+    _safetensors_load = _safetensors_save = None
+
+STATE_CACHE_SUFFIX = '.state'
+FINGERPRINT_FILE = 'fingerprint.json'
+STATE_FORMATS = ('safetensors', 'pt')
+DEFAULT_FORMAT = 'safetensors' if _safetensors_save is not None else 'pt'
+
+
+def state_cache_root(checkpoint_path: str) -> str:
+    return checkpoint_path + STATE_CACHE_SUFFIX
+
+
+def checkpoint_sha256(checkpoint_path: str) -> str:
+    """
+    file_sha256 du checkpoint, mémorisé sous <checkpoint>.state tant que la
+    taille et le mtime du fichier ne changent pas.
+    """
+    stat = os.stat(checkpoint_path)
+    memo_path = os.path.join(state_cache_root(checkpoint_path), FINGERPRINT_FILE)
+    try:
+        with open(memo_path) as f:
+            memo = json.load(f)
+        if memo['size'] == stat.st_size and memo['mtime_ns'] == stat.st_mtime_ns:
+            return memo['sha256']
+    except (OSError, ValueError, KeyError):
+        pass
+
+    sha = file_sha256(checkpoint_path)
+    try:
+        os.makedirs(os.path.dirname(memo_path), exist_ok=True)
+        tmp_path = f"{memo_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'size': stat.st_size, 'mtime_ns': stat.st_mtime_ns, 'sha256': sha}, f)
+        os.replace(tmp_path, memo_path)
+    except OSError:
+        pass  # Dossier du checkpoint en lecture seule: hash recalculé au prochain lancement
+    return sha
+
+
+def state_cache_path(checkpoint_path: str, config_path: str, fmt: str = DEFAULT_FORMAT) -> str:
+    """Clé = contenu du checkpoint + contenu du config (qui fixe les clés du modèle)."""
+    with open(config_path, 'rb') as f:
+        config_sha = hashlib.sha256(f.read()).hexdigest()
+    name = f"{checkpoint_sha256(checkpoint_path)[:16]}_{config_sha[:8]}.{fmt}"
+    return os.path.join(state_cache_root(checkpoint_path), name)
+
+
+def filter_state(model: torch.nn.Module, checkpoint: dict) -> Dict[str, torch.Tensor]:
+    """Poids du checkpoint ('net') dont la clé existe dans le modèle, contigus."""
+    weights = checkpoint.get('net', checkpoint)
+    model_keys = set(model.state_dict().keys())
+    return {k: v.contiguous() for k, v in weights.items() if k in model_keys}
+
+
+# ============================================================================
+# LECTURE / ÉCRITURE
+# ============================================================================
+
+def save_state(state: Dict[str, torch.Tensor], path: str):
+    """Écriture atomique (.safetensors ou .pt selon l'extension)."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        if path.endswith('.safetensors'):
+            if _safetensors_save is None:
+                raise RuntimeError("safetensors non installé (pip install safetensors)")
+            # safetensors refuse les tenseurs qui partagent leur stockage (poids liés)
+            _safetensors_save({k: v.clone() for k, v in state.items()}, tmp_path)
+        else:
+            torch.save(state, tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def load_state(path: str) -> Dict[str, torch.Tensor]:
+    """Relit un état préparé en mmap (tenseurs CPU adossés au fichier)."""
+    if path.endswith('.safetensors'):
+        if _safetensors_load is None:
+            raise RuntimeError("safetensors non installé (pip install safetensors)")
+        return _safetensors_load(path, device='cpu')
+    return torch.load(path, map_location='cpu', mmap=True, weights_only=True)
+
+
+def load_model_state(model: torch.nn.Module, checkpoint_path: str, config_path: str,
+                     use_cache: bool = True, fmt: str = DEFAULT_FORMAT) -> Tuple[Optional[str], bool]:
+    """
+    Charge les poids du checkpoint dans model (strict=False, comme avant),
+    depuis l'état préparé si présent, sinon depuis le checkpoint puis en
+    écrivant l'état préparé.
+
+    Returns:
+        (chemin de l'état préparé ou None sans cache, True si relu du cache)
+    """
+    if not use_cache:
+        state = filter_state(model, torch.load(checkpoint_path, map_location='cpu'))
+        model.load_state_dict(state, strict=False)
+        return None, False
+
+    path = state_cache_path(checkpoint_path, config_path, fmt)
+    if os.path.exists(path):
+        try:
+            model.load_state_dict(load_state(path), strict=False)
+            return path, True
+        except Exception:
+            # État illisible ou incompatible (dont SafetensorError, fichier tronqué): préparé à nouveau
+            os.remove(path)
+
+    state = filter_state(model, torch.load(checkpoint_path, map_location='cpu'))
+    model.load_state_dict(state, strict=False)
+    try:
+        save_state(state, path)
+    except OSError as e:
+        print(f"⚠️ État préparé non écrit ({e})")
+        return None, False
+    return path, False
+
+
+# ============================================================================
+# CLI
+# ============================================================================
+
+def main():
+    parser = argparse.ArgumentParser(description='État du modèle préparé (cache à côté du checkpoint)')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p_prepare = sub.add_parser('prepare', help='Écrire l\'état préparé (construit le modèle sur CPU)')
+    p_prepare.add_argument('--config', required=True)
+    p_prepare.add_argument('--checkpoint', required=True)
+    p_prepare.add_argument('--format', choices=STATE_FORMATS, default=DEFAULT_FORMAT)
+
+    p_info = sub.add_parser('info', help='États préparés d\'un checkpoint')
+    p_info.add_argument('--checkpoint', required=True)
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.checkpoint):
+        print(f"❌ Checkpoint non trouvé: {args.checkpoint}")
+        sys.exit(1)
+
+    if args.command == 'prepare':
+        if args.format == 'safetensors' and _safetensors_save is None:
+            print("❌ safetensors non installé (pip install safetensors, ou --format pt)")
+            sys.exit(1)
+        from run_inference_v2 import build_model
+        model = build_model(args.config, 'cpu')
+        path, cached = load_model_state(model, args.checkpoint, args.config, fmt=args.format)
+        if path is None:
+            sys.exit(1)
+        size = os.path.getsize(path) / 1024 / 1024
+        print(f"✅ {path} ({size:.1f} Mo{', déjà préparé' if cached else ''})")
+        return
+
+    root = state_cache_root(args.checkpoint)
+    entries = sorted(name for name in os.listdir(root) if name.endswith(tuple('.' + fmt for fmt in STATE_FORMATS))) \
+        if os.path.isdir(root) else []
+    print(f"📦 {args.checkpoint}: {len(entries)} état(s) préparé(s)")
+    for name in entries:
+        print(f"   {name:50s} {os.path.getsize(os.path.join(root, name)) / 1024 / 1024:8.1f} Mo")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,52 @@
+#!/usr/bin/env python
+"""
+page_range.py - Sélection de pages pour les PDFs multi-pages
+
+Les dossiers de permis regroupent 10 à 30 niveaux dans un seul PDF.
+Spécification des pages (numérotation 1 = première page):
+    "all"        toutes les pages
+    "3"          une page
+    "1-4,7,9-"   plages, "9-" = jusqu'à la fin
+"""
+
+import os
+from typing import List, Optional
+
+
+def parse_page_spec(spec: str, page_count: int) -> List[int]:
+    """
+    Convertit une spécification de pages en indices 0-based triés, sans doublons.
+    Lève ValueError ("Pages invalides ...") si la spécification est vide, mal
+    formée ou hors du document.
+    """
+    if spec is None or spec.strip().lower() == 'all':
+        return list(range(page_count))
+
+    indices = set()
+    for part in spec.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        try:
+            if '-' in part:
+                start, end = part.split('-', 1)
+                start = int(start) if start.strip() else 1
+                end = int(end) if end.strip() else page_count
+            else:
+                start = end = int(part)
+        except ValueError:
+            raise ValueError(f"Pages invalides '{part}' (numéros ou plages attendus: \"3\", \"1-4,7\", \"all\")") from None
+        if start < 1 or end > page_count or start > end:
+            raise ValueError(f"Pages invalides '{part}' (document de {page_count} pages)")
+        indices.update(range(start - 1, end))
+
+    if not indices:
+        raise ValueError(f"Pages invalides '{spec}' (aucune page)")
+    return sorted(indices)
+
+
+def page_output_path(pdf_path: str, page_index: int, output_dir: Optional[str] = None,
+                     suffix: str = '_s2.json') -> str:
+    """Chemin de sortie d'une page: plan.pdf, page 3 -> plan_p3_s2.json."""
+    base = os.path.splitext(os.path.basename(pdf_path))[0] + f'_p{page_index + 1}' + suffix
+    return os.path.join(output_dir or os.path.dirname(pdf_path), base)
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+"""
+parse_cache.py - Cache disque des extractions brutes, adressé par contenu
+
+On relance le parser sur les mêmes PDFs en ajustant les seuils en aval:
+get_drawings() domine le temps de parse et ne dépend que du fichier.
+Le cache stocke les tableaux bruts (avant seuils et filtrage par zones)
+sous la clé sha256(PDF) + version du parser + page, au format .npz.
+
+- Écriture atomique (fichier temporaire + os.replace): sûr entre workers
+- Éviction LRU bornée en taille (mtime rafraîchi à chaque lecture)
+- Emplacement: $SYMPOINT_CACHE_DIR ou ~/.cache/sympointv2-tools/parse
+"""
+
+import os
+import json
+import hashlib
+import tempfile
+import numpy as np
+from typing import Dict, Optional, Tuple
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'sympointv2-tools', 'parse')
+DEFAULT_MAX_SIZE_MB = 2048
+
+_META_KEY = '__meta__'
+
+
+def file_sha256(path: str, chunk_size: int = 1 << 20) -> str:
+    """Hash du contenu d'un fichier (lecture par blocs)."""
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+class ParseCache:
+    """Cache LRU sur disque de dictionnaires de tableaux NumPy + métadonnées JSON."""
+
+    def __init__(self, cache_dir: Optional[str] = None, max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+        self.cache_dir = cache_dir or os.environ.get('SYMPOINT_CACHE_DIR') or DEFAULT_CACHE_DIR
+        self.max_bytes = max_size_mb * 1024 * 1024
+        self.hits = 0
+        self.misses = 0
+
+    def key(self, pdf_path: str, version: str, page_index: int = 0) -> str:
+        """Clé = contenu du PDF + version du parser + page."""
+        return f"{file_sha256(pdf_path)}_{version}_p{page_index}"
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + '.npz')
+
+    def get(self, key: str) -> Optional[Tuple[Dict[str, np.ndarray], dict]]:
+        """Retourne (tableaux, métadonnées) ou None si absent/corrompu."""
+        path = self._path(key)
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                arrays = {name: data[name] for name in data.files if name != _META_KEY}
+                meta = json.loads(str(data[_META_KEY]))
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        except Exception:
+            # Entrée tronquée ou corrompue (BadZipFile, EOFError...): supprimée, comptée comme absente
+            self.misses += 1
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)  # LRU: dernière utilisation
+        except OSError:
+            pass
+        self.hits += 1
+        return arrays, meta
+
+    def put(self, key: str, arrays: Dict[str, np.ndarray], meta: dict):
+        """Écrit une entrée (atomique) puis applique la limite de taille."""
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(f, **arrays, **{_META_KEY: np.array(json.dumps(meta))})
+            os.replace(tmp_path, path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+        self.evict()
+
+    def evict(self):
+        """Supprime les entrées les moins récemment utilisées au-delà de max_bytes."""
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npz'):
+                    path = os.path.join(root, name)
+                    try:
+                        st = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+                total -= size
+            except OSError:
+                pass
+
+    def clear(self):
+        """Vide le cache."""
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith('.npz'):
+                    os.remove(os.path.join(root, name))
@@ -0,0 +1,331 @@
+#!/usr/bin/env python
+"""
+pipeline.py - Pipeline PDF -> _pred.json (parsing CPU et inférence GPU en parallèle)
+
+Enchaîner universal_pdf_parser.py puis run_inference_v2.py sur un dossier
+laisse le GPU inactif pendant le parsing, et le CPU pendant l'inférence.
+Ici les deux se recouvrent:
+
+    workers CPU (processus)           thread d'alimentation          consommateur (thread principal)
+    parse_pdf -> _s2.json      --->   file bornée (prefetch)   --->   passe avant (mémoire épinglée)
+    model.prepare(_s2.json)                                           remapping murs -> _pred.json
+
+- au plus workers + prefetch plans en cours (parsés ou en attente): quand le
+  consommateur prend du retard, la file se remplit et plus aucun PDF n'est
+  soumis (mémoire bornée)
+- les plans prêts sont regroupés par passe avant sous --batch-primitives
+- le modèle est un backend de inference_server.py: 'sympointv2' (GPU),
+  'stub' (CPU, tests sans torch) ou 'module:Classe'. La partie CPU
+  (Classe.prepare, statique) tourne dans les workers, la passe avant
+  (predict_prepared) dans le thread principal
+- un PDF en échec est noté dans le manifeste sans arrêter le pipeline
+
+Usage:
+    python pipeline.py plans/ --workers 4
+    python pipeline.py "plans/**/*.pdf" --output-dir out/ --prefetch 8 --batch-primitives 32768
+    python pipeline.py plans/ --model stub --dedup
+"""
+
+import io
+import os
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import contextlib
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+import universal_pdf_parser as universal
+from universal_pdf_parser import ParseOptions, find_batch_inputs
+from predictions import postprocess, prediction_output_path, save_prediction_output
+from inference_server import model_class, load_model_backend
+from width_stats import THRESHOLD_METHODS
+
+DEFAULT_PREFETCH = 4
+DEFAULT_BATCH_PRIMITIVES = 16384  # Comme run_inference_v2.py
+
+_DONE = object()  # Fin de la file
+
+
+@dataclass
+class PreparedPlan:
+    """Sortie d'un worker CPU: _s2.json écrit et échantillon préparé pour le modèle."""
+    pdf: str
+    sample_path: Optional[str] = None
+    prepared: object = None
+    layer_ids: Optional[np.ndarray] = None
+    primitives: int = 0
+    parse_seconds: float = 0.0
+    status: str = 'ok'
+    error: Optional[str] = None
+
+
+# ============================================================================
+# WORKERS CPU
+# ============================================================================
+
+def _prepare_worker(task: Tuple[str, str, ParseOptions, str]) -> PreparedPlan:
+    """Parse un PDF et prépare l'échantillon (processus worker). Ne lève jamais."""
+    pdf_path, output_path, options, model_spec = task
+    plan = PreparedPlan(pdf_path)
+    t0 = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            plan.sample_path = universal.parse_pdf(pdf_path, output_path, options=options)
+            if plan.sample_path is None:
+                plan.status = 'empty'
+            else:
+                from sample_io import load_sample
+                plan.layer_ids = np.asarray(load_sample(plan.sample_path).get('layerIds', []))
+                plan.primitives = len(plan.layer_ids)
+                prepare = getattr(model_class(model_spec), 'prepare', None)
+                plan.prepared = prepare(plan.sample_path) if prepare is not None else plan.sample_path
+    except Exception as e:
+        plan.status = 'error'
+        plan.error = f"{type(e).__name__}: {e}"
+    finally:
+        universal._extraction_cache.clear()
+    plan.parse_seconds = round(time.perf_counter() - t0, 3)
+    return plan
+
+
+def _feed(executor: ProcessPoolExecutor, tasks: list, ready: queue.Queue, max_pending: int,
+          stop: threading.Event):
+    """
+    Thread d'alimentation: soumet les PDFs aux workers (au plus max_pending en
+    cours) et pousse les plans préparés dans la file bornée (bloque si pleine).
+    """
+    pending, tasks = {}, iter(tasks)  # future -> PDF
+    exhausted = False
+    try:
+        while not stop.is_set():
+            while not exhausted and len(pending) + ready.qsize() < max_pending:
+                task = next(tasks, None)
+                if task is None:
+                    exhausted = True
+                    break
+                pending[executor.submit(_prepare_worker, task)] = task[0]
+            if not pending:
+                break
+            done, _ = wait(pending, timeout=0.5, return_when=FIRST_COMPLETED)
+            for future in done:
+                pdf = pending.pop(future)
+                try:
+                    plan = future.result()
+                except Exception as e:  # Worker tué (mémoire, signal)
+                    plan = PreparedPlan(pdf, status='error', error=f"{type(e).__name__}: {e}")
+                while not stop.is_set():
+                    try:
+                        ready.put(plan, timeout=0.5)
+                        break
+                    except queue.Full:
+                        continue
+    finally:
+        while True:
+            try:
+                ready.put(_DONE, timeout=0.5)
+                break
+            except queue.Full:
+                if stop.is_set():  # Consommateur arrêté: personne ne lira la fin
+                    break
+
+
+# ============================================================================
+# CONSOMMATEUR (PASSES AVANT)
+# ============================================================================
+
+class _BatchReader:
+    """Regroupe les plans prêts de la file en passes avant sous le budget de primitives."""
+
+    def __init__(self, ready: queue.Queue, max_primitives: int):
+        self.ready = ready
+        self.max_primitives = max_primitives
+        self.held = None        # Plan hors budget, gardé pour la passe suivante
+        self.finished = False
+
+    def next_batch(self) -> List[PreparedPlan]:
+        """Attend un plan puis ajoute ceux déjà prêts tant que le budget tient ([] en fin de file)."""
+        item, self.held = (self.held, None) if self.held is not None else (self.ready.get(), None)
+        if item is _DONE:
+            self.finished = True
+            return []
+        batch, total = [item], item.primitives
+        while item.status == 'ok':
+            try:
+                item = self.ready.get_nowait()
+            except queue.Empty:
+                break
+            if item is _DONE or item.status != 'ok' or total + item.primitives > self.max_primitives:
+                self.held = item
+                break
+            batch.append(item)
+            total += item.primitives
+        return batch
+
+
+def _predict(model, plans: List[PreparedPlan]):
+    if hasattr(model, 'predict_prepared'):
+        return model.predict_prepared([p.prepared for p in plans])
+    if len(plans) > 1 and hasattr(model, 'predict_batch'):
+        return model.predict_batch([p.sample_path for p in plans])
+    return [model.predict(p.sample_path) for p in plans]
+
+
+def run_pipeline(pdf_paths: List[str], model, model_spec: str, output_dir: Optional[str] = None,
+                 workers: Optional[int] = None, prefetch: int = DEFAULT_PREFETCH,
+                 max_primitives: int = DEFAULT_BATCH_PRIMITIVES,
+                 options: Optional[ParseOptions] = None) -> dict:
+    """
+    PDFs -> _s2.json -> _pred.json, parsing et inférence recouverts.
+
+    Args:
+        model: backend instancié (load_model_backend), model_spec: son nom
+               ('stub', 'sympointv2', 'module:Classe') résolu dans les workers
+        prefetch: plans préparés en attente au-delà des workers
+
+    Returns:
+        Manifeste (entrées par PDF + temps GPU / total)
+    """
+    options = options or ParseOptions()
+    workers = max(1, min(workers or os.cpu_count() or 1, len(pdf_paths)))
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    tasks = [(pdf, universal._batch_output_path(pdf, output_dir), options, model_spec) for pdf in pdf_paths]
+
+    print(f"\n{'='*60}")
+    print(f"🚚 PIPELINE PDF -> _pred.json ({len(pdf_paths)} PDFs, {workers} workers, prefetch {prefetch})")
+    print(f"{'='*60}")
+
+    ready = queue.Queue(maxsize=max(1, prefetch))
+    stop = threading.Event()
+    entries, infer_seconds = [], 0.0
+    t0 = time.perf_counter()
+
+    # spawn: les workers n'héritent pas du contexte CUDA du processus principal
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=universal.configure_cache,
+                             initargs=universal._cache_config) as executor:
+        feeder = threading.Thread(target=_feed, args=(executor, tasks, ready, workers + prefetch, stop),
+                                  daemon=True)
+        feeder.start()
+        reader = _BatchReader(ready, max_primitives)
+        try:
+            while not reader.finished:
+                plans = reader.next_batch()
+                runnable = [p for p in plans if p.status == 'ok']
+                for plan in plans:
+                    if plan.status != 'ok':
+                        entries.append(_entry(plan))
+                        icon = '⚠️' if plan.status == 'empty' else '❌'
+                        print(f"   {icon} {os.path.basename(plan.pdf)}: {plan.error or plan.status}")
+                if not runnable:
+                    continue
+
+                start = time.perf_counter()
+                try:
+                    predictions = _predict(model, runnable)
+                except Exception as e:
+                    predictions = [e] * len(runnable)
+                seconds = time.perf_counter() - start
+                infer_seconds += seconds
+
+                for plan, prediction in zip(runnable, predictions):
+                    entry = _entry(plan, infer_seconds=round(seconds / len(runnable), 3))
+                    if isinstance(prediction, Exception):
+                        entry.update(status='error', error=f"{type(prediction).__name__}: {prediction}")
+                        print(f"   ❌ {os.path.basename(plan.pdf)}: {entry['error']}")
+                    else:
+                        sem_preds_raw, num_instances = prediction
+                        output = postprocess(plan.sample_path, np.asarray(sem_preds_raw),
+                                             plan.layer_ids, num_instances)
+                        entry['prediction'] = save_prediction_output(
+                            output, prediction_output_path(plan.sample_path))
+                        print(f"   ✅ {os.path.basename(plan.pdf)}: {plan.primitives} primitives "
+                              f"(parse {plan.parse_seconds:.2f}s) -> {entry['prediction']}")
+                    entries.append(entry)
+        finally:
+            stop.set()
+            feeder.join()
+
+    total = time.perf_counter() - t0
+    manifest = {
+        'total': len(entries),
+        'succeeded': sum(e['status'] == 'ok' for e in entries),
+        'empty': sum(e['status'] == 'empty' for e in entries),
+        'failed': sum(e['status'] == 'error' for e in entries),
+        'workers': workers,
+        'prefetch': prefetch,
+        'model': model_spec,
+        'seconds': round(total, 3),
+        'infer_seconds': round(infer_seconds, 3),
+        'files': entries,
+    }
+    print(f"\n📊 {manifest['succeeded']}/{manifest['total']} plans en {total:.1f}s "
+          f"(inférence {infer_seconds:.1f}s, {100 * infer_seconds / max(total, 1e-9):.0f}% du temps)")
+    return manifest
+
+
+def _entry(plan: PreparedPlan, **extra) -> dict:
+    entry = {'pdf': plan.pdf, 'output': plan.sample_path, 'status': plan.status,
+             'primitives': plan.primitives, 'parse_seconds': plan.parse_seconds,
+             'error': plan.error}
+    entry.update(extra)
+    return entry
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pipeline PDF -> _pred.json (parsing et inférence recouverts)')
+    parser.add_argument('inputs', nargs='+', help='PDFs, dossiers ou motifs glob ("plans/**/*.pdf")')
+    parser.add_argument('--output-dir', help='Dossier des _s2.json / _pred.json (défaut: à côté des PDFs)')
+    parser.add_argument('--manifest', help='Manifeste JSON (défaut: pipeline_manifest.json)')
+    parser.add_argument('--workers', type=int, default=None, help='Workers de parsing (défaut: nombre de CPUs)')
+    parser.add_argument('--prefetch', type=int, default=DEFAULT_PREFETCH,
+                        help=f'Plans préparés en attente du GPU (défaut: {DEFAULT_PREFETCH})')
+    parser.add_argument('--batch-primitives', type=int, default=DEFAULT_BATCH_PRIMITIVES,
+                        help=f'Primitives max par passe avant (défaut: {DEFAULT_BATCH_PRIMITIVES})')
+    parser.add_argument('--model', default='sympointv2', help='sympointv2, stub ou module:Classe')
+    parser.add_argument('--config', default='/workspace/SymPointV2/checkpoints/sympointv2/svg_pointT.yaml')
+    parser.add_argument('--checkpoint', default='/workspace/SymPointV2/checkpoints/sympointv2/best.pth')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=None)
+    parser.add_argument('--ocg-layers', action='store_true', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--dedup', action='store_true', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--width-threshold', choices=THRESHOLD_METHODS, default='percentile')
+    parser.add_argument('--max-primitives', type=int, metavar='N', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--float-precision', type=int, metavar='N', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--no-cache', action='store_true', help='Ne pas utiliser le cache disque des extractions')
+
+    args = parser.parse_args()
+    pdfs = []
+    for item in args.inputs:
+        pdfs.extend(find_batch_inputs(item) if not os.path.isfile(item) else [item])
+    if not pdfs:
+        print(f"❌ Aucun PDF trouvé: {' '.join(args.inputs)}")
+        sys.exit(1)
+
+    universal.configure_cache(not args.no_cache)
+    options = ParseOptions(ocg_layers=args.ocg_layers, dedup=args.dedup,
+                           max_primitives=args.max_primitives, width_threshold=args.width_threshold,
+                           float_precision=args.float_precision)
+
+    print(f"📦 Chargement du modèle ({args.model})...")
+    model = load_model_backend(args.model, args.config, args.checkpoint, args.device)
+    manifest = run_pipeline(pdfs, model, args.model, args.output_dir, args.workers, args.prefetch,
+                            args.batch_primitives, options)
+
+    manifest_path = args.manifest or os.path.join(args.output_dir or '.', 'pipeline_manifest.json')
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    print(f"💾 Manifeste: {manifest_path}")
+    sys.exit(0 if manifest['succeeded'] and not manifest['failed'] else 1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python
+"""
+pointops_cpu.py - Opérateurs pointops en PyTorch pur (exécution sans GPU)
+
+Les opérateurs de SymPointV2 (modules/pointops) sont des extensions CUDA:
+sans GPU le modèle ne tourne pas. Ce module fournit des équivalents
+PyTorch, calculés segment par segment selon le tenseur offset (fin
+cumulée de chaque nuage de points), et les installe à la place des
+opérateurs CUDA:
+
+- knnquery(nsample, xyz, new_xyz, offset, new_offset) -> (idx, dist)
+- furthestsampling(xyz, offset, new_offset) -> idx
+- grouping(feat, idx) / queryandgroup(...)
+- interpolation(xyz, new_xyz, feat, offset, new_offset, k=3, out=None)
+  (celle de pointops_patch.py, avec le clamp des indices)
+
+Fonctionne aussi sur GPU (device des tenseurs d'entrée), plus lentement
+que les noyaux CUDA.
+"""
+
+import sys
+import types
+import torch
+
+from pointops_patch import make_interpolation
+
+# Requêtes traitées par blocs pour borner la matrice de distances (bloc x segment)
+KNN_CHUNK = 4096
+
+_installed = False
+
+
+def _segments(offset):
+    """offset (fins cumulées) -> liste (début, fin)."""
+    ends = offset.tolist()
+    return list(zip([0] + ends[:-1], ends))
+
+
+def knnquery(nsample, xyz, new_xyz, offset, new_offset):
+    """
+    k plus proches voisins de chaque point de new_xyz dans xyz (même segment).
+
+    Returns:
+        idx (m, nsample) int32 indices globaux dans xyz, dist (m, nsample) distances
+    """
+    if new_xyz is None:
+        new_xyz, new_offset = xyz, offset
+    m = new_xyz.shape[0]
+    idx = torch.zeros((m, nsample), dtype=torch.int32, device=xyz.device)
+    dist = torch.zeros((m, nsample), dtype=xyz.dtype, device=xyz.device)
+
+    for (s, e), (ns, ne) in zip(_segments(offset), _segments(new_offset)):
+        if e <= s:
+            continue
+        k = min(nsample, e - s)
+        points = xyz[s:e]
+        for qs in range(ns, ne, KNN_CHUNK):
+            qe = min(qs + KNN_CHUNK, ne)
+            # Distances exactes (le mode matmul de cdist perd la précision sur les petites distances)
+            d2 = torch.cdist(new_xyz[qs:qe], points,
+                             compute_mode='donot_use_mm_for_euclid_dist').pow(2)
+            top_d2, top_idx = torch.topk(d2, k, dim=1, largest=False)
+            if k < nsample:
+                # Segment plus petit que nsample: on répète les voisins trouvés
+                repeat = torch.arange(nsample, device=xyz.device) % k
+                top_d2, top_idx = top_d2[:, repeat], top_idx[:, repeat]
+            idx[qs:qe] = (top_idx + s).to(torch.int32)
+            dist[qs:qe] = torch.sqrt(top_d2)
+    return idx, dist
+
+
+def furthestsampling(xyz, offset, new_offset):
+    """Échantillonnage par point le plus éloigné, par segment (premier point = début du segment)."""
+    idx = torch.zeros(int(new_offset[-1]), dtype=torch.int32, device=xyz.device)
+
+    for (s, e), (ns, ne) in zip(_segments(offset), _segments(new_offset)):
+        if ne <= ns:
+            continue
+        points = xyz[s:e]
+        min_d2 = torch.full((e - s,), float('inf'), dtype=xyz.dtype, device=xyz.device)
+        current = 0
+        for i in range(ns, ne):
+            idx[i] = s + current
+            min_d2 = torch.minimum(min_d2, ((points - points[current]) ** 2).sum(dim=1))
+            current = int(torch.argmax(min_d2))
+    return idx
+
+
+def grouping(feat, idx):
+    """feat (n, c), idx (m, nsample) -> (m, nsample, c)"""
+    return feat[idx.long()]
+
+
+def queryandgroup(nsample, xyz, new_xyz, feat, idx, offset, new_offset, use_xyz=True):
+    """Voisinage de chaque point de new_xyz: coordonnées relatives (+ features)."""
+    if new_xyz is None:
+        new_xyz = xyz
+    if idx is None:
+        idx, _ = knnquery(nsample, xyz, new_xyz, offset, new_offset)
+
+    grouped_xyz = grouping(xyz, idx) - new_xyz.unsqueeze(1)
+    grouped_feat = grouping(feat, idx)
+    if use_xyz:
+        return torch.cat((grouped_xyz, grouped_feat), -1)
+    return grouped_feat
+
+
+# Même interpolation (clamp des indices, accumulation en place) que le patch CUDA
+interpolation = make_interpolation(knnquery)
+
+
+CPU_OPS = {
+    'knnquery': knnquery,
+    'furthestsampling': furthestsampling,
+    'grouping': grouping,
+    'queryandgroup': queryandgroup,
+    'interpolation': interpolation,
+}
+
+
+def install_cpu_pointops():
+    """
+    Remplace les opérateurs de modules.pointops par les versions PyTorch.
+    À appeler avant la première passe avant (svgnet appelle pointops.<op>).
+    Si l'extension CUDA n'est pas compilée (machine sans GPU), un module
+    pointops_cuda vide est enregistré pour que l'import de pointops réussisse:
+    aucun de ses noyaux n'est appelé ensuite.
+    """
+    global _installed
+    if _installed:
+        return
+    try:
+        import pointops_cuda  # noqa: F401
+    except ImportError:
+        sys.modules['pointops_cuda'] = types.ModuleType('pointops_cuda')
+
+    import modules.pointops.functions.pointops as pointops_module
+    for name, op in CPU_OPS.items():
+        setattr(pointops_module, name, op)
+    _installed = True
+    print("✅ pointops CPU (PyTorch) installé")
@@ -0,0 +1,107 @@
+#!/usr/bin/env python
+"""
+pointops_patch.py - Patch pointops partagé par run_inference.py et run_inference_v2.py
+
+PATCH CRITIQUE - knnquery (CUDA) peut renvoyer des indices hors bornes:
+l'interpolation les borne (clamp) avant le gather.
+
+L'interpolation (appelée à chaque étage du décodeur SVGNet) borne les indices
+une seule fois, puis accumule les k voisins en place dans la sortie
+(index_select + addcmul_), sans tenseur remis à zéro: k+1 noyaux au lieu de
+~4k+1. Pas de buffer intermédiaire (M, k, C): un gather (M, k, C) suivi d'une
+somme était plus lent que l'ancienne boucle au dernier étage (131k points)
+sur CPU. Un buffer de sortie préalloué peut être passé (out=).
+
+Précision mixte (--precision fp16/bf16): les noyaux pointops attendent du
+float32; guard_pointops_precision() les enveloppe pour caster leurs entrées
+flottantes en float32 et désactiver autocast pendant l'appel.
+"""
+
+import functools
+
+import torch
+
+# Opérateurs de modules.pointops appelés par SVGNet
+POINTOPS_OPS = ('knnquery', 'furthestsampling', 'grouping', 'queryandgroup', 'interpolation')
+
+
+def weighted_gather(feat, idx, weight, out=None):
+    """
+    new_feat[m] = sum_i weight[m, i] * feat[clamp(idx[m, i])]
+
+    Args:
+        feat: (N, C) features sources
+        idx: (M, k) indices des voisins (bornés à [0, N-1])
+        weight: (M, k) poids
+        out: buffer (M, C) optionnel, réutilisé d'un appel à l'autre
+    """
+    valid_idx = torch.clamp(idx.long(), 0, feat.shape[0] - 1)  # un seul clamp pour les k voisins
+    weight = weight.to(feat.dtype)
+    new_feat = torch.index_select(feat, 0, valid_idx[:, 0], out=out).mul_(weight[:, :1])
+    for i in range(1, idx.shape[1]):
+        new_feat.addcmul_(feat.index_select(0, valid_idx[:, i]), weight[:, i:i + 1])
+    return new_feat
+
+
+def make_interpolation(knnquery):
+    """Interpolation inverse-distance (k voisins) construite sur une fonction knnquery."""
+
+    def interpolation(xyz, new_xyz, feat, offset, new_offset, k=3, out=None):
+        idx, dist = knnquery(k, xyz, new_xyz, offset, new_offset)
+        dist_recip = 1.0 / (dist + 1e-8)
+        norm = torch.sum(dist_recip, dim=1, keepdim=True)
+        weight = dist_recip / norm
+        return weighted_gather(feat, idx, weight, out)
+
+    return interpolation
+
+
+def _cuda_knnquery(*args):
+    from modules.pointops.functions import pointops
+    return pointops.knnquery(*args)
+
+
+def apply_pointops_patch(device='cuda'):
+    """
+    Installe l'interpolation corrigée dans modules.pointops.
+    device='cpu': tous les opérateurs pointops en PyTorch pur (pointops_cpu.py).
+    """
+    if device == 'cpu':
+        from pointops_cpu import install_cpu_pointops
+        install_cpu_pointops()
+        return
+
+    import modules.pointops.functions.pointops as pointops_module
+    pointops_module.interpolation = make_interpolation(_cuda_knnquery)
+    print("✅ Patch pointops appliqué")
+
+
+def fp32_op(op):
+    """op avec entrées flottantes en float32, hors autocast (sorties float32)."""
+    if getattr(op, '_fp32_guard', False):
+        return op
+
+    def cast(value):
+        return value.float() if torch.is_tensor(value) and value.is_floating_point() else value
+
+    @functools.wraps(op)
+    def wrapper(*args, **kwargs):
+        tensors = [a for a in args if torch.is_tensor(a)]
+        device_type = tensors[0].device.type if tensors else 'cpu'
+        with torch.autocast(device_type=device_type, enabled=False):
+            return op(*[cast(a) for a in args], **{k: cast(v) for k, v in kwargs.items()})
+
+    wrapper._fp32_guard = True
+    return wrapper
+
+
+def guard_pointops_precision():
+    """
+    Enveloppe les opérateurs de modules.pointops (CUDA, patchés ou CPU) avec fp32_op.
+    À appeler après apply_pointops_patch / install_cpu_pointops.
+    """
+    import modules.pointops.functions.pointops as pointops_module
+    for name in POINTOPS_OPS:
+        op = getattr(pointops_module, name, None)
+        if op is not None:
+            setattr(pointops_module, name, fp32_op(op))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python
+"""
+predictions.py - Post-traitement des prédictions SymPointV2 (_pred.json)
+
+Partie sans torch de run_inference_v2.py: classes, remapping des murs et
+construction du _pred.json. Utilisé par run_inference_v2.py et par le
+serveur d'inférence (inference_server.py).
+
+Les prédictions restent des tableaux NumPy dans le dict de sortie;
+save_prediction_output les écrit sans tolist (fast_json.py).
+"""
+
+import os
+import numpy as np
+
+from fast_json import write_json
+
+CLASSES = {
+    0: "Single Door", 1: "Double Door", 2: "Sliding Door",
+    3: "Folding Door", 4: "Revolving Door", 5: "Rolling Door",
+    6: "Window", 7: "Bay Window", 8: "Blind Window", 9: "Opening Symbol",
+    10: "Sofa", 11: "Bed", 12: "Chair", 13: "Table", 14: "TV Cabinet",
+    15: "Gas Stove", 16: "Sink", 17: "Refrigerator", 18: "AirCon",
+    19: "Bath", 20: "Bathtub", 21: "Washing Machine", 22: "Squat Toilet",
+    23: "Urinal", 24: "Toilet", 25: "Stairs", 26: "Elevator",
+    27: "Escalator", 28: "Row Chairs", 29: "Parking Spot",
+    30: "Wall", 31: "Curtain Wall", 32: "Railing", 33: "Fence", 34: "Background"
+}
+
+
+def remap_walls(predictions, layerIds, num_preds):
+    """
+    Post-traitement: Remappe Railing/Fence → Wall pour layer 0 (murs épais).
+
+    Args:
+        predictions: array de prédictions (N,)
+        layerIds: array de layer IDs du fichier source
+        num_preds: nombre de prédictions
+
+    Returns:
+        predictions corrigées
+    """
+    # Pad layerIds si nécessaire
+    if len(layerIds) < num_preds:
+        padded = np.full(num_preds, layerIds[-1] if len(layerIds) > 0 else 0)
+        padded[:len(layerIds)] = layerIds
+        layerIds = padded
+    else:
+        layerIds = layerIds[:num_preds]
+
+    # Layer 0 = murs (traits épais dans parser v5)
+    wall_layer = (layerIds == 0)
+    # Classes 32=Railing, 33=Fence → 30=Wall
+    railing_or_fence = np.isin(predictions, [32, 33])
+    to_remap = wall_layer & railing_or_fence
+
+    predictions_fixed = predictions.copy()
+    predictions_fixed[to_remap] = 30  # Wall
+
+    return predictions_fixed, to_remap.sum()
+
+
+def prediction_output_path(sample_path: str) -> str:
+    """plan_s2.json / plan_s2.npz -> plan_pred.json, autre nom (plan.json) -> plan_pred.json"""
+    for suffix in ('_s2.json', '_s2.npz'):
+        if sample_path.endswith(suffix):
+            return sample_path[:-len(suffix)] + '_pred.json'
+    return os.path.splitext(sample_path)[0] + '_pred.json'
+
+
+def build_prediction_output(sample_path: str, sem_preds, sem_preds_raw, n_remapped: int,
+                            num_instances: int) -> dict:
+    """Contenu du _pred.json (format de run_inference_v2, prédictions en tableaux int64)."""
+    sem_preds = np.asarray(sem_preds, dtype=np.int64)
+    unique, counts = np.unique(sem_preds, return_counts=True)
+    return {
+        'source_file': os.path.basename(sample_path),
+        'num_primitives': len(sem_preds),
+        'predictions': sem_preds,
+        'predictions_raw': np.asarray(sem_preds_raw, dtype=np.int64),
+        'class_distribution': {
+            CLASSES.get(int(c), f"Class {c}"): int(cnt)
+            for c, cnt in zip(unique, counts)
+        },
+        'num_instances': num_instances,
+        'wall_remapping': {
+            'enabled': True,
+            'remapped_count': int(n_remapped)
+        }
+    }
+
+
+def save_prediction_output(output: dict, output_path: str) -> str:
+    """Écrit un _pred.json (JSON compact, tableaux écrits directement)."""
+    return write_json(output, output_path)
+
+
+def postprocess(sample_path: str, sem_preds_raw, layerIds, num_instances: int) -> dict:
+    """Remapping des murs + _pred.json en un appel."""
+    sem_preds, n_remapped = remap_walls(sem_preds_raw, layerIds, len(sem_preds_raw))
+    return build_prediction_output(sample_path, sem_preds, sem_preds_raw, n_remapped, num_instances)
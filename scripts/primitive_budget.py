@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+"""
+primitive_budget.py - Budget de primitives (--max-primitives)
+
+Le temps et la mémoire d'inférence suivent le nombre de primitives (800 à
+60k selon les plans). Plutôt que de couper les derniers paths tracés
+(max_primitives de smart_pdf_parser_v2.py), on garde les N primitives les
+plus importantes:
+
+1. priorité de layer: murs (0), puis moyens (1), puis détails (2); un layer
+   n'est entamé que si les précédents tiennent entièrement dans le budget
+2. dans le layer qui déborde, échantillonnage stratifié sur une grille:
+   chaque cellule donne sa plus longue primitive avant qu'une cellule en
+   donne une deuxième (couverture de tout le plan), à rang égal les plus
+   longues d'abord
+
+Le classement ne dépend que de la géométrie (égalités départagées par les
+points de contrôle en orientation canonique: un segment tracé dans un sens
+ou dans l'autre a la même clé), jamais de l'ordre de tracé. Les primitives gardées restent
+dans leur ordre d'origine.
+"""
+
+import numpy as np
+
+# Primitives visées par cellule de la grille de stratification
+PRIMITIVES_PER_CELL = 8
+MAX_GRID_SIZE = 256
+
+
+def _canonical_geometry(controls: np.ndarray) -> np.ndarray:
+    """Points de contrôle (N, 8) indépendants du sens de parcours (plus petit des deux sens)."""
+    fwd = controls.reshape(-1, 8)
+    rev = controls[:, ::-1].reshape(-1, 8)
+    diff = fwd - rev
+    first = np.argmax(diff != 0, axis=1)
+    swap = diff[np.arange(len(diff)), first] > 0
+    return np.where(swap[:, None], rev, fwd)
+
+
+def _stratified_order(controls: np.ndarray, lengths: np.ndarray, budget: int) -> np.ndarray:
+    """Indices classés par (rang dans la cellule, longueur décroissante, position, géométrie)."""
+    geometry = tuple(_canonical_geometry(controls).T[::-1])  # Dernières clés de lexsort = prioritaires
+    mid = (controls[:, 0] + controls[:, 3]) / 2
+    grid = int(np.clip(np.ceil(np.sqrt(budget / PRIMITIVES_PER_CELL)), 1, MAX_GRID_SIZE))
+    lo, hi = mid.min(axis=0), mid.max(axis=0)
+    cell_xy = np.minimum(((mid - lo) / np.maximum(hi - lo, 1e-9) * grid).astype(np.int64), grid - 1)
+    cell = cell_xy[:, 1] * grid + cell_xy[:, 0]
+
+    # Rang de chaque primitive dans sa cellule (la plus longue = 0)
+    by_cell = np.lexsort(geometry + (mid[:, 1], mid[:, 0], -lengths, cell))
+    sorted_cell = cell[by_cell]
+    starts = np.flatnonzero(np.r_[True, sorted_cell[1:] != sorted_cell[:-1]])
+    counts = np.diff(np.r_[starts, len(by_cell)])
+    rank = np.empty(len(cell), dtype=np.int64)
+    rank[by_cell] = np.arange(len(by_cell)) - np.repeat(starts, counts)
+
+    return np.lexsort(geometry + (mid[:, 1], mid[:, 0], -lengths, rank))
+
+
+def select_by_budget(controls: np.ndarray, lengths: np.ndarray, layer_ids: np.ndarray,
+                     max_primitives: int) -> np.ndarray:
+    """
+    Masque (N,) des primitives gardées pour tenir dans max_primitives.
+
+    Args:
+        controls: points de contrôle (N, 4, 2)
+        lengths: longueurs (N,)
+        layer_ids: layers (N,) 0 = murs, 1 = moyens, 2 = détails
+        max_primitives: budget
+    """
+    n = len(lengths)
+    keep = np.zeros(n, dtype=bool)
+    if n <= max_primitives:
+        keep[:] = True
+        return keep
+
+    remaining = max_primitives
+    for layer in np.unique(layer_ids):
+        members = np.flatnonzero(layer_ids == layer)
+        if len(members) <= remaining:
+            keep[members] = True
+            remaining -= len(members)
+            continue
+        if remaining > 0:
+            order = _stratified_order(controls[members], lengths[members], remaining)
+            keep[members[order[:remaining]]] = True
+        break
+    return keep
@@ -0,0 +1,274 @@
+#!/usr/bin/env python
+"""
+primitives.py - Construction vectorisée des primitives SymPointV2
+
+Module partagé par les parsers (universal_pdf_parser, smart_pdf_parser_v3/v4/v5).
+
+Deux représentations:
+- Primitives BRUTES: (kinds, coords) lus en un seul passage sur get_drawings()
+    kinds  (N,)   RAW_LINE / RAW_CURVE / RAW_RECT
+    coords (N, 8) ligne: x1,y1,x2,y2,0,0,0,0 | courbe: 4 points | rect: x0,y0,x1,y1,0,0,0,0
+- Primitives SYMPOINTV2: commands (M,) + controls (M, 4, 2) points de contrôle
+    (un rectangle brut donne 4 lignes)
+
+Interpolation des lignes, rescaling, longueurs et filtrage par longueur sont
+des opérations sur tableaux. La sortie reste identique octet par octet à
+l'ancienne boucle Python (mêmes opérations flottantes, même ordre).
+
+Mémoire bornée (plans A1 de 300k+ segments): les drawings sont consommés
+path par path et les primitives versées par blocs (STREAM_CHUNK_SIZE) dans
+des tableaux typés extensibles (GrowableArray), sans liste Python de la
+taille du plan. Les parsers convertissent ensuite par blocs (iter_chunks).
+"""
+
+import numpy as np
+from typing import Iterator, List, Optional, Tuple, Union
+
+from zone_index import ZoneIndex
+
+# Types de primitives brutes (avant conversion au format SymPointV2)
+RAW_LINE = 0
+RAW_CURVE = 1
+RAW_RECT = 2
+
+# Commandes SymPointV2
+CMD_LINE = 0
+CMD_CURVE = 1
+
+# Épaisseur uniforme écrite dans widths (parser universel, défaut des champs absents)
+UNIFORM_WIDTH = 0.1
+
+# Coins d'un rectangle (x0,y0,x1,y1) dans l'ordre de parcours des 4 côtés
+_RECT_CORNERS_X = np.array([0, 2, 2, 0])
+_RECT_CORNERS_Y = np.array([1, 1, 3, 3])
+
+# Taille des blocs de primitives (collecte et conversion)
+STREAM_CHUNK_SIZE = 65536
+
+
+class GrowableArray:
+    """Tableau typé à capacité doublée: ajout par blocs sans liste Python intermédiaire."""
+
+    def __init__(self, dtype, row_shape: Tuple[int, ...] = (), capacity: int = 1024):
+        self._data = np.empty((capacity,) + tuple(row_shape), dtype=dtype)
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def extend(self, rows):
+        rows = np.asarray(rows, dtype=self._data.dtype).reshape((-1,) + self._data.shape[1:])
+        end = self._size + len(rows)
+        if end > len(self._data):
+            grown = np.empty((max(end, 2 * len(self._data)),) + self._data.shape[1:], dtype=self._data.dtype)
+            grown[:self._size] = self._data[:self._size]
+            self._data = grown
+        self._data[self._size:end] = rows
+        self._size = end
+
+    def array(self) -> np.ndarray:
+        """Éléments ajoutés (copie compacte si plus d'1/8 de la capacité est inutilisé)."""
+        view = self._data[:self._size]
+        return view.copy() if 8 * (len(self._data) - self._size) > len(self._data) else view
+
+
+def iter_chunks(n: int, chunk_size: Optional[int] = None) -> Iterator[slice]:
+    """Tranches [i, i + chunk_size) couvrant range(n) (défaut: STREAM_CHUNK_SIZE)."""
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    for start in range(0, n, chunk_size):
+        yield slice(start, min(start + chunk_size, n))
+
+
+def collect_raw_primitives(drawings, chunk_size: Optional[int] = None,
+                           release: bool = False) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, list]:
+    """
+    Parcourt les drawings une seule fois et collecte épaisseurs, OCG et primitives.
+
+    Les primitives sont versées dans des tableaux typés tous les chunk_size
+    éléments. Avec release=True, chaque path est libéré de la liste drawings
+    dès qu'il est lu (l'appelant cède la liste): la mémoire des dicts PyMuPDF
+    décroît pendant que les tableaux compacts grossissent.
+
+    Returns:
+        path_widths (P,), kinds (N,), coords (N, 8), path_index (N,), path_ocs (P,)
+    """
+    chunk_size = chunk_size or STREAM_CHUNK_SIZE
+    path_widths = np.zeros(len(drawings))
+    path_ocs = []
+    # Capacité initiale = nombre d'items (borne haute): pas de réallocation
+    capacity = max(1, sum(len(p.get('items', [])) for p in drawings))
+    kinds_buf = GrowableArray(np.int8, capacity=capacity)
+    coords_buf = GrowableArray(np.float64, (8,), capacity=capacity)
+    index_buf = GrowableArray(np.int64, capacity=capacity)
+    kinds, coords, path_index = [], [], []
+
+    def flush():
+        kinds_buf.extend(kinds)
+        coords_buf.extend(coords)
+        index_buf.extend(path_index)
+        kinds.clear()
+        coords.clear()
+        path_index.clear()
+
+    for path_idx in range(len(drawings)):
+        path = drawings[path_idx]
+        if release:
+            drawings[path_idx] = None
+        path_widths[path_idx] = path.get('width', 0) or 0
+        path_ocs.append(path.get('oc'))
+
+        for item in path['items']:
+            cmd_type = item[0]
+
+            if cmd_type == 'l':
+                p1, p2 = item[1], item[2]
+                kinds.append(RAW_LINE)
+                coords.append((p1.x, p1.y, p2.x, p2.y, 0.0, 0.0, 0.0, 0.0))
+                path_index.append(path_idx)
+
+            elif cmd_type == 'c':
+                if len(item) >= 5:
+                    p0, p1, p2, p3 = item[1:5]
+                    kinds.append(RAW_CURVE)
+                    coords.append((p0.x, p0.y, p1.x, p1.y, p2.x, p2.y, p3.x, p3.y))
+                    path_index.append(path_idx)
+
+            elif cmd_type == 're':
+                rect = item[1]
+                kinds.append(RAW_RECT)
+                coords.append((rect.x0, rect.y0, rect.x1, rect.y1, 0.0, 0.0, 0.0, 0.0))
+                path_index.append(path_idx)
+
+        if len(kinds) >= chunk_size:
+            flush()
+
+    flush()
+    return path_widths, kinds_buf.array(), coords_buf.array(), index_buf.array(), path_ocs
+
+
+def raw_anchor_points(kinds: np.ndarray, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Points testés contre les zones d'exclusion (une primitive est exclue si
+    ses DEUX ancres sont dans une zone).
+
+    - ligne:     extrémités p1 et p2
+    - courbe:    point de départ (deux fois)
+    - rectangle: centre (deux fois)
+    """
+    first = coords[:, 0:2].copy()
+    second = coords[:, 2:4].copy()
+
+    curve = kinds == RAW_CURVE
+    second[curve] = first[curve]
+
+    rect = kinds == RAW_RECT
+    center = np.stack([(coords[rect, 0] + coords[rect, 2]) / 2,
+                       (coords[rect, 1] + coords[rect, 3]) / 2], axis=1)
+    first[rect] = center
+    second[rect] = center
+
+    return first, second
+
+
+def zone_exclusion_mask(kinds: np.ndarray, coords: np.ndarray,
+                        zones: Union[List, ZoneIndex]) -> np.ndarray:
+    """
+    Masque (N,) des primitives brutes dont les ancres sont dans les zones.
+
+    Les deux ancres sont testées en une seule requête sur un ZoneIndex
+    (passer un ZoneIndex déjà construit pour le réutiliser entre blocs).
+    """
+    index = zones if isinstance(zones, ZoneIndex) else ZoneIndex(zones)
+    if len(kinds) == 0 or not len(index):
+        return np.zeros(len(kinds), dtype=bool)
+    first, second = raw_anchor_points(kinds, coords)
+    inside = index.contains(np.concatenate([first, second]))
+    return inside[:len(kinds)] & inside[len(kinds):]
+
+
+def interpolate_lines(p1: np.ndarray, p2: np.ndarray) -> np.ndarray:
+    """Lignes (N, 2) -> (N, 4, 2) avec points intermédiaires à 1/3 et 2/3."""
+    delta = p2 - p1
+    return np.stack([p1, p1 + delta * 0.33, p1 + delta * 0.66, p2], axis=1)
+
+
+def build_controls(kinds: np.ndarray, coords: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Convertit des primitives brutes en primitives SymPointV2.
+
+    Returns:
+        commands (M,), controls (M, 4, 2), source (M,) index de la primitive brute
+    """
+    counts = np.where(kinds == RAW_RECT, 4, 1)
+    source = np.repeat(np.arange(len(kinds)), counts)
+    side = np.arange(len(source)) - np.repeat(np.cumsum(counts) - counts, counts)
+
+    k = kinds[source]
+    c = coords[source]
+    curve = k == RAW_CURVE
+
+    # Segments: lignes telles quelles, côtés des rectangles
+    p1 = c[:, 0:2].copy()
+    p2 = c[:, 2:4].copy()
+    rect = k == RAW_RECT
+    if rect.any():
+        rc, rs = c[rect], side[rect]
+        nxt = (rs + 1) % 4
+        rows = np.arange(len(rc))
+        p1[rect] = np.stack([rc[rows, _RECT_CORNERS_X[rs]], rc[rows, _RECT_CORNERS_Y[rs]]], axis=1)
+        p2[rect] = np.stack([rc[rows, _RECT_CORNERS_X[nxt]], rc[rows, _RECT_CORNERS_Y[nxt]]], axis=1)
+
+    controls = np.empty((len(source), 4, 2))
+    controls[curve] = c[curve].reshape(-1, 4, 2)
+    controls[~curve] = interpolate_lines(p1[~curve], p2[~curve])
+
+    commands = np.where(curve, CMD_CURVE, CMD_LINE)
+    return commands, controls, source
+
+
+def primitive_lengths(controls: np.ndarray) -> np.ndarray:
+    """
+    Longueur de chaque primitive (somme des 3 segments entre points de contrôle).
+
+    Le carré de la norme passe par matmul (même noyau dot que np.linalg.norm
+    sur un vecteur) pour rester identique à l'ancien calculate_length.
+    """
+    d = np.diff(controls, axis=1)
+    seg = np.sqrt((d[..., None, :] @ d[..., :, None])[..., 0, 0])
+    return seg[:, 0] + seg[:, 1] + seg[:, 2]
+
+
+def build_sample(width: int, height: int, commands: np.ndarray, controls: np.ndarray,
+                 lengths: np.ndarray, layer_ids: np.ndarray, uniform_width: float,
+                 arrays: bool = False) -> dict:
+    """
+    Construit le dictionnaire _s2.json (format SymPointV2).
+
+    arrays=True garde des tableaux NumPy (écrits sans tolist par fast_json / sample_io).
+    """
+    n = len(commands)
+    if arrays:
+        return {
+            "width": width,
+            "height": height,
+            "commands": np.asarray(commands, dtype=np.int8),
+            "args": np.asarray(controls, dtype=np.float64).reshape(n, 8),
+            "lengths": np.asarray(lengths, dtype=np.float64),
+            "layerIds": np.asarray(layer_ids, dtype=np.int32),
+            "widths": np.full(n, uniform_width),
+            "semanticIds": np.full(n, 35, dtype=np.int32),
+            "instanceIds": np.full(n, -1, dtype=np.int32),
+            "rgb": np.zeros((n, 3), dtype=np.uint8)
+        }
+    return {
+        "width": width,
+        "height": height,
+        "commands": commands.tolist(),
+        "args": controls.reshape(n, 8).tolist(),  # Liste plate [x1,y1,...,x4,y4]
+        "lengths": lengths.tolist(),
+        "layerIds": layer_ids.tolist(),
+        "widths": [uniform_width] * n,
+        "semanticIds": [35] * n,  # 35 = Background
+        "instanceIds": [-1] * n,  # -1 = pas d'instance
+        "rgb": [[0, 0, 0]] * n
+    }
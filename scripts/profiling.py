@@ -0,0 +1,166 @@
+#!/usr/bin/env python
+"""
+profiling.py - Mesures par phase du parser (temps, hausse du RSS max, primitives)
+
+Les phases du parser sont entourées de profiling.phase('nom'): sans profileur
+actif (cas par défaut) c'est un contexte vide, sans coût mesurable. Avec
+start_profiling(), chaque phase note:
+
+- seconds: temps écoulé (perf_counter)
+- rss_growth_mb: hausse du RSS max du processus pendant la phase (getrusage);
+  ru_maxrss ne redescend jamais, donc une phase qui reste sous le pic d'une
+  phase précédente note 0
+- items_in / items_out: primitives en entrée / sortie de la phase
+
+Les phases imbriquées sont nommées 'parent/enfant' (extraction/get_drawings).
+Le résumé note aussi peak_rss_mb, le RSS max du processus courant depuis son
+démarrage. Les workers d'un pool (--batch, --workers) ne sont pas comptés:
+chaque worker a son propre RSS.
+Le résumé est ajouté à _metadata['profile'] et/ou écrit en JSON lines
+(une ligne par document, pour suivre les régressions sur un corpus).
+
+profile_call() exécute une fonction sous cProfile (.prof, lisible par
+pstats / snakeviz) ou pyinstrument (.html, si installé).
+"""
+
+import os
+import sys
+import json
+import time
+import contextlib
+from dataclasses import dataclass, asdict, field
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+_active = None
+
+
+def peak_rss_mb() -> Optional[float]:
+    """RSS max du processus courant depuis son démarrage, en Mo (workers exclus, None si indisponible)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss: Ko sous Linux, octets sous macOS
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+@dataclass
+class PhaseRecord:
+    """Mesures d'une phase."""
+    name: str
+    seconds: float = 0.0
+    rss_growth_mb: Optional[float] = None
+    items_in: Optional[int] = None
+    items_out: Optional[int] = None
+
+
+@dataclass
+class Profiler:
+    """Collecte les PhaseRecord d'un document."""
+    label: str = ''
+    records: List[PhaseRecord] = field(default_factory=list)
+    _stack: List[str] = field(default_factory=list)
+    _start: float = field(default_factory=time.perf_counter)
+
+    @contextlib.contextmanager
+    def phase(self, name: str, items_in: Optional[int] = None):
+        record = PhaseRecord('/'.join(self._stack + [name]), items_in=items_in)
+        self.records.append(record)  # Ordre d'entrée (parent avant enfants)
+        self._stack.append(name)
+        start, start_peak = time.perf_counter(), peak_rss_mb()
+        try:
+            yield record
+        finally:
+            record.seconds = round(time.perf_counter() - start, 6)
+            end_peak = peak_rss_mb()
+            if end_peak is not None:
+                record.rss_growth_mb = round(end_peak - start_peak, 1)
+            self._stack.pop()
+
+    def summary(self) -> dict:
+        return {
+            'label': self.label,
+            'total_seconds': round(time.perf_counter() - self._start, 6),
+            'peak_rss_mb': peak_rss_mb(),
+            'phases': [asdict(r) for r in self.records],
+        }
+
+    def write_jsonl(self, path: str, **extra):
+        """Ajoute une ligne JSON (résumé + champs extra) au fichier path."""
+        append_jsonl(path, dict(extra, **self.summary()))
+
+    def print_report(self):
+        print(f"\n⏱️ Profil ({self.label}, RSS max du processus: {peak_rss_mb() or 0:.1f} Mo):")
+        for r in self.records:
+            depth = r.name.count('/')
+            counts = ''
+            if r.items_in is not None or r.items_out is not None:
+                counts = f"  {r.items_in if r.items_in is not None else '-'} -> " \
+                         f"{r.items_out if r.items_out is not None else '-'}"
+            print(f"   {'  ' * depth}{r.name.split('/')[-1]:<{24 - 2 * depth}} "
+                  f"{r.seconds * 1000:9.1f} ms  +{r.rss_growth_mb or 0:6.1f} Mo{counts}")
+
+
+def append_jsonl(path: str, record: dict):
+    """Ajoute record en une ligne JSON à la fin de path."""
+    with open(path, 'a') as f:
+        f.write(json.dumps(record) + '\n')
+
+
+def phase(name: str, items_in: Optional[int] = None):
+    """Contexte de mesure d'une phase (vide si aucun profileur actif)."""
+    if _active is None:
+        return contextlib.nullcontext(PhaseRecord(name))
+    return _active.phase(name, items_in)
+
+
+def start_profiling(label: str = '') -> Profiler:
+    """Active un profileur pour les phases suivantes (remplace le précédent)."""
+    global _active
+    _active = Profiler(label)
+    return _active
+
+
+def stop_profiling() -> Optional[Profiler]:
+    """Désactive et retourne le profileur courant."""
+    global _active
+    profiler, _active = _active, None
+    return profiler
+
+
+def active_profiler() -> Optional[Profiler]:
+    return _active
+
+
+def profile_call(output_path: str, func, *args, **kwargs):
+    """
+    Exécute func sous cProfile (output .prof) ou pyinstrument (output .html).
+    Retourne le résultat de func.
+    """
+    if output_path.endswith('.html'):
+        try:
+            from pyinstrument import Profiler as Instrument
+        except ImportError:
+            raise RuntimeError("pyinstrument non installé (pip install pyinstrument) - "
+                               "utiliser une sortie .prof pour cProfile")
+        instrument = Instrument()
+        instrument.start()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            instrument.stop()
+            with open(output_path, 'w') as f:
+                f.write(instrument.output_html())
+            print(f"📈 Profil pyinstrument: {output_path}")
+
+    import cProfile
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(func, *args, **kwargs)
+    finally:
+        profile.dump_stats(output_path)
+        print(f"📈 Profil cProfile: {output_path} (python -m pstats {os.path.basename(output_path)})")
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+"""
+revision_diff.py - Re-parse incrémental des révisions d'un plan (indices B, C, D...)
+
+Entre deux indices d'une même planche, seules quelques zones changent.
+Plutôt que de ré-inférer tout le plan:
+
+1. le nouveau PDF est parsé (universal_pdf_parser.py, mêmes options)
+2. les primitives sont appariées à celles du _s2.json précédent par hachage
+   de la géométrie quantifiée (canonical_keys de dedup.py + layer): les
+   non appariées sont ajoutées (nouveau) ou supprimées (ancien)
+3. les cellules de la grille spatiale (CELL_SIZE) touchées par un ajout ou
+   une suppression, dilatées de 'radius' cellules, forment la zone modifiée
+4. seules les primitives de la zone modifiée (+ une couronne de contexte)
+   repassent dans le modèle; ailleurs les prédictions du _pred.json
+   précédent sont reprises
+
+Le nombre d'instances est mis à jour par différence: la même zone de
+l'ancienne révision passe dans le modèle avec la nouvelle (une seule passe
+avant), et les instances situées dans la zone modifiée sont retirées /
+ajoutées au total du _pred.json précédent.
+
+Si trop de primitives changent (échelle de page différente, plan refait),
+tout le plan est ré-inféré.
+
+Usage:
+    python revision_diff.py plan_B.pdf --previous plan_A_s2.json
+    python revision_diff.py plan_B.pdf --previous plan_A_s2.json -o revisions/plan_B_s2.json
+    python revision_diff.py plan_B.pdf --previous plan_A_s2.json --diff-only
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from dataclasses import dataclass
+
+from dedup import DEDUP_TOLERANCE, canonical_keys
+from sample_io import load_sample
+from predictions import prediction_output_path, postprocess, save_prediction_output
+from fast_json import load_json
+from tiling import subsample
+
+CELL_SIZE = 10.0            # Côté des cellules du hachage spatial (unités du plan)
+DEFAULT_RADIUS = 1          # Dilatation de la zone modifiée (cellules)
+CONTEXT_RADIUS = 1          # Couronne de contexte donnée au modèle autour de la zone
+MAX_CHANGED_RATIO = 0.5     # Au-delà: ré-inférence complète
+
+_CELL_OFFSET = 1 << 20
+
+
+@dataclass
+class RevisionDiff:
+    """Appariement ancien/nouveau échantillon."""
+    new_to_old: np.ndarray      # (N_new,) indice dans l'ancien échantillon, -1 si ajoutée
+    removed: np.ndarray         # Indices (anciens) des primitives supprimées
+    affected: np.ndarray        # (N_new,) True si dans la zone modifiée
+    context: np.ndarray         # (N_new,) True si dans la zone modifiée ou sa couronne
+
+    @property
+    def added(self) -> np.ndarray:
+        return np.flatnonzero(self.new_to_old < 0)
+
+    def summary(self) -> dict:
+        return {
+            'added': int(len(self.added)),
+            'removed': int(len(self.removed)),
+            'affected': int(self.affected.sum()),
+            'reused': int((~self.affected).sum()),
+        }
+
+
+def geometry_keys(sample: dict, tol: float = DEDUP_TOLERANCE) -> np.ndarray:
+    """Clé entière par primitive: layer + commande + géométrie quantifiée (sens ignoré)."""
+    commands = np.asarray(sample['commands'], dtype=np.int64)
+    controls = np.asarray(sample['args'], dtype=np.float64).reshape(-1, 4, 2)
+    layers = np.asarray(sample.get('layerIds', np.zeros(len(commands))), dtype=np.int64)
+    return np.concatenate([layers[:, None], canonical_keys(commands, controls, tol, 0.0)], axis=1)
+
+
+def match_primitives(old_keys: np.ndarray, new_keys: np.ndarray) -> np.ndarray:
+    """
+    Appariement multi-ensemble: la k-ième occurrence d'une clé dans le nouvel
+    échantillon va à la k-ième occurrence de la même clé dans l'ancien.
+
+    Returns:
+        (N_new,) indice ancien apparié, -1 sinon
+    """
+    n_old, n_new = len(old_keys), len(new_keys)
+    if not n_old or not n_new:
+        return np.full(n_new, -1, dtype=np.int64)
+    _, group = np.unique(np.concatenate([old_keys, new_keys]), axis=0, return_inverse=True)
+    group = group.reshape(-1)
+    side = np.r_[np.zeros(n_old, dtype=np.int64), np.ones(n_new, dtype=np.int64)]
+
+    # Rang d'occurrence dans (clé, côté), dans l'ordre des indices
+    order = np.lexsort((np.arange(len(group)), side, group))
+    run_start = np.r_[True, (group[order][1:] != group[order][:-1]) | (side[order][1:] != side[order][:-1])]
+    starts = np.flatnonzero(run_start)
+    rank = np.empty(len(group), dtype=np.int64)
+    rank[order] = np.arange(len(group)) - np.repeat(starts, np.diff(np.r_[starts, len(group)]))
+
+    code = group * (rank.max() + 1) + rank
+    old_code, new_code = code[:n_old], code[n_old:]
+    by_code = np.argsort(old_code)
+    pos = np.clip(np.searchsorted(old_code[by_code], new_code), 0, n_old - 1)
+    found = old_code[by_code][pos] == new_code
+    return np.where(found, by_code[pos], -1)
+
+
+def _cells(points: np.ndarray, cell_size: float) -> np.ndarray:
+    cells = np.floor(points / cell_size).astype(np.int64) + _CELL_OFFSET
+    return cells[:, 0] * (2 * _CELL_OFFSET) + cells[:, 1]
+
+
+def _dilate(codes: np.ndarray, radius: int) -> np.ndarray:
+    shifts = [dx * (2 * _CELL_OFFSET) + dy
+              for dx in range(-radius, radius + 1) for dy in range(-radius, radius + 1)]
+    return np.unique((np.unique(codes)[:, None] + np.array(shifts)[None, :]).reshape(-1))
+
+
+def _midpoints(sample: dict) -> np.ndarray:
+    args = np.asarray(sample['args'], dtype=np.float64).reshape(-1, 8)
+    return (args[:, 0:2] + args[:, 6:8]) / 2
+
+
+def diff_samples(old: dict, new: dict, tol: float = DEDUP_TOLERANCE,
+                 cell_size: float = CELL_SIZE, radius: int = DEFAULT_RADIUS) -> RevisionDiff:
+    """Primitives ajoutées/supprimées et zone à ré-inférer du nouvel échantillon."""
+    new_to_old = match_primitives(geometry_keys(old, tol), geometry_keys(new, tol))
+    matched_old = np.zeros(len(old['commands']), dtype=bool)
+    matched_old[new_to_old[new_to_old >= 0]] = True
+    removed = np.flatnonzero(~matched_old)
+
+    old_cells, new_cells = _cells(_midpoints(old), cell_size), _cells(_midpoints(new), cell_size)
+    changed = np.concatenate([new_cells[new_to_old < 0], old_cells[removed]])
+    if not len(changed):
+        none = np.zeros(len(new_cells), dtype=bool)
+        return RevisionDiff(new_to_old, removed, none, none.copy())
+
+    affected = np.isin(new_cells, _dilate(changed, radius))
+    context = np.isin(new_cells, _dilate(changed, radius + CONTEXT_RADIUS))
+    return RevisionDiff(new_to_old, removed, affected | (new_to_old < 0), context | (new_to_old < 0))
+
+
+def merge_predictions(diff: RevisionDiff, old_preds_raw: np.ndarray,
+                      rerun_indices: np.ndarray, rerun_preds: np.ndarray) -> np.ndarray:
+    """Prédictions brutes (N_new,): anciennes hors zone modifiée, ré-inférées dedans."""
+    merged = np.zeros(len(diff.new_to_old), dtype=np.int64)
+    reused = ~diff.affected
+    merged[reused] = old_preds_raw[diff.new_to_old[reused]]
+    rerun = np.zeros(len(merged), dtype=np.int64)
+    rerun[rerun_indices] = rerun_preds[:len(rerun_indices)]
+    merged[diff.affected] = rerun[diff.affected]
+    return merged
+
+
+def count_instances_in(instances, inside: np.ndarray) -> int:
+    """Instances dont la majorité du masque tombe dans inside (masque sur les primitives passées)."""
+    count = 0
+    for inst in instances:
+        masks = inst['masks']
+        masks = masks.cpu().numpy() if hasattr(masks, 'cpu') else np.asarray(masks)
+        masks = masks.astype(bool)
+        if masks.any() and 2 * np.count_nonzero(masks & inside) > np.count_nonzero(masks):
+            count += 1
+    return count
+
+
+# ============================================================================
+# PIPELINE
+# ============================================================================
+
+def reparse_revision(pdf_path: str, previous_path: str, output_path: str = None,
+                     config_path: str = None, checkpoint_path: str = None, device: str = None,
+                     options=None, diff_only: bool = False, radius: int = DEFAULT_RADIUS,
+                     max_changed_ratio: float = MAX_CHANGED_RATIO) -> dict:
+    """
+    Parse la nouvelle révision et ré-infère seulement la zone modifiée.
+
+    Returns:
+        Rapport {'sample', 'prediction', 'diff', 'mode'}
+    """
+    from universal_pdf_parser import parse_pdf
+
+    print(f"\n{'='*60}")
+    print(f"RE-PARSE INCRÉMENTAL: {os.path.basename(pdf_path)}")
+    print(f"Révision précédente: {previous_path}")
+    print(f"{'='*60}")
+
+    new_path = parse_pdf(pdf_path, output_path, options=options)
+    if new_path is None:
+        raise ValueError(f"{pdf_path}: aucune primitive extraite")
+
+    old, new = load_sample(previous_path), load_sample(new_path)
+    diff = diff_samples(old, new, radius=radius)
+    summary = diff.summary()
+    print(f"\n🔍 Différences: +{summary['added']} / -{summary['removed']} primitives, "
+          f"{summary['affected']} à ré-inférer, {summary['reused']} reprises")
+
+    report = {'sample': new_path, 'prediction': None, 'diff': summary, 'mode': 'diff'}
+    if diff_only:
+        return report
+
+    previous_pred = prediction_output_path(previous_path)
+    changed_ratio = summary['affected'] / max(len(diff.new_to_old), 1)
+    full = changed_ratio > max_changed_ratio or not os.path.exists(previous_pred)
+    if not os.path.exists(previous_pred):
+        print(f"⚠️ {previous_pred} introuvable: ré-inférence complète")
+    elif full:
+        print(f"⚠️ {100 * changed_ratio:.0f}% du plan modifié: ré-inférence complète")
+
+    import run_inference_v2 as inference
+    # SymPointV2Model installe les opérateurs pointops CPU avec --device cpu
+    model = inference.SymPointV2Model(config_path, checkpoint_path, device).model
+
+    if full:
+        report['mode'] = 'full'
+        report['prediction'] = prediction_output_path(new_path)
+        inference.run_inference(new_path, config_path, checkpoint_path, model=model)
+        return report
+
+    old_pred = load_json(previous_pred)
+    old_preds_raw = np.asarray(old_pred['predictions_raw'], dtype=np.int64)
+
+    rerun_indices = np.flatnonzero(diff.context)
+    rerun_preds, num_instances = np.zeros(0, dtype=np.int64), old_pred.get('num_instances', 0)
+    if len(rerun_indices):
+        # Même zone dans l'ancienne révision (primitives appariées + supprimées), pour le delta d'instances
+        old_affected = np.zeros(len(old['commands']), dtype=bool)
+        old_affected[diff.new_to_old[diff.affected & (diff.new_to_old >= 0)]] = True
+        old_affected[diff.removed] = True
+        old_context = old_affected.copy()
+        old_context[diff.new_to_old[diff.context & (diff.new_to_old >= 0)]] = True
+        old_indices = np.flatnonzero(old_context)
+
+        loaded = [inference.load_svg_sample(new_path, subsample(new, rerun_indices))]
+        if len(old_indices):
+            loaded.append(inference.load_svg_sample(previous_path, subsample(old, old_indices)))
+        results = inference.predict_loaded(model, loaded)
+        rerun_preds, new_instances = results[0]
+        num_instances += count_instances_in(new_instances, diff.affected[rerun_indices])
+        if len(old_indices):
+            num_instances -= count_instances_in(results[1][1], old_affected[old_indices])
+        num_instances = max(0, num_instances)
+    merged = merge_predictions(diff, old_preds_raw, rerun_indices, rerun_preds)
+
+    layerIds = np.asarray(new.get('layerIds', []))
+    output = postprocess(new_path, merged, layerIds, num_instances)
+    output['incremental'] = dict(summary, previous=os.path.basename(previous_path),
+                                 context=int(len(rerun_indices)))
+    report['prediction'] = save_prediction_output(output, prediction_output_path(new_path))
+    print(f"\n💾 Prédictions: {report['prediction']} "
+          f"({len(rerun_indices)} primitives ré-inférées sur {len(merged)})")
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Re-parse incrémental d\'une révision de plan')
+    parser.add_argument('pdf', help='PDF de la nouvelle révision')
+    parser.add_argument('--previous', required=True, help='_s2.json / _s2.npz de la révision précédente '
+                                                          '(son _pred.json est réutilisé)')
+    parser.add_argument('-o', '--output', help='_s2.json de sortie (défaut: à côté du PDF)')
+    parser.add_argument('--diff-only', action='store_true', help='Parser et comparer, sans inférence')
+    parser.add_argument('--radius', type=int, default=DEFAULT_RADIUS,
+                        help=f'Dilatation de la zone modifiée en cellules de {CELL_SIZE} (défaut: {DEFAULT_RADIUS})')
+    parser.add_argument('--max-changed-ratio', type=float, default=MAX_CHANGED_RATIO,
+                        help='Part du plan modifiée au-delà de laquelle tout est ré-inféré')
+    parser.add_argument('--ocg-layers', action='store_true', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--dedup', action='store_true', help='Comme universal_pdf_parser.py')
+    parser.add_argument('--config', default='/workspace/SymPointV2/checkpoints/sympointv2/svg_pointT.yaml')
+    parser.add_argument('--checkpoint', default='/workspace/SymPointV2/checkpoints/sympointv2/best.pth')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=None)
+
+    args = parser.parse_args()
+    for path in (args.pdf, args.previous):
+        if not os.path.exists(path):
+            print(f"❌ Fichier non trouvé: {path}")
+            sys.exit(1)
+
+    from universal_pdf_parser import ParseOptions
+    options = ParseOptions(ocg_layers=args.ocg_layers, dedup=args.dedup)
+    report = reparse_revision(args.pdf, args.previous, args.output, args.config, args.checkpoint,
+                              args.device, options, args.diff_only, args.radius, args.max_changed_ratio)
+    print(json.dumps(report['diff']))
+
+
+if __name__ == '__main__':
+    main()
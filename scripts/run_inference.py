@@ -16,24 +16,8 @@ from munch import Munch
 
 sys.path.insert(0, '/workspace/SymPointV2')
 
-# PATCH CRITIQUE - Corriger le bug pointops knnquery
-def apply_pointops_patch():
-    import modules.pointops.functions.pointops as pointops_module
-    
-    def _patched_interpolation(xyz, new_xyz, feat, offset, new_offset, k=3):
-        from modules.pointops.functions import pointops
-        idx, dist = pointops.knnquery(k, xyz, new_xyz, offset, new_offset)
-        dist_recip = 1.0 / (dist + 1e-8)
-        norm = torch.sum(dist_recip, dim=1, keepdim=True)
-        weight = dist_recip / norm
-        new_feat = torch.cuda.FloatTensor(new_xyz.shape[0], feat.shape[1]).zero_()
-        for i in range(k):
-            valid_idx = torch.clamp(idx[:, i].long(), 0, feat.shape[0] - 1)
-            new_feat += feat[valid_idx, :] * weight[:, i].unsqueeze(-1)
-        return new_feat
-    
-    pointops_module.interpolation = _patched_interpolation
-    print("✅ Patch pointops appliqué")
+# PATCH CRITIQUE - Corriger le bug pointops knnquery (voir pointops_patch.py)
+from pointops_patch import apply_pointops_patch
 
 apply_pointops_patch()
 
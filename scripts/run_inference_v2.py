@@ -4,11 +4,20 @@ run_inference_v2.py - Inférence SymPointV2 avec post-traitement pour murs
 
 Amélioration: Remappe Railing/Fence → Wall pour le layer 0 (traits épais)
 Nécessite un fichier JSON généré par smart_pdf_parser_v5.py
+(ou un _s2.npz, voir sample_io.py)
+
+Options de vitesse: --precision fp16|bf16 (autocast, opérateurs pointops
+gardés en float32), --compile (blocs torch.nn scriptés, cache à côté du
+checkpoint, voir jit_cache.py). --precision-report compare latence, mémoire
+et prédictions avec fp32 sur un échantillon de référence.
 """
 
 import os
 import sys
+import glob
 import json
+import time
+import contextlib
 import numpy as np
 import torch
 import yaml
@@ -16,121 +25,298 @@ from munch import Munch
 
 sys.path.insert(0, '/workspace/SymPointV2')
 
-def apply_pointops_patch():
-    import modules.pointops.functions.pointops as pointops_module
-    
-    def _patched_interpolation(xyz, new_xyz, feat, offset, new_offset, k=3):
-        from modules.pointops.functions import pointops
-        idx, dist = pointops.knnquery(k, xyz, new_xyz, offset, new_offset)
-        dist_recip = 1.0 / (dist + 1e-8)
-        norm = torch.sum(dist_recip, dim=1, keepdim=True)
-        weight = dist_recip / norm
-        new_feat = torch.cuda.FloatTensor(new_xyz.shape[0], feat.shape[1]).zero_()
-        for i in range(k):
-            valid_idx = torch.clamp(idx[:, i].long(), 0, feat.shape[0] - 1)
-            new_feat += feat[valid_idx, :] * weight[:, i].unsqueeze(-1)
-        return new_feat
-    
-    pointops_module.interpolation = _patched_interpolation
-    print("✅ Patch pointops appliqué")
+from sample_io import is_npz_sample, load_sample, sample_to_lists
+from corpus import CorpusShard, is_shard
+from pointops_cpu import install_cpu_pointops
+from pointops_patch import apply_pointops_patch, guard_pointops_precision
+from jit_cache import compile_stable_modules
+from model_state import load_model_state
+from predictions import (CLASSES, remap_walls, build_prediction_output, prediction_output_path, postprocess,
+                         save_prediction_output)
+from tiling import DEFAULT_TILE_OVERLAP, plan_tiles, tile_sample, TileStitcher
+
+# Budget de primitives par passe avant en mode batch (plusieurs plans concaténés)
+DEFAULT_BATCH_PRIMITIVES = 16384
+
+# Précision de la passe avant (autocast), None = float32
+PRECISIONS = {'fp32': None, 'fp16': torch.float16, 'bf16': torch.bfloat16}
+
+
+def default_device():
+    return 'cuda' if torch.cuda.is_available() else 'cpu'
+
 
-apply_pointops_patch()
+apply_pointops_patch(default_device())
 
 from svgnet.model.svgnet import SVGNet as svgnet
 from svgnet.data.svg3 import SVGDataset
 
-CLASSES = {
-    0: "Single Door", 1: "Double Door", 2: "Sliding Door",
-    3: "Folding Door", 4: "Revolving Door", 5: "Rolling Door",
-    6: "Window", 7: "Bay Window", 8: "Blind Window", 9: "Opening Symbol",
-    10: "Sofa", 11: "Bed", 12: "Chair", 13: "Table", 14: "TV Cabinet",
-    15: "Gas Stove", 16: "Sink", 17: "Refrigerator", 18: "AirCon",
-    19: "Bath", 20: "Bathtub", 21: "Washing Machine", 22: "Squat Toilet",
-    23: "Urinal", 24: "Toilet", 25: "Stairs", 26: "Elevator",
-    27: "Escalator", 28: "Row Chairs", 29: "Parking Spot",
-    30: "Wall", 31: "Curtain Wall", 32: "Railing", 33: "Fence", 34: "Background"
-}
+
+class _SampleJsonShim:
+    """Remplace le module json de svg3 le temps d'un load: json.load renvoie l'échantillon déjà chargé."""
+
+    def __init__(self, sample):
+        self._sample = sample
+
+    def load(self, f, *args, **kwargs):
+        return self._sample
+
+    def __getattr__(self, name):
+        return getattr(json, name)
+
+
+def load_svg_sample(path, sample=None):
+    """
+    SVGDataset.load sur un _s2.json ou un _s2.npz (sans fichier JSON intermédiaire).
+    sample: échantillon déjà en mémoire (listes) à charger à la place du fichier (tuiles).
+    """
+    if sample is None and not is_npz_sample(path):
+        return SVGDataset.load(path, idx=0)
+
+    import svgnet.data.svg3 as svg3_module
+    original_json = svg3_module.json
+    svg3_module.json = _SampleJsonShim(sample if sample is not None else load_sample(path, as_lists=True))
+    try:
+        return SVGDataset.load(path, idx=0)
+    finally:
+        svg3_module.json = original_json
+
+
+def build_model(config_path, device='cuda'):
+    """SVGNet sans poids, construit depuis le config YAML."""
+    cfg = Munch.fromDict(yaml.safe_load(open(config_path)))
+    return svgnet(cfg.model).to(device)
 
 
-def remap_walls(predictions, layerIds, num_preds):
+def load_model(config_path, checkpoint_path, device='cuda', precision='fp32', compile_modules=False,
+               state_cache=True):
     """
-    Post-traitement: Remappe Railing/Fence → Wall pour layer 0 (murs épais).
+    Construit SVGNet et charge le checkpoint (une fois par processus).
     
     Args:
-        predictions: array de prédictions (N,)
-        layerIds: array de layer IDs du fichier source
-        num_preds: nombre de prédictions
+        precision: 'fp32', 'fp16' ou 'bf16' (autocast dans predict_loaded, noté sur le modèle)
+        compile_modules: blocs torch.nn scriptés, relus du cache <checkpoint>.jit si présents
+        state_cache: poids relus en mmap depuis l'état préparé <checkpoint>.state (model_state.py)
+    """
+    model = build_model(config_path, device)
+    load_model_state(model, checkpoint_path, config_path, use_cache=state_cache)
+    model.eval()
+    
+    if precision != 'fp32':
+        guard_pointops_precision()
+    if compile_modules:
+        stats = compile_stable_modules(model, checkpoint_path, config_path, device)
+        print(f"⚙️ TorchScript: {stats['compiled']} blocs compilés, {stats['cached']} relus du cache, "
+              f"{stats['failed']} restés eager ({stats['dir']})")
+    model.precision = precision
+    return model
+
+
+def autocast_context(device, precision):
+    """torch.autocast pour fp16 / bf16, contexte vide en fp32."""
+    dtype = PRECISIONS[precision]
+    if dtype is None:
+        return contextlib.nullcontext()
+    return torch.autocast(device_type=device.type, dtype=dtype)
+
+
+def _split_instances(instances, bounds):
+    """
+    Répartit les instances d'une passe multi-plans: chaque instance va au plan
+    qui contient la majorité de son masque (masque recoupé sur ce plan).
+    """
+    per_plan = [[] for _ in range(len(bounds) - 1)]
+    if len(per_plan) == 1:
+        per_plan[0] = list(instances)
+        return per_plan
+    
+    for inst in instances:
+        masks = inst['masks']
+        masks = masks.cpu().numpy() if hasattr(masks, 'cpu') else np.asarray(masks)
+        plan = int(np.argmax(np.add.reduceat(masks.astype(np.int64), bounds[:-1])))
+        per_plan[plan].append(dict(inst, masks=masks[bounds[plan]:bounds[plan + 1]]))
+    return per_plan
+
+
+def _to_device(array, dtype, device, pin_memory=False):
+    """Tableau NumPy -> tenseur sur device (via mémoire épinglée si pin_memory, copie asynchrone)."""
+    tensor = torch.from_numpy(np.ascontiguousarray(array, dtype=dtype))
+    if pin_memory and device.type == 'cuda':
+        return tensor.pin_memory().to(device, non_blocking=True)
+    return tensor.to(device)
+
+
+def predict_loaded(model, loaded, return_scores=False, pin_memory=False):
+    """
+    Une passe avant sur plusieurs échantillons chargés (sorties de load_svg_sample).
+    
+    Les nuages de points sont concaténés; offset contient la fin cumulée de
+    chaque plan (convention pointops), chaque plan est centré séparément.
+    pin_memory: transferts hôte -> GPU depuis la mémoire épinglée (pipeline.py).
     
     Returns:
-        predictions corrigées
+        Liste (prédictions brutes (N_i,), instances) par plan, ou
+        (probabilités (N_i, C), instances) avec return_scores
     """
-    # Pad layerIds si nécessaire
-    if len(layerIds) < num_preds:
-        padded = np.full(num_preds, layerIds[-1] if len(layerIds) > 0 else 0)
-        padded[:len(layerIds)] = layerIds
-        layerIds = padded
+    coords = [c - np.mean(c, axis=0) for c, _, _, _, _ in loaded]
+    sizes = [len(c) for c in coords]
+    bounds = np.concatenate([[0], np.cumsum(sizes)])
+    
+    device = next(model.parameters()).device
+    batch = (
+        _to_device(np.concatenate(coords), np.float32, device, pin_memory),
+        _to_device(np.concatenate([s[1] for s in loaded]), np.float32, device, pin_memory),
+        _to_device(np.concatenate([s[2] for s in loaded]), np.int64, device, pin_memory),
+        _to_device(bounds[1:], np.int32, device, pin_memory),
+        _to_device(np.concatenate([s[3] for s in loaded]), np.float32, device, pin_memory),
+        _to_device(np.concatenate([s[4] for s in loaded]), np.int64, device, pin_memory)
+    )
+    
+    with torch.inference_mode(), autocast_context(device, getattr(model, 'precision', 'fp32')):
+        result = model(batch, return_loss=False)
+    
+    sem_scores = result['semantic_scores']
+    if return_scores:
+        per_primitive = torch.softmax(sem_scores.float(), dim=1).cpu().numpy()
     else:
-        layerIds = layerIds[:num_preds]
+        per_primitive = torch.argmax(sem_scores, dim=1).cpu().numpy()
+    instances = _split_instances(result['instances'], bounds)
+    return [(per_primitive[bounds[i]:bounds[i + 1]], instances[i]) for i in range(len(sizes))]
+
+
+def predict_sample(model, json_path):
+    """
+    Passe avant sur un échantillon _s2.json / _s2.npz.
+    
+    Returns:
+        (prédictions brutes (N,), instances)
+    """
+    return predict_loaded(model, [load_svg_sample(json_path)])[0]
+
+
+def load_source(source):
+    """
+    Source = chemin _s2.json / _s2.npz, ou (chemin du _s2 virtuel, shard, i)
+    pour un plan de corpus (find_samples).
+    
+    Returns:
+        (chemin, échantillon du corpus ou None, fichier ouvert par SVGDataset.load)
+    """
+    if isinstance(source, tuple):
+        path, shard, i = source
+        return path, shard[i], shard.index_path
+    return source, None, source
+
+
+def iter_sample_batches(sample_paths, max_primitives=DEFAULT_BATCH_PRIMITIVES):
+    """
+    Charge les échantillons dans l'ordre et les groupe tant que le total de
+    primitives reste sous le budget (un plan plus grand que le budget passe seul).
+    Les plans de corpus (vues memmap) sont chargés sans lecture de fichier.
+    
+    Yields:
+        Liste de (chemin, échantillon chargé, layerIds du corpus ou None)
+    """
+    group, total = [], 0
+    for source in sample_paths:
+        path, sample, load_path = load_source(source)
+        loaded = load_svg_sample(load_path, sample_to_lists(sample) if sample is not None else None)
+        layer_ids = np.asarray(sample.get('layerIds', [])) if sample is not None else None
+        n = len(loaded[0])
+        if group and total + n > max_primitives:
+            yield group
+            group, total = [], 0
+        group.append((path, loaded, layer_ids))
+        total += n
+    if group:
+        yield group
+
+
+def predict_tiled(model, sample_path, tile_size, overlap=DEFAULT_TILE_OVERLAP,
+                  max_primitives=DEFAULT_BATCH_PRIMITIVES):
+    """
+    Inférence par tuiles recouvrantes (tiling.py): les tuiles sont groupées
+    par passe avant sous le budget max_primitives (mémoire bornée par la
+    taille des tuiles, pas du plan), les scores recousus par primitive.
     
-    # Layer 0 = murs (traits épais dans parser v5)
-    wall_layer = (layerIds == 0)
-    # Classes 32=Railing, 33=Fence → 30=Wall
-    railing_or_fence = np.isin(predictions, [32, 33])
-    to_remap = wall_layer & railing_or_fence
+    Returns:
+        (prédictions brutes (N,), nombre d'instances (somme des tuiles), nombre de tuiles)
+    """
+    sample = load_sample(sample_path)
+    tiles = plan_tiles(sample, tile_size, overlap)
+    stitcher = TileStitcher(len(sample['commands']))
     
-    predictions_fixed = predictions.copy()
-    predictions_fixed[to_remap] = 30  # Wall
+    group, total = [], 0
+    for i, tile in enumerate(tiles):
+        group.append(tile)
+        total += len(tile.indices)
+        last = i == len(tiles) - 1
+        if not last and total + len(tiles[i + 1].indices) <= max_primitives:
+            continue
+        loaded = [load_svg_sample(sample_path, tile_sample(sample, t)) for t in group]
+        for t, (scores, instances) in zip(group, predict_loaded(model, loaded, return_scores=True)):
+            stitcher.add(t, scores[:len(t.indices)], len(instances))
+        group, total = [], 0
     
-    return predictions_fixed, to_remap.sum()
+    return stitcher.predictions(), stitcher.num_instances, len(tiles)
 
 
-def run_inference(json_path, config_path, checkpoint_path):
+class SymPointV2Model:
+    """Modèle résident pour inference_server.py (même interface que StubModel)."""
+    
+    name = 'sympointv2'
+    
+    def __init__(self, config_path, checkpoint_path, device=None, precision='fp32', compile_modules=False):
+        device = device or default_device()
+        if device == 'cpu':
+            install_cpu_pointops()
+        self.model = load_model(config_path, checkpoint_path, device, precision, compile_modules)
+    
+    def predict(self, sample_path):
+        sem_preds_raw, instances = predict_sample(self.model, sample_path)
+        return sem_preds_raw, len(instances)
+    
+    def predict_batch(self, sample_paths):
+        return self.predict_prepared([self.prepare(p) for p in sample_paths])
+    
+    @staticmethod
+    def prepare(sample_path):
+        """Partie CPU (workers de pipeline.py): SVGDataset.load, tableaux NumPy."""
+        return load_svg_sample(sample_path)
+    
+    def predict_prepared(self, prepared):
+        results = predict_loaded(self.model, prepared, pin_memory=True)
+        return [(preds, len(instances)) for preds, instances in results]
+
+
+def run_inference(json_path, config_path, checkpoint_path, model=None, device='cuda',
+                  tile_size=None, tile_overlap=DEFAULT_TILE_OVERLAP,
+                  max_primitives=DEFAULT_BATCH_PRIMITIVES):
     print(f"\n{'='*60}")
     print(f"INFÉRENCE SYMPOINTV2 v2 (avec remapping murs)")
     print(f"{'='*60}")
     print(f"Fichier: {json_path}")
     
     # Charger le fichier source pour layerIds
-    with open(json_path) as f:
-        source_data = json.load(f)
-    layerIds = np.array(source_data.get('layerIds', []))
-    
-    cfg = Munch.fromDict(yaml.safe_load(open(config_path)))
+    source_data = load_sample(json_path)
+    layerIds = np.asarray(source_data.get('layerIds', []))
     
-    print("\n📦 Construction du modèle...")
-    model = svgnet(cfg.model).cuda()
-    state = torch.load(checkpoint_path, map_location='cpu')
-    model.load_state_dict({k: v for k, v in state['net'].items() 
-                          if k in model.state_dict()}, strict=False)
-    model.eval()
-    print("✅ Modèle prêt")
-    
-    print("\n📄 Chargement des données...")
-    coords, feats, labels, lengths, layerIds_loaded = SVGDataset.load(json_path, idx=0)
-    print(f"   Primitives: {len(coords)} (padded à 2048)")
-    
-    coords = coords - np.mean(coords, axis=0)
-    
-    offset = torch.IntTensor([coords.shape[0]])
-    batch = (
-        torch.FloatTensor(coords).cuda(),
-        torch.FloatTensor(feats).cuda(),
-        torch.LongTensor(labels).cuda(),
-        offset.cuda(),
-        torch.FloatTensor(lengths).cuda(),
-        torch.LongTensor(layerIds_loaded).cuda()
-    )
+    if model is None:
+        print("\n📦 Construction du modèle...")
+        model = load_model(config_path, checkpoint_path, device)
+        print(f"✅ Modèle prêt ({device})")
     
     print("\n🔮 Inférence en cours...")
-    with torch.no_grad():
-        result = model(batch, return_loss=False)
+    if tile_size:
+        sem_preds_raw, num_instances, num_tiles = predict_tiled(model, json_path, tile_size, tile_overlap,
+                                                                max_primitives)
+        print(f"   Tuiles: {num_tiles} (côté {tile_size}, recouvrement {tile_overlap})")
+    else:
+        sem_preds_raw, instances = predict_sample(model, json_path)
+        num_instances = len(instances)
+    print(f"   Primitives: {len(sem_preds_raw)} (padded à 2048)")
     print("✅ Inférence terminée")
     
-    # Prédictions brutes
-    sem_scores = result['semantic_scores']
-    sem_preds_raw = torch.argmax(sem_scores, dim=1).cpu().numpy()
-    instances = result['instances']
-    
     # Post-traitement: remapper les murs
     print("\n🔧 Post-traitement (remapping murs)...")
     sem_preds, n_remapped = remap_walls(sem_preds_raw, layerIds, len(sem_preds_raw))
@@ -146,47 +332,211 @@ def run_inference(json_path, config_path, checkpoint_path):
         cls_name = CLASSES.get(cls_id, f"Class {cls_id}")
         print(f"   {cls_name:20s}: {cnt:5d} ({100*cnt/len(sem_preds):5.1f}%)")
     
-    print(f"\n🎯 Instances détectées: {len(instances)}")
+    print(f"\n🎯 Instances détectées: {num_instances}")
     
     # Sauvegarder
-    output_path = json_path.replace('_s2.json', '_pred.json')
-    output = {
-        'source_file': os.path.basename(json_path),
-        'num_primitives': len(sem_preds),
-        'predictions': sem_preds.tolist(),
-        'predictions_raw': sem_preds_raw.tolist(),
-        'class_distribution': {
-            CLASSES.get(int(c), f"Class {c}"): int(cnt) 
-            for c, cnt in zip(unique, counts)
-        },
-        'num_instances': len(instances),
-        'wall_remapping': {
-            'enabled': True,
-            'remapped_count': int(n_remapped)
-        }
-    }
-    
-    with open(output_path, 'w') as f:
-        json.dump(output, f, indent=2)
+    output_path = prediction_output_path(json_path)
+    output = build_prediction_output(json_path, sem_preds, sem_preds_raw, n_remapped, num_instances)
+    save_prediction_output(output, output_path)
     print(f"\n💾 Résultats sauvegardés: {output_path}")
     
     return output
 
 
+def run_batch_inference(sample_paths, config_path, checkpoint_path,
+                        max_primitives=DEFAULT_BATCH_PRIMITIVES, model=None, device='cuda'):
+    """
+    Inférence sur plusieurs plans: une passe avant par groupe de plans
+    (budget max_primitives), résultats redécoupés par plan puis remapping des murs.
+    
+    Returns:
+        Liste des _pred.json (dans l'ordre de sample_paths)
+    """
+    print(f"\n{'='*60}")
+    print(f"INFÉRENCE SYMPOINTV2 v2 - BATCH ({len(sample_paths)} plans, "
+          f"{max_primitives} primitives/passe)")
+    print(f"{'='*60}")
+    
+    if model is None:
+        print("\n📦 Construction du modèle...")
+        model = load_model(config_path, checkpoint_path, device)
+        print(f"✅ Modèle prêt ({device})")
+    
+    outputs = []
+    for group in iter_sample_batches(sample_paths, max_primitives):
+        results = predict_loaded(model, [loaded for _, loaded, _ in group])
+        print(f"\n🔮 Passe avant: {len(group)} plans, "
+              f"{sum(len(preds) for preds, _ in results)} primitives")
+        
+        for (path, _, layerIds), (sem_preds_raw, instances) in zip(group, results):
+            if layerIds is None:
+                layerIds = np.asarray(load_sample(path).get('layerIds', []))
+            output = postprocess(path, sem_preds_raw, layerIds, len(instances))
+            output_path = save_prediction_output(output, prediction_output_path(path))
+            print(f"   ✅ {os.path.basename(path)}: {output['num_primitives']} primitives, "
+                  f"{output['wall_remapping']['remapped_count']} remappées -> {output_path}")
+            outputs.append(output)
+    
+    return outputs
+
+
+def _measure_inference(model, loaded, repeat):
+    """Latences (médiane, min), pic mémoire CUDA et sorties de predict_loaded sur loaded."""
+    device = next(model.parameters()).device
+    cuda = device.type == 'cuda'
+    predict_loaded(model, loaded)  # Échauffement (allocations, profilage TorchScript)
+    if cuda:
+        torch.cuda.synchronize()
+        torch.cuda.reset_peak_memory_stats(device)
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        results = predict_loaded(model, loaded)
+        if cuda:
+            torch.cuda.synchronize()
+        times.append(time.perf_counter() - start)
+    preds, instances = results[0]
+    return {
+        'seconds_median': round(float(np.median(times)), 6),
+        'seconds_min': round(min(times), 6),
+        'peak_memory_mb': round(torch.cuda.max_memory_allocated(device) / 2**20, 1) if cuda else None,
+        'num_instances': len(instances),
+    }, np.asarray(preds)
+
+
+def precision_report(sample_path, config_path, checkpoint_path, device, precision='fp16',
+                     compile_modules=False, repeat=5):
+    """
+    Compare fp32 eager (référence) et precision / compile_modules sur un
+    échantillon: latence, pic mémoire (CUDA seulement) et accord des prédictions.
+    """
+    loaded = [load_svg_sample(sample_path)]
+    runs = {}
+    for label, prec, compiled in (('fp32', 'fp32', False), ('variant', precision, compile_modules)):
+        model = load_model(config_path, checkpoint_path, device, prec, compiled)
+        runs[label] = _measure_inference(model, loaded, repeat)
+        del model
+        if device == 'cuda':
+            torch.cuda.empty_cache()
+    
+    (base, base_preds), (variant, variant_preds) = runs['fp32'], runs['variant']
+    changed = base_preds != variant_preds
+    changed_classes = np.unique(base_preds[changed], return_counts=True)
+    report = {
+        'sample': os.path.basename(sample_path),
+        'device': device,
+        'repeat': repeat,
+        'num_primitives': len(base_preds),
+        'baseline': dict(base, precision='fp32', compiled=False),
+        'variant': dict(variant, precision=precision, compiled=compile_modules),
+        'speedup': round(base['seconds_median'] / max(variant['seconds_median'], 1e-9), 3),
+        'agreement': round(float(1 - changed.mean()) if len(changed) else 1.0, 6),
+        'changed_by_class': {CLASSES.get(int(c), f"Class {c}"): int(n) for c, n in zip(*changed_classes)},
+    }
+    if base['peak_memory_mb'] and variant['peak_memory_mb']:
+        report['memory_ratio'] = round(variant['peak_memory_mb'] / base['peak_memory_mb'], 3)
+    return report
+
+
+def find_samples(inputs):
+    """
+    Fichiers, dossiers (-> *_s2.json / *_s2.npz) et corpus (corpus.py) en liste
+    de sources. Plan de corpus: (chemin virtuel à côté du shard, shard, i), pour
+    que son _pred.json soit écrit à côté du shard.
+    """
+    samples = []
+    for path in inputs:
+        if is_shard(path):
+            shard = CorpusShard(path)
+            out_dir = os.path.dirname(os.path.abspath(path))
+            samples.extend((os.path.join(out_dir, name), shard, i) for i, name in enumerate(shard.names))
+        elif os.path.isdir(path):
+            samples.extend(sorted(glob.glob(os.path.join(path, '*_s2.json')) +
+                                  glob.glob(os.path.join(path, '*_s2.npz'))))
+        else:
+            samples.append(path)
+    return samples
+
+
 def main():
     import argparse
     parser = argparse.ArgumentParser(description='SymPointV2 Inference v2')
-    parser.add_argument('json_file', help='Fichier JSON _s2.json (généré par parser v5)')
+    parser.add_argument('json_file', nargs='+',
+                        help='Fichier(s) _s2.json / _s2.npz (générés par parser v5) ou dossier')
     parser.add_argument('--config', default='/workspace/SymPointV2/checkpoints/sympointv2/svg_pointT.yaml')
     parser.add_argument('--checkpoint', default='/workspace/SymPointV2/checkpoints/sympointv2/best.pth')
+    parser.add_argument('--batch-primitives', type=int, default=DEFAULT_BATCH_PRIMITIVES,
+                        help=f'Primitives max par passe avant en mode multi-plans '
+                             f'(défaut: {DEFAULT_BATCH_PRIMITIVES}, à ajuster à la mémoire GPU)')
+    parser.add_argument('--tile-size', type=float, default=None,
+                        help='Inférence par tuiles de ce côté (unités du plan, 140 = plan entier)')
+    parser.add_argument('--tile-overlap', type=float, default=DEFAULT_TILE_OVERLAP,
+                        help=f'Recouvrement des tuiles (défaut: {DEFAULT_TILE_OVERLAP})')
+    parser.add_argument('--device', choices=['cpu', 'cuda'], default=default_device(),
+                        help='cpu = opérateurs pointops en PyTorch pur (défaut: cuda si disponible)')
+    parser.add_argument('--precision', choices=list(PRECISIONS), default='fp32',
+                        help='Précision de la passe avant (autocast fp16 / bf16, défaut: fp32)')
+    parser.add_argument('--compile', action='store_true',
+                        help='Blocs torch.nn en TorchScript, cache à côté du checkpoint (jit_cache.py)')
+    parser.add_argument('--precision-report', metavar='JSON',
+                        help='Comparer --precision / --compile à fp32 sur le premier échantillon '
+                             '(latence, mémoire, accord) et écrire le rapport, sans _pred.json')
+    parser.add_argument('--report-repeat', type=int, default=5, help='Passes mesurées par le rapport')
+    parser.add_argument('--no-state-cache', action='store_true',
+                        help='Charger le checkpoint complet sans état préparé (model_state.py)')
     
     args = parser.parse_args()
     
-    if not os.path.exists(args.json_file):
-        print(f"❌ Fichier non trouvé: {args.json_file}")
+    samples = find_samples(args.json_file)
+    missing = [p for p in samples if isinstance(p, str) and not os.path.exists(p)]
+    if missing or not samples:
+        print(f"❌ Fichier non trouvé: {', '.join(missing) or ' '.join(args.json_file)}")
         sys.exit(1)
+    if args.tile_size and any(isinstance(p, tuple) for p in samples):
+        print("❌ --tile-size non supporté sur un corpus (inférence par fichier _s2)")
+        sys.exit(1)
+    
+    if args.device == 'cuda' and not torch.cuda.is_available():
+        print("❌ CUDA non disponible (utiliser --device cpu)")
+        sys.exit(1)
+    if args.device == 'cpu':
+        install_cpu_pointops()
+    
+    if args.precision_report:
+        if not isinstance(samples[0], str):
+            print("❌ --precision-report attend un fichier _s2.json / _s2.npz")
+            sys.exit(1)
+        report = precision_report(samples[0], args.config, args.checkpoint, args.device, args.precision,
+                                  args.compile, args.report_repeat)
+        with open(args.precision_report, 'w') as f:
+            json.dump(report, f, indent=2)
+        base, variant = report['baseline'], report['variant']
+        print(f"\n📊 {args.precision}{' + compile' if args.compile else ''} vs fp32 ({report['sample']}):")
+        print(f"   Latence: {base['seconds_median'] * 1000:.1f} -> {variant['seconds_median'] * 1000:.1f} ms "
+              f"(x{report['speedup']:.2f})")
+        if 'memory_ratio' in report:
+            print(f"   Mémoire: {base['peak_memory_mb']:.0f} -> {variant['peak_memory_mb']:.0f} Mo")
+        print(f"   Accord des prédictions: {100 * report['agreement']:.2f}%")
+        print(f"💾 Rapport: {args.precision_report}")
+        return
     
-    run_inference(args.json_file, args.config, args.checkpoint)
+    print("\n📦 Construction du modèle...")
+    model = load_model(args.config, args.checkpoint, args.device, args.precision, args.compile,
+                       state_cache=not args.no_state_cache)
+    print(f"✅ Modèle prêt ({args.device}, {args.precision})")
+    
+    if len(samples) == 1 and not os.path.isdir(args.json_file[0]):
+        run_inference(samples[0], args.config, args.checkpoint, model=model,
+                      tile_size=args.tile_size, tile_overlap=args.tile_overlap,
+                      max_primitives=args.batch_primitives)
+    elif args.tile_size:
+        # Tuiles: un plan à la fois (ses tuiles sont déjà groupées par passe avant)
+        for path in samples:
+            run_inference(path, args.config, args.checkpoint, model=model,
+                          tile_size=args.tile_size, tile_overlap=args.tile_overlap,
+                          max_primitives=args.batch_primitives)
+    else:
+        run_batch_inference(samples, args.config, args.checkpoint, args.batch_primitives, model=model)
 
 
 if __name__ == '__main__':
@@ -0,0 +1,192 @@
+#!/usr/bin/env python
+"""
+sample_io.py - Format binaire compact des échantillons SymPointV2 (_s2.npz)
+
+Les _s2.json répètent des champs constants par primitive (widths, semanticIds,
+instanceIds, rgb) et stockent args en listes imbriquées: fichiers de plusieurs
+Mo, lents à json.load. Le format _s2.npz (optionnel) contient:
+
+- commands (N,) int8, args (N, 8) float64, lengths (N,) float64, layerIds (N,) int32
+- widths / semanticIds / instanceIds / rgb: tableau si variable, sinon une
+  constante dans l'en-tête
+- __meta__: en-tête JSON (width, height, constantes, _metadata, ordre des clés)
+
+Conversion sans perte des valeurs dans les deux sens: json -> npz -> json
+redonne les mêmes valeurs après json.load. Le fichier n'est identique octet
+par octet que si le _s2.json d'origine a été écrit par fast_json.py avec le
+même moteur (orjson / stdlib); un fichier écrit par json.dump (séparateurs
+', ' et ': ') revient en JSON compact.
+
+Les _s2.json sont écrits par fast_json.py (tableaux sans tolist, orjson si
+installé, précision des floats réglable).
+
+Usage:
+    python sample_io.py plan_s2.json   # -> plan_s2.npz
+    python sample_io.py plan_s2.npz    # -> plan_s2.json
+"""
+
+import os
+import sys
+import json
+import argparse
+import numpy as np
+from typing import Optional
+
+from fast_json import write_json, load_json
+
+FORMAT_NAME = 's2npz'
+FORMAT_VERSION = 1
+
+_META_KEY = '__meta__'
+
+# Champs par primitive et leur type binaire
+ARRAY_FIELDS = {
+    'commands': np.int8,
+    'args': np.float64,
+    'lengths': np.float64,
+    'layerIds': np.int32,
+    'widths': np.float64,
+    'semanticIds': np.int32,
+    'instanceIds': np.int32,
+    'rgb': np.uint8,
+}
+
+# Champs souvent constants (stockés en en-tête quand c'est le cas)
+CONSTANT_FIELDS = ('widths', 'semanticIds', 'instanceIds', 'rgb')
+
+
+def is_npz_sample(path: str) -> bool:
+    return path.endswith('.npz')
+
+
+def save_sample_npz(sample: dict, path: str, compress: bool = False):
+    """Écrit un échantillon (dict au format _s2.json) en _s2.npz."""
+    n = len(sample['commands'])
+    arrays, constants, extra = {}, {}, {}
+
+    for key, value in sample.items():
+        if key not in ARRAY_FIELDS:
+            extra[key] = value
+            continue
+        arr = np.asarray(value, dtype=ARRAY_FIELDS[key])
+        if key == 'args':
+            arr = arr.reshape(n, 8)
+        if key in CONSTANT_FIELDS and n and (arr == arr[0]).all():
+            constants[key] = arr[0].tolist()
+        else:
+            arrays[key] = arr
+
+    meta = {
+        'format': FORMAT_NAME,
+        'version': FORMAT_VERSION,
+        'num_primitives': n,
+        'keys': list(sample.keys()),
+        'constants': constants,
+        'extra': extra
+    }
+    save = np.savez_compressed if compress else np.savez
+    with open(path, 'wb') as f:
+        save(f, **arrays, **{_META_KEY: np.array(json.dumps(meta))})
+
+
+def load_sample_npz(path: str) -> dict:
+    """
+    Charge un _s2.npz en dict de tableaux NumPy (constantes développées).
+
+    Les clés sont celles du _s2.json (width, height, commands, args (N, 8), ...).
+    """
+    with np.load(path, allow_pickle=False) as data:
+        meta = json.loads(str(data[_META_KEY]))
+        if meta.get('format') != FORMAT_NAME:
+            raise ValueError(f"{path}: format inconnu ({meta.get('format')})")
+        arrays = {name: data[name] for name in data.files if name != _META_KEY}
+
+    n = meta['num_primitives']
+    sample = {}
+    for key in meta['keys']:
+        if key in arrays:
+            sample[key] = arrays[key]
+        elif key in meta['constants']:
+            value = np.asarray(meta['constants'][key], dtype=ARRAY_FIELDS[key])
+            sample[key] = np.broadcast_to(value, (n,) + value.shape)
+        elif key in meta['extra']:
+            sample[key] = meta['extra'][key]
+        elif key in ARRAY_FIELDS:  # Champ vide (0 primitive)
+            sample[key] = np.zeros((0, 8) if key == 'args' else (0,), dtype=ARRAY_FIELDS[key])
+    return sample
+
+
+def sample_to_lists(sample: dict) -> dict:
+    """Dict de tableaux -> dict JSON-compatible (listes Python), même ordre de clés."""
+    return {key: value.tolist() if isinstance(value, np.ndarray) else value
+            for key, value in sample.items()}
+
+
+def load_sample(path: str, as_lists: bool = False) -> dict:
+    """
+    Charge un échantillon _s2.json ou _s2.npz.
+
+    Args:
+        as_lists: True = listes Python (comme json.load), False = tableaux pour le npz
+    """
+    if is_npz_sample(path):
+        sample = load_sample_npz(path)
+        return sample_to_lists(sample) if as_lists else sample
+    return load_json(path)
+
+
+def write_sample(sample: dict, output_path: str, fmt: str = 'json',
+                 precision: Optional[int] = None) -> list:
+    """
+    Écrit un échantillon en 'json', 'npz' ou 'both'.
+    output_path est le chemin .json; le .npz est écrit à côté.
+    precision: décimales des floats du .json (None = sans perte; le .npz reste en float64).
+    Retourne les chemins écrits.
+    """
+    written = []
+    if fmt in ('json', 'both'):
+        write_json(sample, output_path, precision)
+        written.append(output_path)
+    if fmt in ('npz', 'both'):
+        npz_path = os.path.splitext(output_path)[0] + '.npz'
+        save_sample_npz(sample, npz_path)
+        written.append(npz_path)
+    return written
+
+
+def json_to_npz(json_path: str, npz_path: Optional[str] = None, compress: bool = False) -> str:
+    """Convertit un _s2.json en _s2.npz."""
+    npz_path = npz_path or os.path.splitext(json_path)[0] + '.npz'
+    save_sample_npz(load_json(json_path), npz_path, compress)
+    return npz_path
+
+
+def npz_to_json(npz_path: str, json_path: Optional[str] = None) -> str:
+    """Convertit un _s2.npz en _s2.json."""
+    json_path = json_path or os.path.splitext(npz_path)[0] + '.json'
+    return write_json(load_sample(npz_path), json_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Conversion _s2.json <-> _s2.npz')
+    parser.add_argument('input', help='Fichier _s2.json ou _s2.npz')
+    parser.add_argument('output', nargs='?', help='Fichier de sortie (optionnel)')
+    parser.add_argument('--compress', action='store_true', help='npz compressé (plus petit, plus lent)')
+
+    args = parser.parse_args()
+
+    if not os.path.exists(args.input):
+        print(f"❌ Fichier non trouvé: {args.input}")
+        sys.exit(1)
+
+    if is_npz_sample(args.input):
+        output = npz_to_json(args.input, args.output)
+    else:
+        output = json_to_npz(args.input, args.output, args.compress)
+
+    in_size, out_size = os.path.getsize(args.input), os.path.getsize(output)
+    print(f"✅ {args.input} ({in_size / 1024:.0f} Ko) -> {output} ({out_size / 1024:.0f} Ko)")
+
+
+if __name__ == '__main__':
+    main()
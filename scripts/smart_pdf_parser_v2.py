@@ -5,12 +5,13 @@ Gère 3 cas: OCG direct, OCG content_stream, sans OCG
 """
 
 import fitz
-import json
 import sys
 import os
 import numpy as np
 from collections import Counter
 
+from fast_json import write_json
+
 class SmartPDFParserV2:
     def __init__(self, max_primitives=50000, verbose=True):
         self.max_primitives = max_primitives
@@ -187,8 +188,7 @@ class SmartPDFParserV2:
         if output_path is None:
             output_path = os.path.splitext(pdf_path)[0] + '_s2.json'
         
-        with open(output_path, 'w') as f:
-            json.dump(result, f)
+        write_json(result, output_path)
         
         self.log(f"\n✅ Sauvegardé: {output_path}")
         return result, output_path
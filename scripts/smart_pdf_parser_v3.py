@@ -31,12 +31,13 @@ Usage:
 """
 
 import fitz
-import json
 import sys
 import os
 import argparse
 import numpy as np
-from collections import defaultdict
+
+from primitives import collect_raw_primitives, build_controls, primitive_lengths, build_sample
+from fast_json import write_json
 
 # ============================================================================
 # PARAMÈTRES OPTIMISÉS POUR FLOORPLANCAD
@@ -83,63 +84,15 @@ def should_exclude_layer(layer_name):
     return any(pattern in name_lower for pattern in exclude_patterns)
 
 
-def calculate_length(points_flat):
-    """Calcule la longueur d'une primitive (somme des segments)."""
-    pts = np.array(points_flat).reshape(4, 2)
-    length = sum(np.linalg.norm(pts[i+1] - pts[i]) for i in range(3))
-    return float(length)
-
-
 def parse_primitives_from_page(page):
     """
     Extrait les primitives vectorielles d'une page PDF.
-    Retourne: List of (cmd, points_flat_8, layer_id, stroke_width)
+    Retourne: commands (N,), controls (N, 4, 2), layer_ids (N,) = index du path
     """
-    primitives = []
     drawings = page.get_drawings()
-    
-    for path_idx, path in enumerate(drawings):
-        stroke_width = path.get('width', 1.0) or 1.0
-        layer_id = path_idx
-        
-        for item in path['items']:
-            cmd_type = item[0]
-            
-            if cmd_type == 'l':  # Ligne
-                p1, p2 = item[1], item[2]
-                points = [
-                    p1.x, p1.y,
-                    p1.x + (p2.x - p1.x) * 0.33, p1.y + (p2.y - p1.y) * 0.33,
-                    p1.x + (p2.x - p1.x) * 0.66, p1.y + (p2.y - p1.y) * 0.66,
-                    p2.x, p2.y
-                ]
-                primitives.append((0, points, layer_id, stroke_width))
-                
-            elif cmd_type == 'c':  # Courbe Bézier
-                if len(item) >= 5:
-                    points = []
-                    for p in item[1:5]:
-                        points.extend([p.x, p.y])
-                    if len(points) == 8:
-                        primitives.append((1, points, layer_id, stroke_width))
-                        
-            elif cmd_type == 're':  # Rectangle -> 4 lignes
-                rect = item[1]
-                corners = [
-                    (rect.x0, rect.y0), (rect.x1, rect.y0),
-                    (rect.x1, rect.y1), (rect.x0, rect.y1)
-                ]
-                for i in range(4):
-                    p1, p2 = corners[i], corners[(i + 1) % 4]
-                    points = [
-                        p1[0], p1[1],
-                        p1[0] + (p2[0] - p1[0]) * 0.33, p1[1] + (p2[1] - p1[1]) * 0.33,
-                        p1[0] + (p2[0] - p1[0]) * 0.66, p1[1] + (p2[1] - p1[1]) * 0.66,
-                        p2[0], p2[1]
-                    ]
-                    primitives.append((0, points, layer_id, stroke_width))
-    
-    return primitives
+    _, kinds, coords, path_index, _ = collect_raw_primitives(drawings)
+    commands, controls, source = build_controls(kinds, coords)
+    return commands, controls, path_index[source]
 
 
 def parse_pdf(pdf_path, output_path=None, mode='ocg', min_length=MIN_LENGTH, target_size=TARGET_SIZE):
@@ -157,26 +110,32 @@ def parse_pdf(pdf_path, output_path=None, mode='ocg', min_length=MIN_LENGTH, tar
             print(f"     [{status}] {info['name']}")
     
     # Extraire primitives
-    all_primitives = []
+    page_primitives = []
+    n_primitives = 0
     width, height = 0, 0
     
     for page in doc:
         rect = page.rect
         width = max(width, rect.width)
         height = max(height, rect.height)
-        all_primitives.extend(parse_primitives_from_page(page))
-        if len(all_primitives) >= MAX_PRIMITIVES:
+        page_primitives.append(parse_primitives_from_page(page))
+        n_primitives += len(page_primitives[-1][0])
+        if n_primitives >= MAX_PRIMITIVES:
             break
     
     doc.close()
     
     print(f"   Dimensions originales: {width:.0f} x {height:.0f}")
-    print(f"   Primitives extraites: {len(all_primitives)}")
+    print(f"   Primitives extraites: {n_primitives}")
     
-    if not all_primitives:
+    if not n_primitives:
         print("⚠️ Aucune primitive trouvée!")
         return None
     
+    commands = np.concatenate([p[0] for p in page_primitives])
+    controls = np.concatenate([p[1] for p in page_primitives])
+    layer_ids = np.concatenate([p[2] for p in page_primitives])
+    
     # Rescaling
     scale = target_size / max(width, height)
     new_width = int(width * scale)
@@ -184,53 +143,33 @@ def parse_pdf(pdf_path, output_path=None, mode='ocg', min_length=MIN_LENGTH, tar
     print(f"   Rescaling vers: {new_width} x {new_height} (facteur: {scale:.4f})")
     
     # Appliquer rescaling et filtrage
-    commands, args, lengths, layerIds = [], [], [], []
-    
-    for cmd, points, layer_id, _ in all_primitives:
-        scaled_points = [p * scale for p in points]
-        length = calculate_length(scaled_points)
-        
-        if length >= min_length:
-            commands.append(cmd)
-            args.append(scaled_points)
-            lengths.append(length)
-            layerIds.append(layer_id)
+    controls = controls * scale
+    lengths = primitive_lengths(controls)
+    keep = lengths >= min_length
+    commands, controls, lengths, layer_ids = commands[keep], controls[keep], lengths[keep], layer_ids[keep]
     
     print(f"   Après filtrage (length >= {min_length}): {len(commands)} primitives")
     
-    if not commands:
+    if not len(commands):
         print("⚠️ Toutes les primitives filtrées!")
         return None
     
     # Statistiques
-    lengths_arr = np.array(lengths)
-    print(f"   Lengths: min={lengths_arr.min():.2f}, max={lengths_arr.max():.2f}, "
-          f"mean={lengths_arr.mean():.2f}, median={np.median(lengths_arr):.2f}")
+    print(f"   Lengths: min={lengths.min():.2f}, max={lengths.max():.2f}, "
+          f"mean={lengths.mean():.2f}, median={np.median(lengths):.2f}")
     
-    # Construire JSON final
+    # Construire JSON final (args en liste plate [x1,y1,x2,y2,x3,y3,x4,y4])
     n = len(commands)
-    result = {
-        "width": new_width,
-        "height": new_height,
-        "commands": commands,
-        "args": args,  # Liste plate [x1,y1,x2,y2,x3,y3,x4,y4]
-        "lengths": lengths,
-        "layerIds": layerIds,
-        "widths": [UNIFORM_WIDTH] * n,
-        "semanticIds": [35] * n,  # 35 = Background
-        "instanceIds": [-1] * n,  # -1 = pas d'instance
-        "rgb": [[0, 0, 0]] * n
-    }
+    result = build_sample(new_width, new_height, commands, controls, lengths, layer_ids, UNIFORM_WIDTH)
     
     # Sauvegarder
     if output_path is None:
         output_path = os.path.splitext(pdf_path)[0] + '_s2.json'
     
-    with open(output_path, 'w') as f:
-        json.dump(result, f)
+    write_json(result, output_path)
     
     print(f"✅ Sauvegardé: {output_path}")
-    print(f"   {n} primitives, {len(set(layerIds))} layers")
+    print(f"   {n} primitives, {len(np.unique(layer_ids))} layers")
     
     return output_path
 
@@ -17,12 +17,15 @@ Usage:
 """
 
 import fitz
-import json
 import sys
 import os
 import argparse
 import numpy as np
-from collections import defaultdict
+
+from primitives import (
+    collect_raw_primitives, zone_exclusion_mask, build_controls, primitive_lengths, build_sample
+)
+from fast_json import write_json
 
 # Paramètres FloorPlanCAD
 TARGET_SIZE = 140
@@ -95,20 +98,6 @@ def detect_legend_zone(page):
     return None
 
 
-def is_point_in_zones(point, zones):
-    """Vérifie si un point est dans une des zones à exclure."""
-    for zone in zones:
-        if zone and zone.contains(point):
-            return True
-    return False
-
-
-def calculate_length(points_flat):
-    """Calcule la longueur totale d'une primitive."""
-    pts = np.array(points_flat).reshape(4, 2)
-    return sum(np.linalg.norm(pts[i+1] - pts[i]) for i in range(3))
-
-
 def parse_pdf(pdf_path, output_path=None, min_length=MIN_LENGTH_DEFAULT, 
               exclude_text=True, crop_plan=True, debug=False):
     """
@@ -143,135 +132,60 @@ def parse_pdf(pdf_path, output_path=None, min_length=MIN_LENGTH_DEFAULT,
     # Extraire les primitives
     drawings = page.get_drawings()
     print(f"   Paths bruts: {len(drawings)}")
+    _, kinds, coords, path_index, _ = collect_raw_primitives(drawings)
     
-    # Collecter les primitives
-    all_primitives = []
-    excluded_by_zone = 0
-    excluded_by_length = 0
-    
-    for path_idx, path in enumerate(drawings):
-        layer_id = path_idx
-        
-        for item in path['items']:
-            cmd_type = item[0]
-            
-            if cmd_type == 'l':  # Ligne
-                p1, p2 = item[1], item[2]
-                
-                # Vérifier si dans zone à exclure
-                if is_point_in_zones(p1, exclude_zones) and is_point_in_zones(p2, exclude_zones):
-                    excluded_by_zone += 1
-                    continue
-                
-                points = [
-                    p1.x, p1.y,
-                    p1.x + (p2.x - p1.x) * 0.33, p1.y + (p2.y - p1.y) * 0.33,
-                    p1.x + (p2.x - p1.x) * 0.66, p1.y + (p2.y - p1.y) * 0.66,
-                    p2.x, p2.y
-                ]
-                all_primitives.append((0, points, layer_id))
-                
-            elif cmd_type == 'c':  # Courbe
-                if len(item) >= 5:
-                    p_start = item[1]
-                    if is_point_in_zones(p_start, exclude_zones):
-                        excluded_by_zone += 1
-                        continue
-                    
-                    points = []
-                    for p in item[1:5]:
-                        points.extend([p.x, p.y])
-                    if len(points) == 8:
-                        all_primitives.append((1, points, layer_id))
-                        
-            elif cmd_type == 're':  # Rectangle
-                rect = item[1]
-                center = fitz.Point((rect.x0 + rect.x1)/2, (rect.y0 + rect.y1)/2)
-                if is_point_in_zones(center, exclude_zones):
-                    excluded_by_zone += 1
-                    continue
-                
-                corners = [
-                    (rect.x0, rect.y0), (rect.x1, rect.y0),
-                    (rect.x1, rect.y1), (rect.x0, rect.y1)
-                ]
-                for i in range(4):
-                    p1, p2 = corners[i], corners[(i + 1) % 4]
-                    points = [
-                        p1[0], p1[1],
-                        p1[0] + (p2[0] - p1[0]) * 0.33, p1[1] + (p2[1] - p1[1]) * 0.33,
-                        p1[0] + (p2[0] - p1[0]) * 0.66, p1[1] + (p2[1] - p1[1]) * 0.66,
-                        p2[0], p2[1]
-                    ]
-                    all_primitives.append((0, points, layer_id))
+    # Exclure les primitives dans les zones (layer = index du path)
+    excluded = zone_exclusion_mask(kinds, coords, exclude_zones)
+    excluded_by_zone = int(excluded.sum())
+    commands, controls, source = build_controls(kinds[~excluded], coords[~excluded])
+    layer_ids = path_index[~excluded][source]
     
     print(f"   Exclus par zone: {excluded_by_zone}")
-    print(f"   Primitives après zones: {len(all_primitives)}")
+    print(f"   Primitives après zones: {len(commands)}")
     
     doc.close()
     
     # Rescaling vers TARGET_SIZE
     scale = TARGET_SIZE / max(orig_width, orig_height)
+    controls = controls * scale
+    lengths = primitive_lengths(controls)
     
     # Filtrage par longueur APRÈS rescaling
-    commands, args, lengths, layerIds = [], [], [], []
-    
-    for cmd, points, layer_id in all_primitives:
-        scaled_points = [p * scale for p in points]
-        length = calculate_length(scaled_points)
-        
-        if length >= min_length:
-            commands.append(cmd)
-            args.append(scaled_points)
-            lengths.append(length)
-            layerIds.append(layer_id)
-        else:
-            excluded_by_length += 1
+    keep = lengths >= min_length
+    excluded_by_length = int((~keep).sum())
+    commands, controls, lengths, layer_ids = commands[keep], controls[keep], lengths[keep], layer_ids[keep]
     
     print(f"   Exclus par longueur < {min_length}: {excluded_by_length}")
     print(f"   Primitives finales: {len(commands)}")
     
-    if not commands:
+    if not len(commands):
         print("⚠️  Aucune primitive restante! Essayez --min-length plus bas")
         return None
     
     # Stats
-    lengths_arr = np.array(lengths)
     print(f"\n📊 Statistiques finales:")
     print(f"   Dimensions: {int(orig_width * scale)} x {int(orig_height * scale)}")
     print(f"   Primitives: {len(commands)}")
-    print(f"   Lengths: min={lengths_arr.min():.2f}, max={lengths_arr.max():.2f}")
-    print(f"            mean={lengths_arr.mean():.2f}, median={np.median(lengths_arr):.2f}")
+    print(f"   Lengths: min={lengths.min():.2f}, max={lengths.max():.2f}")
+    print(f"            mean={lengths.mean():.2f}, median={np.median(lengths):.2f}")
     
     # Comparaison avec FloorPlanCAD
     print(f"\n📈 Comparaison FloorPlanCAD:")
     print(f"   Target: ~900-2000 primitives, lengths mean ~5.4, median ~2.1")
     if len(commands) > 5000:
         print(f"   ⚠️  Trop de primitives! Augmentez --min-length")
-    if lengths_arr.mean() < 2:
+    if lengths.mean() < 2:
         print(f"   ⚠️  Lengths trop courts! Augmentez --min-length")
     
     # Construire JSON
-    n = len(commands)
-    result = {
-        "width": int(orig_width * scale),
-        "height": int(orig_height * scale),
-        "commands": commands,
-        "args": args,
-        "lengths": lengths,
-        "layerIds": layerIds,
-        "widths": [UNIFORM_WIDTH] * n,
-        "semanticIds": [35] * n,
-        "instanceIds": [-1] * n,
-        "rgb": [[0, 0, 0]] * n
-    }
+    result = build_sample(int(orig_width * scale), int(orig_height * scale),
+                          commands, controls, lengths, layer_ids, UNIFORM_WIDTH)
     
     # Sauvegarder
     if output_path is None:
         output_path = os.path.splitext(pdf_path)[0] + '_s2.json'
     
-    with open(output_path, 'w') as f:
-        json.dump(result, f)
+    write_json(result, output_path)
     
     print(f"\n✅ Sauvegardé: {output_path}")
     return output_path
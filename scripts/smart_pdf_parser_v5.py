@@ -15,12 +15,19 @@ Stratégie:
 """
 
 import fitz
-import json
 import sys
 import os
+import io
 import argparse
+import contextlib
+import multiprocessing
 import numpy as np
-from collections import defaultdict
+
+from primitives import (
+    collect_raw_primitives, zone_exclusion_mask, build_controls, primitive_lengths, build_sample
+)
+from page_range import parse_page_spec, page_output_path
+from fast_json import write_json
 
 # Paramètres FloorPlanCAD
 TARGET_SIZE = 140
@@ -72,37 +79,13 @@ def detect_cartouche_zone(page):
     return fitz.Rect(0, height * 0.90, width, height)
 
 
-def is_point_in_zones(point, zones):
-    """Vérifie si un point est dans une zone."""
-    for zone in zones:
-        if zone and zone.contains(point):
-            return True
-    return False
-
-
-def calculate_length(points_flat):
-    """Calcule la longueur totale d'une primitive."""
-    pts = np.array(points_flat).reshape(4, 2)
-    return sum(np.linalg.norm(pts[i+1] - pts[i]) for i in range(3))
-
-
-def classify_by_width(width):
-    """Classifie un élément par son épaisseur."""
-    if width >= WALL_WIDTH_THRESHOLD:
-        return 'wall'
-    elif width >= MEDIUM_WIDTH_THRESHOLD:
-        return 'medium'
-    else:
-        return 'detail'
-
-
-def parse_pdf(pdf_path, output_path=None, debug=False):
+def parse_pdf(pdf_path, output_path=None, debug=False, page_index=0):
     """
-    Parse un PDF en protégeant les murs.
+    Parse une page d'un PDF en protégeant les murs.
     """
-    print(f"📄 Ouverture: {pdf_path}")
+    print(f"📄 Ouverture: {pdf_path}" + (f" (page {page_index + 1})" if page_index else ""))
     doc = fitz.open(pdf_path)
-    page = doc[0]
+    page = doc[page_index]
     
     orig_width, orig_height = page.rect.width, page.rect.height
     print(f"   Dimensions: {orig_width:.0f} x {orig_height:.0f}")
@@ -116,122 +99,44 @@ def parse_pdf(pdf_path, output_path=None, debug=False):
     # Extraire les primitives
     drawings = page.get_drawings()
     print(f"   Paths bruts: {len(drawings)}")
+    path_widths, kinds, coords, path_index, _ = collect_raw_primitives(drawings)
+    doc.close()
     
-    # Statistiques par épaisseur
-    width_stats = defaultdict(int)
-    for path in drawings:
-        w = path.get('width', 0) or 0
-        width_stats[classify_by_width(w)] += 1
+    # Classification par épaisseur: 0 = murs, 1 = moyens, 2 = détails
+    path_layers = np.where(path_widths >= WALL_WIDTH_THRESHOLD, 0,
+                           np.where(path_widths >= MEDIUM_WIDTH_THRESHOLD, 1, 2))
+    width_stats = np.bincount(path_layers, minlength=3)
     
     print(f"\n📊 Distribution par épaisseur:")
-    print(f"   Murs (width >= {WALL_WIDTH_THRESHOLD}): {width_stats['wall']}")
-    print(f"   Moyens ({MEDIUM_WIDTH_THRESHOLD} <= width < {WALL_WIDTH_THRESHOLD}): {width_stats['medium']}")
-    print(f"   Détails (width < {MEDIUM_WIDTH_THRESHOLD}): {width_stats['detail']}")
-    
-    # Collecter les primitives
-    all_primitives = []
+    print(f"   Murs (width >= {WALL_WIDTH_THRESHOLD}): {width_stats[0]}")
+    print(f"   Moyens ({MEDIUM_WIDTH_THRESHOLD} <= width < {WALL_WIDTH_THRESHOLD}): {width_stats[1]}")
+    print(f"   Détails (width < {MEDIUM_WIDTH_THRESHOLD}): {width_stats[2]}")
+    
+    # Pour les MURS: ne PAS exclure même si dans zone texte
+    raw_layers = path_layers[path_index]
+    excluded = zone_exclusion_mask(kinds, coords, exclude_zones) & (raw_layers != 0)
+    kept = ~excluded
     stats = {'walls_kept': 0, 'medium_kept': 0, 'detail_kept': 0,
-             'excluded_zone': 0, 'excluded_length': 0}
+             'excluded_zone': int(excluded.sum()), 'excluded_length': 0}
     
-    for path_idx, path in enumerate(drawings):
-        original_width = path.get('width', 0) or 0
-        element_type = classify_by_width(original_width)
-        
-        for item in path['items']:
-            cmd_type = item[0]
-            
-            if cmd_type == 'l':  # Ligne
-                p1, p2 = item[1], item[2]
-                points = [
-                    p1.x, p1.y,
-                    p1.x + (p2.x - p1.x) * 0.33, p1.y + (p2.y - p1.y) * 0.33,
-                    p1.x + (p2.x - p1.x) * 0.66, p1.y + (p2.y - p1.y) * 0.66,
-                    p2.x, p2.y
-                ]
-                
-                # Pour les MURS: ne PAS exclure même si dans zone texte
-                if element_type == 'wall':
-                    all_primitives.append((0, points, path_idx, original_width, 'wall'))
-                else:
-                    # Pour les autres: exclure si dans zone texte/cartouche
-                    if is_point_in_zones(p1, exclude_zones) and is_point_in_zones(p2, exclude_zones):
-                        stats['excluded_zone'] += 1
-                        continue
-                    all_primitives.append((0, points, path_idx, original_width, element_type))
-                
-            elif cmd_type == 'c':  # Courbe
-                if len(item) >= 5:
-                    p_start = item[1]
-                    points = []
-                    for p in item[1:5]:
-                        points.extend([p.x, p.y])
-                    if len(points) == 8:
-                        if element_type == 'wall':
-                            all_primitives.append((1, points, path_idx, original_width, 'wall'))
-                        elif not is_point_in_zones(p_start, exclude_zones):
-                            all_primitives.append((1, points, path_idx, original_width, element_type))
-                        else:
-                            stats['excluded_zone'] += 1
-                            
-            elif cmd_type == 're':  # Rectangle
-                rect = item[1]
-                center = fitz.Point((rect.x0 + rect.x1)/2, (rect.y0 + rect.y1)/2)
-                
-                if element_type != 'wall' and is_point_in_zones(center, exclude_zones):
-                    stats['excluded_zone'] += 1
-                    continue
-                
-                corners = [
-                    (rect.x0, rect.y0), (rect.x1, rect.y0),
-                    (rect.x1, rect.y1), (rect.x0, rect.y1)
-                ]
-                for i in range(4):
-                    p1, p2 = corners[i], corners[(i + 1) % 4]
-                    points = [
-                        p1[0], p1[1],
-                        p1[0] + (p2[0] - p1[0]) * 0.33, p1[1] + (p2[1] - p1[1]) * 0.33,
-                        p1[0] + (p2[0] - p1[0]) * 0.66, p1[1] + (p2[1] - p1[1]) * 0.66,
-                        p2[0], p2[1]
-                    ]
-                    all_primitives.append((0, points, path_idx, original_width, element_type))
+    commands, controls, source = build_controls(kinds[kept], coords[kept])
+    layer_ids = raw_layers[kept][source]
     
-    print(f"\n   Après exclusion zones: {len(all_primitives)} (exclu: {stats['excluded_zone']})")
-    
-    doc.close()
+    print(f"\n   Après exclusion zones: {len(commands)} (exclu: {stats['excluded_zone']})")
     
     # Rescaling
     scale = TARGET_SIZE / max(orig_width, orig_height)
+    controls = controls * scale
+    lengths = primitive_lengths(controls)
     
-    # Filtrage par longueur (seuils différents selon type)
-    commands, args, lengths, layerIds, widths_out = [], [], [], [], []
+    # Filtrage par longueur (seuil différent pour les murs)
+    min_lengths = np.where(layer_ids == 0, MIN_LENGTH_WALLS, MIN_LENGTH_OTHER)
+    keep = lengths >= min_lengths
+    stats['excluded_length'] = int((~keep).sum())
     
-    for cmd, points, layer_id, orig_w, elem_type in all_primitives:
-        scaled_points = [p * scale for p in points]
-        length = calculate_length(scaled_points)
-        
-        # Seuil de longueur selon le type
-        if elem_type == 'wall':
-            min_len = MIN_LENGTH_WALLS
-        else:
-            min_len = MIN_LENGTH_OTHER
-        
-        if length >= min_len:
-            commands.append(cmd)
-            args.append(scaled_points)
-            lengths.append(length)
-            # Layer basé sur le type d'élément
-            if elem_type == 'wall':
-                layerIds.append(0)  # Layer 0 = murs
-                stats['walls_kept'] += 1
-            elif elem_type == 'medium':
-                layerIds.append(1)  # Layer 1 = éléments moyens
-                stats['medium_kept'] += 1
-            else:
-                layerIds.append(2)  # Layer 2 = détails
-                stats['detail_kept'] += 1
-            widths_out.append(orig_w * scale)
-        else:
-            stats['excluded_length'] += 1
+    commands, controls, lengths, layer_ids = commands[keep], controls[keep], lengths[keep], layer_ids[keep]
+    kept_counts = np.bincount(layer_ids, minlength=3)
+    stats['walls_kept'], stats['medium_kept'], stats['detail_kept'] = (int(c) for c in kept_counts[:3])
     
     print(f"   Exclus par longueur: {stats['excluded_length']}")
     print(f"\n✅ Primitives finales: {len(commands)}")
@@ -239,46 +144,73 @@ def parse_pdf(pdf_path, output_path=None, debug=False):
     print(f"   - Moyens: {stats['medium_kept']}")
     print(f"   - Détails: {stats['detail_kept']}")
     
-    if not commands:
+    if not len(commands):
         print("⚠️  Aucune primitive!")
         return None
     
     # Stats finales
-    lengths_arr = np.array(lengths)
     print(f"\n📊 Statistiques:")
     print(f"   Dimensions: {int(orig_width * scale)} x {int(orig_height * scale)}")
-    print(f"   Lengths: min={lengths_arr.min():.2f}, max={lengths_arr.max():.2f}, mean={lengths_arr.mean():.2f}")
+    print(f"   Lengths: min={lengths.min():.2f}, max={lengths.max():.2f}, mean={lengths.mean():.2f}")
     
-    # JSON
-    n = len(commands)
-    result = {
-        "width": int(orig_width * scale),
-        "height": int(orig_height * scale),
-        "commands": commands,
-        "args": args,
-        "lengths": lengths,
-        "layerIds": layerIds,
-        "widths": [UNIFORM_WIDTH] * n,  # Uniforme pour le modèle
-        "semanticIds": [35] * n,
-        "instanceIds": [-1] * n,
-        "rgb": [[0, 0, 0]] * n
-    }
+    # JSON (widths uniformes pour le modèle)
+    result = build_sample(int(orig_width * scale), int(orig_height * scale),
+                          commands, controls, lengths, layer_ids, UNIFORM_WIDTH)
     
     if output_path is None:
         output_path = os.path.splitext(pdf_path)[0] + '_s2.json'
     
-    with open(output_path, 'w') as f:
-        json.dump(result, f)
+    write_json(result, output_path)
     
     print(f"\n💾 Sauvegardé: {output_path}")
     return output_path
 
 
+def _parse_page_worker(task):
+    """Parse une page dans un worker (document ouvert indépendamment), log capturé."""
+    pdf_path, output_path, page_index, debug = task
+    log = io.StringIO()
+    with contextlib.redirect_stdout(log):
+        result = parse_pdf(pdf_path, output_path, debug, page_index)
+    return result, log.getvalue()
+
+
+def parse_pdf_pages(pdf_path, pages='all', output_dir=None, workers=None, debug=False):
+    """
+    Parse plusieurs pages en parallèle: un fichier _pN_s2.json par page.
+    Retourne la liste des fichiers générés.
+    """
+    doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    doc.close()
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    tasks = [(pdf_path, page_output_path(pdf_path, i, output_dir), i, debug)
+             for i in parse_page_spec(pages, page_count)]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    
+    if workers <= 1:
+        results = [_parse_page_worker(t) for t in tasks]
+    else:
+        with multiprocessing.Pool(processes=workers) as pool:
+            results = pool.map(_parse_page_worker, tasks)
+    
+    # Logs dans l'ordre des pages
+    for _, log in results:
+        print(log)
+    return [output for output, _ in results if output]
+
+
 def main():
     parser = argparse.ArgumentParser(description='Parser PDF v5 - Protection des murs')
     parser.add_argument('pdf', help='Fichier PDF')
-    parser.add_argument('output', nargs='?', help='Fichier JSON de sortie')
+    parser.add_argument('output', nargs='?', help='Fichier JSON de sortie (dossier avec --pages)')
     parser.add_argument('--debug', action='store_true')
+    parser.add_argument('--pages', metavar='SPEC',
+                        help='Pages à parser: "all", "3", "1-4,7" (un _pN_s2.json par page)')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processus pour --pages (défaut: nombre de CPUs)')
     
     args = parser.parse_args()
     
@@ -286,6 +218,17 @@ def main():
         print(f"❌ Fichier non trouvé: {args.pdf}")
         sys.exit(1)
     
+    if args.pages:
+        with fitz.open(args.pdf) as doc:
+            page_count = len(doc)
+        try:
+            parse_page_spec(args.pages, page_count)
+        except ValueError as e:
+            parser.print_usage(sys.stderr)
+            parser.exit(1, f"{parser.prog}: error: --pages: {e}\n")
+        outputs = parse_pdf_pages(args.pdf, args.pages, args.output, args.workers, args.debug)
+        sys.exit(0 if outputs else 1)
+    
     result = parse_pdf(args.pdf, args.output, args.debug)
     sys.exit(0 if result else 1)
 
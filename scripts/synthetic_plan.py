@@ -0,0 +1,194 @@
+#!/usr/bin/env python
+"""
+synthetic_plan.py - Générateur de plans PDF vectoriels synthétiques (benchmarks)
+
+Produit avec PyMuPDF un plan d'étage factice, reproductible (graine) et de
+taille réglable (scale):
+
+- murs: pièces en grille, murs doubles (deux traits parallèles) d'épaisseurs
+  variées, calque "MURS PORTEURS"
+- portes: battant + arc de débattement (courbes de Bézier), calque "MENUISERIES"
+- hachures: traits fins diagonaux dans certaines pièces, calque "HACHURES"
+- cotations: lignes de cote très fines + texte, calque "COTATION"
+- blocs de texte (noms de pièces) et cartouche en bas à droite
+- plusieurs pages
+
+Usage:
+    python synthetic_plan.py plan_synth.pdf
+    python synthetic_plan.py plan_synth.pdf --scale 8 --pages 3 --no-ocg
+"""
+
+import math
+import random
+import argparse
+from dataclasses import dataclass
+
+import fitz  # PyMuPDF
+
+PAGE_SIZE = (1190, 842)     # A3 paysage (points)
+WALL_WIDTHS = (0.5, 0.7, 1.0)
+DOOR_WIDTH = 0.25
+HATCH_WIDTH = 0.1
+DIMENSION_WIDTH = 0.05
+WALL_GAP = 4.0              # Écart entre les deux traits d'un mur
+
+
+@dataclass
+class PlanSpec:
+    """Paramètres d'un plan synthétique (scale multiplie le nombre de pièces)."""
+    scale: float = 1.0
+    pages: int = 1
+    ocg: bool = True
+    seed: int = 0
+    hatch_ratio: float = 0.3        # Part des pièces hachurées
+    text_blocks: int = 20
+
+    @property
+    def grid(self) -> int:
+        """Pièces par côté de la grille (~36 pièces à scale 1)."""
+        return max(2, int(round(6 * math.sqrt(self.scale))))
+
+
+def _layers(doc, spec: PlanSpec) -> dict:
+    names = ('walls', 'doors', 'hatch', 'dimensions')
+    if not spec.ocg:
+        return {name: 0 for name in names}
+    return {
+        'walls': doc.add_ocg("MURS PORTEURS"),
+        'doors': doc.add_ocg("MENUISERIES"),
+        'hatch': doc.add_ocg("HACHURES"),
+        'dimensions': doc.add_ocg("COTATION"),
+    }
+
+
+def _wall(shape, p1, p2):
+    """Mur double: deux traits parallèles décalés de WALL_GAP."""
+    dx, dy = p2[0] - p1[0], p2[1] - p1[1]
+    length = math.hypot(dx, dy) or 1.0
+    nx, ny = -dy / length * WALL_GAP / 2, dx / length * WALL_GAP / 2
+    shape.draw_line((p1[0] + nx, p1[1] + ny), (p2[0] + nx, p2[1] + ny))
+    shape.draw_line((p1[0] - nx, p1[1] - ny), (p2[0] - nx, p2[1] - ny))
+
+
+def _door(shape, x, y, size):
+    """Battant + quart de cercle (4 courbes de Bézier approchent l'arc)."""
+    shape.draw_line((x, y), (x, y - size))
+    steps = 4
+    for i in range(steps):
+        a0, a1 = math.pi / 2 * i / steps, math.pi / 2 * (i + 1) / steps
+        k = 4 / 3 * math.tan((a1 - a0) / 4) * size
+        p0 = (x + size * math.sin(a0), y - size * math.cos(a0))
+        p3 = (x + size * math.sin(a1), y - size * math.cos(a1))
+        c1 = (p0[0] + k * math.cos(a0), p0[1] + k * math.sin(a0))
+        c2 = (p3[0] - k * math.cos(a1), p3[1] - k * math.sin(a1))
+        shape.draw_bezier(p0, c1, c2, p3)
+
+
+def _hatch(shape, rect, spacing):
+    """Hachures à 45° coupées au rectangle."""
+    x0, y0, x1, y1 = rect
+    t = -(y1 - y0)
+    while t < x1 - x0:
+        a = (x0 + max(t, 0), y0 + max(-t, 0))
+        run = min(x1 - a[0], y1 - a[1])
+        if run > 0:
+            shape.draw_line(a, (a[0] + run, a[1] + run))
+        t += spacing
+
+
+def draw_page(doc, page, spec: PlanSpec, rng: random.Random, layers: dict):
+    width, height = page.rect.width, page.rect.height
+    margin = 40
+    plan_w, plan_h = width * 0.78 - margin, height - 2 * margin
+    n = spec.grid
+    xs = [margin + plan_w * i / n + (rng.uniform(-0.2, 0.2) * plan_w / n if 0 < i < n else 0)
+          for i in range(n + 1)]
+    ys = [margin + plan_h * j / n + (rng.uniform(-0.2, 0.2) * plan_h / n if 0 < j < n else 0)
+          for j in range(n + 1)]
+
+    # Murs: un path par mur (comme les exports CAO), épaisseur tirée au hasard
+    shape = page.new_shape()
+    segments = [((xs[i], ys[j]), (xs[i + 1], ys[j])) for j in range(n + 1) for i in range(n)]
+    segments += [((xs[i], ys[j]), (xs[i], ys[j + 1])) for i in range(n + 1) for j in range(n)]
+    for p1, p2 in segments:
+        _wall(shape, p1, p2)
+        shape.finish(width=rng.choice(WALL_WIDTHS), oc=layers['walls'])
+    shape.commit()
+
+    # Portes, hachures, noms de pièces
+    doors, hatch = page.new_shape(), page.new_shape()
+    for j in range(n):
+        for i in range(n):
+            rect = (xs[i] + WALL_GAP, ys[j] + WALL_GAP, xs[i + 1] - WALL_GAP, ys[j + 1] - WALL_GAP)
+            size = min(rect[2] - rect[0], rect[3] - rect[1]) * 0.3
+            _door(doors, rect[0] + 2, rect[3], size)
+            doors.finish(width=DOOR_WIDTH, oc=layers['doors'])
+            if rng.random() < spec.hatch_ratio:
+                _hatch(hatch, rect, spacing=rng.uniform(3, 6))
+                hatch.finish(width=HATCH_WIDTH, oc=layers['hatch'])
+    doors.commit()
+    hatch.commit()
+
+    # Cotations (calque exclu par les parsers) sous le plan
+    dims = page.new_shape()
+    for i in range(n):
+        y = margin / 2
+        dims.draw_line((xs[i], y), (xs[i + 1], y))
+        dims.draw_line((xs[i], y - 3), (xs[i], y + 3))
+        dims.finish(width=DIMENSION_WIDTH, oc=layers['dimensions'])
+    dims.commit()
+    for i in range(n):
+        page.insert_text(((xs[i] + xs[i + 1]) / 2, margin / 2 - 4),
+                         f"{(xs[i + 1] - xs[i]) / 20:.2f}", fontsize=5)
+
+    for _ in range(spec.text_blocks):
+        i, j = rng.randrange(n), rng.randrange(n)
+        page.insert_text(((xs[i] + xs[i + 1]) / 2 - 15, (ys[j] + ys[j + 1]) / 2),
+                         rng.choice(["SEJOUR", "CHAMBRE", "CUISINE", "SDB", "WC", "DGT"]), fontsize=7)
+
+    # Cartouche
+    cart = fitz.Rect(width * 0.8, height * 0.7, width - margin / 2, height - margin / 2)
+    shape = page.new_shape()
+    shape.draw_rect(cart)
+    for k in range(1, 5):
+        y = cart.y0 + cart.height * k / 5
+        shape.draw_line((cart.x0, y), (cart.x1, y))
+    shape.finish(width=0.3)
+    shape.commit()
+    for k, label in enumerate(["PROJET SYNTHETIQUE", "PLAN DU REZ-DE-CHAUSSEE", "ECHELLE 1/100",
+                               f"PAGE {page.number + 1}", "INDICE A"]):
+        page.insert_text((cart.x0 + 5, cart.y0 + cart.height * k / 5 + 12), label, fontsize=7)
+
+
+def generate_plan(output_path: str, spec: PlanSpec = None) -> str:
+    """Écrit un PDF synthétique et retourne son chemin."""
+    spec = spec or PlanSpec()
+    rng = random.Random(spec.seed)
+    doc = fitz.open()
+    layers = _layers(doc, spec)
+    for _ in range(spec.pages):
+        page = doc.new_page(width=PAGE_SIZE[0], height=PAGE_SIZE[1])
+        draw_page(doc, page, spec, rng, layers)
+    doc.save(output_path, deflate=True)
+    doc.close()
+    return output_path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Plan PDF vectoriel synthétique')
+    parser.add_argument('output', help='PDF à écrire')
+    parser.add_argument('--scale', type=float, default=1.0, help='Facteur de taille (nombre de pièces)')
+    parser.add_argument('--pages', type=int, default=1)
+    parser.add_argument('--no-ocg', action='store_true', help='Sans calques OCG')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    spec = PlanSpec(scale=args.scale, pages=args.pages, ocg=not args.no_ocg, seed=args.seed)
+    path = generate_plan(args.output, spec)
+    doc = fitz.open(path)
+    drawings = sum(len(p.get_drawings()) for p in doc)
+    print(f"✅ {path}: {len(doc)} page(s), grille {spec.grid}x{spec.grid}, {drawings} paths")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,140 @@
+#!/usr/bin/env python
+"""
+tiling.py - Découpage en tuiles des plans trop grands pour une passe avant
+
+Un plan dense ramené à 140 unités perd du détail et peut dépasser la mémoire
+GPU. En mode tuiles (run_inference_v2.py --tile-size):
+
+- le plan est découpé en une grille de tuiles (coeur) de côté <= tile_size,
+  élargies d'une marge de recouvrement (overlap) sur chaque bord
+- une primitive appartient à toute tuile élargie qui contient son milieu, et
+  au coeur d'une seule tuile
+- chaque tuile devient un échantillon _s2 autonome, recadré et remis à
+  l'échelle TARGET_SIZE (même plage que les plans entiers)
+- les scores (softmax) des tuiles sont sommés par primitive, pondérés 1 dans
+  le coeur et OVERLAP_WEIGHT dans la marge (moins de contexte), puis argmax
+
+Sans torch: utilisable hors de l'environnement SymPointV2.
+"""
+
+import numpy as np
+from dataclasses import dataclass
+from typing import List
+
+TARGET_SIZE = 140           # Plage de coordonnées attendue par le modèle
+DEFAULT_TILE_OVERLAP = 10.0
+OVERLAP_WEIGHT = 0.5        # Poids des scores d'une primitive dans la marge d'une tuile
+
+# Champs par primitive recoupés pour chaque tuile
+PRIMITIVE_FIELDS = ('commands', 'args', 'lengths', 'layerIds', 'widths',
+                    'semanticIds', 'instanceIds', 'rgb')
+
+
+@dataclass
+class Tile:
+    """Tuile: fenêtre élargie (x0, y0, x1, y1) et primitives qu'elle contient."""
+    row: int
+    col: int
+    bounds: tuple
+    indices: np.ndarray         # Indices des primitives (milieu dans la fenêtre élargie)
+    core: np.ndarray            # (len(indices),) True si le milieu est dans le coeur
+
+
+def primitive_midpoints(sample: dict) -> np.ndarray:
+    """Milieu (N, 2) de chaque primitive (premier et dernier point de contrôle)."""
+    args = np.asarray(sample['args'], dtype=np.float64).reshape(-1, 8)
+    return (args[:, 0:2] + args[:, 6:8]) / 2
+
+
+def plan_tiles(sample: dict, tile_size: float, overlap: float = DEFAULT_TILE_OVERLAP) -> List[Tile]:
+    """
+    Grille de tuiles couvrant le plan (tuiles vides omises).
+
+    Args:
+        sample: échantillon _s2 (dict, listes ou tableaux)
+        tile_size: côté max du coeur d'une tuile (unités du plan)
+        overlap: marge ajoutée sur chaque bord
+    """
+    mid = primitive_midpoints(sample)
+    # Grille de (0, 0) à (width, height), élargie aux primitives hors de la page
+    # (coordonnées négatives): chaque milieu tombe dans le coeur d'une tuile
+    left = min(0.0, float(mid[:, 0].min(initial=0)))
+    top = min(0.0, float(mid[:, 1].min(initial=0)))
+    width = max(float(sample['width']), float(mid[:, 0].max(initial=0))) - left
+    height = max(float(sample['height']), float(mid[:, 1].max(initial=0))) - top
+    nx = max(1, int(np.ceil(width / tile_size)))
+    ny = max(1, int(np.ceil(height / tile_size)))
+    step_x, step_y = width / nx, height / ny
+
+    # Coeur: cellule de la grille contenant le milieu (bords inclus)
+    core_col = np.clip(((mid[:, 0] - left) // step_x).astype(np.int64), 0, nx - 1)
+    core_row = np.clip(((mid[:, 1] - top) // step_y).astype(np.int64), 0, ny - 1)
+
+    tiles = []
+    for row in range(ny):
+        for col in range(nx):
+            x0, y0 = left + col * step_x - overlap, top + row * step_y - overlap
+            x1, y1 = left + (col + 1) * step_x + overlap, top + (row + 1) * step_y + overlap
+            inside = ((mid[:, 0] >= x0) & (mid[:, 0] <= x1) &
+                      (mid[:, 1] >= y0) & (mid[:, 1] <= y1))
+            indices = np.flatnonzero(inside)
+            if not len(indices):
+                continue
+            core = (core_row[indices] == row) & (core_col[indices] == col)
+            tiles.append(Tile(row, col, (x0, y0, x1, y1), indices, core))
+    return tiles
+
+
+def subsample(sample: dict, indices: np.ndarray, origin=(0.0, 0.0), scale: float = 1.0) -> dict:
+    """
+    Échantillon _s2 (listes, comme json.load) réduit aux primitives 'indices',
+    coordonnées translatées de -origin puis multipliées par scale.
+    """
+    out = {}
+    for key, value in sample.items():
+        if key not in PRIMITIVE_FIELDS:
+            out[key] = value
+            continue
+        arr = np.asarray(value)[indices]
+        if key == 'args':
+            arr = arr.astype(np.float64).reshape(-1, 4, 2)
+            arr = ((arr - origin) * scale).reshape(-1, 8)
+        elif key == 'lengths':
+            arr = arr.astype(np.float64) * scale
+        out[key] = arr.tolist()
+    return out
+
+
+def tile_sample(sample: dict, tile: Tile) -> dict:
+    """Échantillon de la tuile, recadré sur sa fenêtre et remis à l'échelle TARGET_SIZE."""
+    x0, y0, x1, y1 = tile.bounds
+    scale = TARGET_SIZE / max(x1 - x0, y1 - y0)
+    out = subsample(sample, tile.indices, (x0, y0), scale)
+    out['width'] = int(round((x1 - x0) * scale))
+    out['height'] = int(round((y1 - y0) * scale))
+    return out
+
+
+class TileStitcher:
+    """Accumule les scores des tuiles par primitive, puis argmax."""
+
+    def __init__(self, num_primitives: int):
+        self.num_primitives = num_primitives
+        self.scores = None
+        self.num_instances = 0
+
+    def add(self, tile: Tile, scores: np.ndarray, num_instances: int = 0):
+        """scores: (len(tile.indices), C) probabilités de la tuile."""
+        if self.scores is None:
+            self.scores = np.zeros((self.num_primitives, scores.shape[1]), dtype=np.float64)
+        weight = np.where(tile.core, 1.0, OVERLAP_WEIGHT)
+        self.scores[tile.indices] += scores * weight[:, None]  # indices uniques dans une tuile
+        self.num_instances += num_instances
+
+    def predictions(self) -> np.ndarray:
+        """Classe retenue (N,) pour chaque primitive (vide pour un plan sans primitive)."""
+        if self.scores is None:
+            if self.num_primitives:
+                raise RuntimeError(f"aucune tuile ajoutée pour {self.num_primitives} primitives")
+            return np.zeros(0, dtype=np.int64)
+        return np.argmax(self.scores, axis=1)
@@ -19,6 +19,8 @@ LAYERS DE SORTIE:
 
 Usage:
     python universal_pdf_parser.py input.pdf [output.json] [--debug]
+    python universal_pdf_parser.py --batch DIR|GLOB [--workers N] [--output-dir DIR]
+    python universal_pdf_parser.py input.pdf --pages all [--container] [--width-stats global]
 
 Auteur: Pierre-Antoine / Claude
 Version: 1.0
@@ -28,18 +30,36 @@ import fitz
 import json
 import sys
 import os
+import io
+import glob
+import time
 import argparse
+import contextlib
+import hashlib
+import multiprocessing
 import numpy as np
-from collections import defaultdict
 from dataclasses import dataclass
 from typing import List, Tuple, Optional, Dict
 
+from primitives import (
+    collect_raw_primitives, zone_exclusion_mask, build_controls, primitive_lengths, build_sample,
+    GrowableArray, iter_chunks, UNIFORM_WIDTH
+)
+from page_range import parse_page_spec, page_output_path
+from parse_cache import ParseCache, DEFAULT_CACHE_DIR, DEFAULT_MAX_SIZE_MB
+from sample_io import write_sample
+from fast_json import write_json
+from zone_index import ZoneIndex
+from dedup import simplify_primitives
+from primitive_budget import select_by_budget
+from width_stats import THRESHOLD_METHODS, histogram_thresholds
+from profiling import phase, start_profiling, stop_profiling, active_profiler, profile_call, append_jsonl
+
 # ============================================================================
 # CONFIGURATION
 # ============================================================================
 
 TARGET_SIZE = 140           # Dimensions cibles (FloorPlanCAD standard)
-UNIFORM_WIDTH = 0.1         # Width uniforme pour le modèle
 MIN_LENGTH_WALLS = 1.0      # Longueur min pour murs
 MIN_LENGTH_MEDIUM = 2.0     # Longueur min pour éléments moyens
 MIN_LENGTH_DETAILS = 3.0    # Longueur min pour détails
@@ -73,50 +93,304 @@ class PDFAnalysis:
     width_percentiles: Dict[str, float]
     recommended_wall_threshold: float
     recommended_medium_threshold: float
+    threshold_method: str = 'percentile'
+
+
+@dataclass
+class RawExtraction:
+    """Primitives brutes d'une page, collectées en un seul passage sur get_drawings()."""
+    page_index: int
+    page_width: float
+    page_height: float
+    has_ocg: bool
+    ocg_count: int
+    wall_ocg_xrefs: List[int]       # Dérivé de ocg_names (classify_wall_layers)
+    total_paths: int
+    total_primitives: int
+    path_widths: np.ndarray         # (P,) épaisseur de chaque path (0 si absente)
+    path_ocs: List[Optional[int]]   # Référence OCG de chaque path
+    path_layers: List[Optional[str]]  # (P,) nom du calque OCG de chaque path (get_drawings)
+    ocg_names: Dict[int, str]       # xref -> nom de chaque OCG du document
+    kinds: np.ndarray               # (N,) RAW_LINE / RAW_CURVE / RAW_RECT
+    coords: np.ndarray              # (N, 8) coordonnées brutes (voir primitives.py)
+    path_index: np.ndarray          # (N,) index du path d'origine
+    path_wall: np.ndarray           # (P,) path sur un calque OCG de murs (WALL_KEYWORDS, dérivé de path_layers)
+    hidden_layers: List[str]        # Calques OCG non décodés (EXCLUDE_KEYWORDS, mode OCG)
+    text_zones: List
+    cartouche: Optional[fitz.Rect]
+    legend: Optional[fitz.Rect]
+    from_cache: bool = False        # Relue depuis le cache disque
+
+
+@dataclass
+class ParseOptions:
+    """Options de conversion choisies en CLI (transmises aux workers)."""
+    ocg_layers: bool = False        # Calques OCG: murs -> layer 0, calques exclus non décodés
+    dedup: bool = False             # Doublons supprimés, segments colinéaires fusionnés (dedup.py)
+    max_primitives: Optional[int] = None  # Budget: les moins importantes sont écartées (primitive_budget.py)
+    width_threshold: str = 'percentile'   # Seuils d'épaisseur: p90/p50, 'otsu' ou 'kmeans' (width_stats.py)
+    profile: bool = False           # Mesures par phase (profiling.py), dans _metadata / le manifeste
+    float_precision: Optional[int] = None  # Décimales des floats du _s2.json (fast_json.py), None = sans perte
+
+
+# Cache mémoire de la dernière extraction (analyze_pdf puis parse_pdf = 1 seul passage)
+_extraction_cache: Dict[tuple, RawExtraction] = {}
+
+# Version de l'extraction brute, dans la clé du cache disque. À incrémenter si
+# collect_raw_primitives, get_text_zones, detect_cartouche ou detect_legend changent.
+EXTRACTION_VERSION = 'raw3'
+
+# Cache disque des extractions brutes (None = désactivé, --no-cache)
+_cache_config = (True, None, DEFAULT_MAX_SIZE_MB)
+_parse_cache: Optional[ParseCache] = ParseCache()
+
+
+def configure_cache(enabled: bool = True, cache_dir: Optional[str] = None,
+                    max_size_mb: int = DEFAULT_MAX_SIZE_MB):
+    """Active/désactive le cache disque (aussi utilisé comme initializer des workers)."""
+    global _cache_config, _parse_cache
+    _cache_config = (enabled, cache_dir, max_size_mb)
+    _parse_cache = ParseCache(cache_dir, max_size_mb) if enabled else None
 
 
 # ============================================================================
 # FONCTIONS D'ANALYSE
 # ============================================================================
 
-def analyze_pdf(pdf_path: str, debug: bool = False) -> PDFAnalysis:
+def _layer_matches(name: Optional[str], keywords: List[str]) -> bool:
+    return bool(name) and any(kw in name.upper() for kw in keywords)
+
+
+def _keywords_hash(keywords: List[str]) -> str:
+    return hashlib.sha256('\n'.join(keywords).encode()).hexdigest()[:8]
+
+
+def classify_wall_layers(raw: 'RawExtraction') -> 'RawExtraction':
     """
-    Analyse un PDF pour déterminer sa structure et les seuils optimaux.
+    Calques de murs (WALL_KEYWORDS) à partir des noms de calques de l'extraction.
+    Recalculé à chaque lecture (cache disque ou mémoire): changer les mots-clés
+    ne demande pas de nouveau décodage.
     """
-    doc = fitz.open(pdf_path)
-    page = doc[0]
+    raw.wall_ocg_xrefs = [xref for xref, name in raw.ocg_names.items() if _layer_matches(name, WALL_KEYWORDS)]
+    raw.path_wall = np.array([_layer_matches(name, WALL_KEYWORDS) for name in raw.path_layers], dtype=bool)
+    return raw
+
+
+def hide_excluded_layers(doc) -> List[str]:
+    """
+    Masque les calques OCG EXCLUDE_KEYWORDS (annotations, cotations...).
+    MuPDF ne parcourt plus leur contenu: get_drawings() ne le matérialise pas.
+    """
+    hidden = []
+    try:
+        configs = doc.layer_ui_configs()
+    except Exception:
+        return hidden
+    for config in configs:
+        if _layer_matches(config.get('text'), EXCLUDE_KEYWORDS):
+            doc.set_layer_ui_config(config['number'], 2)  # 2 = OFF
+            hidden.append(config['text'])
+    return hidden
+
+
+def extract_page(doc, page, ocg_layers: bool = False) -> RawExtraction:
+    """
+    Extraction brute d'une page: OCG, drawings, zones d'exclusion.
     
+    Avec ocg_layers, les calques exclus sont masqués avant get_drawings().
+    """
     # Analyser les OCG
     has_ocg = False
     ocg_count = 0
-    wall_ocg_xrefs = []
+    ocg_names = {}
     
     try:
         ocgs = doc.get_ocgs()
         if ocgs:
             has_ocg = True
             ocg_count = len(ocgs)
-            
-            for xref, info in ocgs.items():
-                name = info['name'].upper()
-                if any(kw in name for kw in WALL_KEYWORDS):
-                    wall_ocg_xrefs.append(xref)
+            ocg_names = {xref: info['name'] for xref, info in ocgs.items()}
     except:
         pass
     
-    # Analyser les paths
-    drawings = page.get_drawings()
-    total_paths = len(drawings)
+    hidden_layers = hide_excluded_layers(doc) if ocg_layers and has_ocg else []
+    
+    # Unique appel à get_drawings() (coût dominant sur les gros plans)
+    with phase('get_drawings') as record:
+        drawings = page.get_drawings()
+        record.items_out = len(drawings)
     total_primitives = sum(len(p.get('items', [])) for p in drawings)
+    path_layers = [p.get('layer') or None for p in drawings]
+    total_paths = len(drawings)
+    # Les paths sont libérés au fil de la lecture (drawings n'est plus utilisé ensuite)
+    with phase('collect', items_in=total_paths) as record:
+        path_widths, kinds, coords, path_index, path_ocs = collect_raw_primitives(drawings, release=True)
+        record.items_out = len(kinds)
+    del drawings
     
-    # Distribution des épaisseurs
-    widths = []
-    for path in drawings:
-        w = path.get('width', 0) or 0
-        if w > 0:
-            widths.append(w)
+    with phase('text_zones') as record:
+        text_zones = get_text_zones(page)
+        cartouche = detect_cartouche(page)
+        legend = detect_legend(page)
+        record.items_out = len(text_zones)
+    
+    return classify_wall_layers(RawExtraction(
+        page_index=page.number,
+        page_width=page.rect.width,
+        page_height=page.rect.height,
+        has_ocg=has_ocg,
+        ocg_count=ocg_count,
+        wall_ocg_xrefs=[],
+        total_paths=total_paths,
+        total_primitives=total_primitives,
+        path_widths=path_widths,
+        path_ocs=path_ocs,
+        path_layers=path_layers,
+        ocg_names=ocg_names,
+        kinds=kinds,
+        coords=coords,
+        path_index=path_index,
+        path_wall=np.zeros(total_paths, dtype=bool),
+        hidden_layers=hidden_layers,
+        text_zones=text_zones,
+        cartouche=cartouche,
+        legend=legend
+    ))
+
+
+def _raw_to_arrays(raw: RawExtraction) -> Tuple[Dict[str, np.ndarray], dict]:
+    """
+    Sérialise une extraction pour le cache disque. Seuls les noms de calques
+    sont stockés: path_wall / wall_ocg_xrefs dépendent de WALL_KEYWORDS.
+    """
+    layer_names = sorted({name for name in raw.path_layers if name is not None})
+    layer_ids = {name: i for i, name in enumerate(layer_names)}
+    arrays = {
+        'path_widths': raw.path_widths,
+        'path_ocs': np.array([-1 if oc is None else oc for oc in raw.path_ocs], dtype=np.int64),
+        'kinds': raw.kinds,
+        'coords': raw.coords,
+        'path_index': raw.path_index,
+        'path_layer_ids': np.array([layer_ids.get(name, -1) for name in raw.path_layers], dtype=np.int32),
+        'text_zones': np.array([tuple(z) for z in raw.text_zones], dtype=np.float64).reshape(-1, 4)
+    }
+    meta = {
+        'page_index': raw.page_index,
+        'page_width': raw.page_width,
+        'page_height': raw.page_height,
+        'has_ocg': raw.has_ocg,
+        'ocg_count': raw.ocg_count,
+        'ocg_names': [[xref, name] for xref, name in raw.ocg_names.items()],
+        'layer_names': layer_names,
+        'total_paths': raw.total_paths,
+        'total_primitives': raw.total_primitives,
+        'hidden_layers': raw.hidden_layers,
+        'cartouche': list(raw.cartouche) if raw.cartouche is not None else None,
+        'legend': list(raw.legend) if raw.legend is not None else None
+    }
+    return arrays, meta
+
+
+def _raw_from_arrays(arrays: Dict[str, np.ndarray], meta: dict) -> RawExtraction:
+    """Reconstruit une extraction depuis le cache disque (calques de murs recalculés)."""
+    layer_names = meta['layer_names']
+    return classify_wall_layers(RawExtraction(
+        page_index=meta['page_index'],
+        page_width=meta['page_width'],
+        page_height=meta['page_height'],
+        has_ocg=meta['has_ocg'],
+        ocg_count=meta['ocg_count'],
+        wall_ocg_xrefs=[],
+        total_paths=meta['total_paths'],
+        total_primitives=meta['total_primitives'],
+        path_widths=arrays['path_widths'],
+        path_ocs=[None if oc < 0 else oc for oc in arrays['path_ocs'].tolist()],
+        path_layers=[None if i < 0 else layer_names[i] for i in arrays['path_layer_ids'].tolist()],
+        ocg_names={int(xref): name for xref, name in meta['ocg_names']},
+        kinds=arrays['kinds'],
+        coords=arrays['coords'],
+        path_index=arrays['path_index'],
+        path_wall=np.zeros(meta['total_paths'], dtype=bool),
+        hidden_layers=meta['hidden_layers'],
+        text_zones=[fitz.Rect(z) for z in arrays['text_zones'].tolist()],
+        cartouche=fitz.Rect(meta['cartouche']) if meta['cartouche'] is not None else None,
+        legend=fitz.Rect(meta['legend']) if meta['legend'] is not None else None,
+        from_cache=True
+    ))
+
+
+def _load_or_extract(pdf_path: str, page_index: int, ocg_layers: bool = False) -> RawExtraction:
+    """Extraction d'une page via le cache disque (si actif), sinon décodage du PDF."""
+    key = None
+    if _parse_cache is not None:
+        # Les calques EXCLUDE_KEYWORDS ne sont pas décodés: leur liste fait partie de la clé
+        mode = f"-ocg{_keywords_hash(EXCLUDE_KEYWORDS)}" if ocg_layers else ''
+        version = f"universal-{EXTRACTION_VERSION}{mode}-mupdf{fitz.VersionBind}"
+        key = _parse_cache.key(pdf_path, version, page_index)
+        cached = _parse_cache.get(key)
+        if cached is not None:
+            return _raw_from_arrays(*cached)
+    
+    doc = fitz.open(pdf_path)
+    raw = extract_page(doc, doc[page_index], ocg_layers)
+    doc.close()
     
-    widths = np.array(widths) if widths else np.array([0.1])
+    if key is not None:
+        try:
+            _parse_cache.put(key, *_raw_to_arrays(raw))
+        except OSError as e:
+            print(f"   ⚠️ Cache non écrit: {e}")
+    return raw
+
+
+def extract_pdf(pdf_path: str, page_index: int = 0, ocg_layers: bool = False) -> RawExtraction:
+    """
+    Extrait une page d'un PDF, avec cache de la dernière extraction.
+
+    Le cache mémoire est indexé sur (chemin, mtime, taille, page) pour que
+    analyze_pdf() suivi de parse_pdf() sur le même fichier ne décode le PDF
+    qu'une fois. Le cache disque (parse_cache.py) évite le décodage d'un run à l'autre.
+    """
+    st = os.stat(pdf_path)
+    key = (os.path.realpath(pdf_path), st.st_mtime_ns, st.st_size, page_index, ocg_layers,
+           _keywords_hash(EXCLUDE_KEYWORDS) if ocg_layers else None)
+    if key in _extraction_cache:
+        return classify_wall_layers(_extraction_cache[key])
+    
+    raw = _load_or_extract(pdf_path, page_index, ocg_layers)
+    
+    _extraction_cache.clear()
+    _extraction_cache[key] = raw
+    return raw
+
+
+def analyze_extraction(raw: RawExtraction, method: str = 'percentile') -> PDFAnalysis:
+    """Calcule la distribution des épaisseurs et les seuils à partir d'une extraction."""
+    return analyze_widths(raw.path_widths, raw, raw.total_paths, raw.total_primitives, method)
+
+
+def analyze_document(raws: List[RawExtraction], method: str = 'percentile') -> PDFAnalysis:
+    """Statistiques d'épaisseur globales, sur toutes les pages extraites."""
+    return analyze_widths(
+        np.concatenate([raw.path_widths for raw in raws]),
+        raws[0],
+        sum(raw.total_paths for raw in raws),
+        sum(raw.total_primitives for raw in raws),
+        method
+    )
+
+
+def analyze_widths(path_widths: np.ndarray, raw: RawExtraction,
+                   total_paths: int, total_primitives: int,
+                   method: str = 'percentile') -> PDFAnalysis:
+    """
+    Seuils d'épaisseur à partir des widths des paths (infos OCG prises dans raw).
+    method: 'percentile' (p90 / p50), 'otsu' ou 'kmeans' (histogramme, width_stats.py)
+    """
+    # Distribution des épaisseurs
+    widths = path_widths[path_widths > 0]
+    if widths.size == 0:
+        widths = np.array([0.1])
     
     # Calculer les percentiles pour déterminer les seuils
     width_percentiles = {
@@ -127,36 +401,57 @@ def analyze_pdf(pdf_path: str, debug: bool = False) -> PDFAnalysis:
         'max': float(np.max(widths))
     }
     
-    # Distribution par catégorie
-    width_distribution = defaultdict(int)
-    for w in widths:
-        if w >= width_percentiles['p90']:
-            width_distribution['thick'] += 1
-        elif w >= width_percentiles['p50']:
-            width_distribution['medium'] += 1
-        else:
-            width_distribution['thin'] += 1
-    
     # Recommander des seuils
     # Les murs sont généralement dans le top 10% des épaisseurs
     recommended_wall_threshold = width_percentiles['p90']
     recommended_medium_threshold = width_percentiles['p50']
+    if method != 'percentile':
+        # Seuils par regroupement sur l'histogramme (repli sur p90/p50 si une seule épaisseur)
+        thresholds = histogram_thresholds(widths, method)
+        if thresholds is not None:
+            recommended_wall_threshold, recommended_medium_threshold = thresholds
+        else:
+            method = 'percentile'
     
-    doc.close()
+    # Distribution par catégorie (selon les seuils retenus)
+    thick = int(np.count_nonzero(widths >= recommended_wall_threshold))
+    medium = int(np.count_nonzero(widths >= recommended_medium_threshold)) - thick
+    width_distribution = {'thick': thick, 'medium': medium, 'thin': int(widths.size) - thick - medium}
     
     return PDFAnalysis(
-        has_ocg=has_ocg,
-        ocg_count=ocg_count,
-        wall_ocg_xrefs=wall_ocg_xrefs,
+        has_ocg=raw.has_ocg,
+        ocg_count=raw.ocg_count,
+        wall_ocg_xrefs=raw.wall_ocg_xrefs,
         total_paths=total_paths,
         total_primitives=total_primitives,
         width_distribution=dict(width_distribution),
         width_percentiles=width_percentiles,
         recommended_wall_threshold=recommended_wall_threshold,
-        recommended_medium_threshold=recommended_medium_threshold
+        recommended_medium_threshold=recommended_medium_threshold,
+        threshold_method=method
     )
 
 
+def analyze_pdf(pdf_path: str, debug: bool = False, page_index: int = 0,
+                pages: Optional[str] = None, options: Optional[ParseOptions] = None) -> PDFAnalysis:
+    """
+    Analyse un PDF pour déterminer sa structure et les seuils optimaux.
+    
+    S'appuie sur extract_pdf(): un parse_pdf() qui suit réutilise la même extraction.
+    Avec pages ("all", "1-4", ...), les statistiques sont globales sur ces pages.
+    """
+    options = options or ParseOptions()
+    if pages is None:
+        return analyze_extraction(extract_pdf(pdf_path, page_index, options.ocg_layers),
+                                  options.width_threshold)
+    
+    doc = fitz.open(pdf_path)
+    page_indices = parse_page_spec(pages, len(doc))
+    doc.close()
+    return analyze_document(extract_pages(pdf_path, page_indices, options=options),
+                            options.width_threshold)
+
+
 def get_text_zones(page, margin: int = 5) -> List:
     """Récupère les zones de texte à exclure."""
     text_zones = []
@@ -217,51 +512,67 @@ def detect_legend(page) -> Optional[fitz.Rect]:
     return None
 
 
-def is_in_zones(point, zones: List) -> bool:
-    """Vérifie si un point est dans l'une des zones."""
-    for zone in zones:
-        if zone and zone.contains(point):
-            return True
-    return False
-
-
-def calculate_length(points_flat: List[float]) -> float:
-    """Calcule la longueur d'une primitive (4 points de contrôle)."""
-    pts = np.array(points_flat).reshape(4, 2)
-    return sum(np.linalg.norm(pts[i+1] - pts[i]) for i in range(3))
-
-
 # ============================================================================
 # PARSER PRINCIPAL
 # ============================================================================
 
-def parse_pdf(pdf_path: str, output_path: Optional[str] = None, 
-              debug: bool = False) -> Optional[str]:
+def convert_pdf(pdf_path: str, debug: bool = False, page_index: int = 0,
+                options: Optional[ParseOptions] = None) -> Optional[dict]:
     """
-    Parse un PDF de manière universelle.
+    Convertit une page d'un PDF en échantillon SymPointV2 (sans l'écrire).
     
     Args:
         pdf_path: Chemin vers le PDF
-        output_path: Chemin de sortie (optionnel)
         debug: Mode debug
+        page_index: Page à convertir (0 = première)
+        options: Options de conversion (ParseOptions)
     
     Returns:
-        Chemin du fichier JSON généré
+        Dictionnaire au format _s2.json, ou None si aucune primitive
     """
     print(f"\n{'='*60}")
     print(f"📄 UNIVERSAL PDF PARSER")
     print(f"{'='*60}")
     print(f"Fichier: {pdf_path}")
     
-    # Phase 1: Analyse
+    # Phase 1: Analyse (extraction brute en un seul passage)
     print(f"\n🔍 Phase 1: Analyse du PDF...")
-    analysis = analyze_pdf(pdf_path, debug)
+    options = options or ParseOptions()
+    with phase('extraction') as record:
+        raw = extract_pdf(pdf_path, page_index, options.ocg_layers)
+        record.items_out = len(raw.kinds)
+    with phase('analysis', items_in=raw.total_paths):
+        analysis = analyze_extraction(raw, options.width_threshold)
+    if raw.from_cache:
+        print(f"   - Extraction: cache disque")
+    return convert_extraction(raw, analysis, os.path.basename(pdf_path), debug, options=options)
+
+
+def convert_extraction(raw: RawExtraction, analysis: PDFAnalysis, source_name: str,
+                       debug: bool = False, page: Optional[int] = None,
+                       options: Optional[ParseOptions] = None) -> Optional[dict]:
+    """
+    Applique seuils, zones et normalisation à une extraction brute.
+    
+    Args:
+        raw: Extraction brute de la page
+        analysis: Analyse fournissant les seuils (de la page ou du document)
+        source_name: Nom du PDF source (métadonnées)
+        debug: Mode debug
+        page: Numéro de page (1 = première) à noter dans les métadonnées
+        options: Options de conversion (ParseOptions)
     
+    Returns:
+        Dictionnaire au format _s2.json, ou None si aucune primitive
+    """
+    options = options or ParseOptions()
     print(f"   - OCG: {'Oui' if analysis.has_ocg else 'Non'} ({analysis.ocg_count} calques)")
     if analysis.wall_ocg_xrefs:
         print(f"   - Calques murs détectés: {len(analysis.wall_ocg_xrefs)}")
     print(f"   - Paths: {analysis.total_paths}")
     print(f"   - Primitives: {analysis.total_primitives}")
+    if analysis.threshold_method != 'percentile':
+        print(f"   - Méthode des seuils: {analysis.threshold_method} (histogramme des épaisseurs)")
     print(f"   - Seuil murs recommandé: {analysis.recommended_wall_threshold:.3f}")
     print(f"   - Seuil moyen recommandé: {analysis.recommended_medium_threshold:.3f}")
     
@@ -272,14 +583,12 @@ def parse_pdf(pdf_path: str, output_path: Optional[str] = None,
     # Phase 2: Extraction
     print(f"\n📐 Phase 2: Extraction des primitives...")
     
-    doc = fitz.open(pdf_path)
-    page = doc[0]
-    orig_width, orig_height = page.rect.width, page.rect.height
+    orig_width, orig_height = raw.page_width, raw.page_height
     
     # Zones à exclure
-    text_zones = get_text_zones(page)
-    cartouche = detect_cartouche(page)
-    legend = detect_legend(page)
+    text_zones = raw.text_zones
+    cartouche = raw.cartouche
+    legend = raw.legend
     exclude_zones = text_zones + ([cartouche] if cartouche else []) + ([legend] if legend else [])
     
     print(f"   - Dimensions: {orig_width:.0f} x {orig_height:.0f}")
@@ -287,176 +596,447 @@ def parse_pdf(pdf_path: str, output_path: Optional[str] = None,
     print(f"   - Cartouche: {'Oui' if cartouche else 'Non'}")
     print(f"   - Légende: {'Oui' if legend else 'Non'}")
     
-    # Extraire les primitives
-    drawings = page.get_drawings()
-    all_primitives = []
+    # Classifier par épaisseur: 0 = murs, 1 = moyens, 2 = détails
+    ocg_walls = options.ocg_layers and raw.path_wall.any()
+    if ocg_walls:
+        # Mode OCG: les murs sont les calques murs, le reste est classé par épaisseur
+        path_layers = np.where(raw.path_wall, 0, np.where(raw.path_widths >= MEDIUM_THRESHOLD, 1, 2))
+        print(f"   - Murs par calques OCG: {int(raw.path_wall.sum())} paths")
+    else:
+        path_layers = np.where(raw.path_widths >= WALL_THRESHOLD, 0,
+                               np.where(raw.path_widths >= MEDIUM_THRESHOLD, 1, 2))
+    if raw.hidden_layers:
+        print(f"   - Calques non décodés: {', '.join(sorted(set(raw.hidden_layers)))}")
     
     stats = {
         'walls': 0, 'medium': 0, 'details': 0,
         'excluded_zone': 0, 'excluded_length': 0
     }
     
-    for path_idx, path in enumerate(drawings):
-        original_width = path.get('width', 0) or 0
-        
-        # Classifier par épaisseur
-        if original_width >= WALL_THRESHOLD:
-            element_type = 'wall'
-        elif original_width >= MEDIUM_THRESHOLD:
-            element_type = 'medium'
-        else:
-            element_type = 'detail'
-        
-        for item in path['items']:
-            cmd_type = item[0]
+    zone_index = ZoneIndex(exclude_zones)
+    scale = TARGET_SIZE / max(orig_width, orig_height)
+    min_length_by_layer = np.array([MIN_LENGTH_WALLS, MIN_LENGTH_MEDIUM, MIN_LENGTH_DETAILS])
+    
+    # Conversion par blocs: les intermédiaires (points de contrôle, masques)
+    # restent de la taille d'un bloc, seules les primitives gardées s'accumulent
+    out_commands = GrowableArray(np.int64)
+    out_controls = GrowableArray(np.float64, (4, 2))
+    out_lengths = GrowableArray(np.float64)
+    out_layers = GrowableArray(np.int64)
+    after_zones = 0
+    
+    with phase('filter', items_in=len(raw.kinds)) as record:
+        for chunk in iter_chunks(len(raw.kinds)):
+            kinds, coords = raw.kinds[chunk], raw.coords[chunk]
+            raw_layers = path_layers[raw.path_index[chunk]]
             
-            if cmd_type == 'l':  # Ligne
-                p1, p2 = item[1], item[2]
-                points = [
-                    p1.x, p1.y,
-                    p1.x + (p2.x - p1.x) * 0.33, p1.y + (p2.y - p1.y) * 0.33,
-                    p1.x + (p2.x - p1.x) * 0.66, p1.y + (p2.y - p1.y) * 0.66,
-                    p2.x, p2.y
-                ]
-                
-                # Les murs ne sont PAS exclus par les zones
-                if element_type == 'wall':
-                    all_primitives.append((0, points, path_idx, original_width, element_type))
-                else:
-                    # Exclure si dans zone texte/cartouche/légende
-                    if is_in_zones(p1, exclude_zones) and is_in_zones(p2, exclude_zones):
-                        stats['excluded_zone'] += 1
-                        continue
-                    all_primitives.append((0, points, path_idx, original_width, element_type))
+            # Exclure si dans zone texte/cartouche/légende (les murs ne sont PAS exclus)
+            excluded = zone_exclusion_mask(kinds, coords, zone_index) & (raw_layers != 0)
+            kept = ~excluded
+            stats['excluded_zone'] += int(excluded.sum())
             
-            elif cmd_type == 'c':  # Courbe de Bézier
-                if len(item) >= 5:
-                    points = []
-                    for p in item[1:5]:
-                        points.extend([p.x, p.y])
-                    if len(points) == 8:
-                        p_start = item[1]
-                        if element_type == 'wall':
-                            all_primitives.append((1, points, path_idx, original_width, element_type))
-                        elif not is_in_zones(p_start, exclude_zones):
-                            all_primitives.append((1, points, path_idx, original_width, element_type))
-                        else:
-                            stats['excluded_zone'] += 1
+            commands, controls, source = build_controls(kinds[kept], coords[kept])
+            layer_ids = raw_layers[kept][source]
+            after_zones += len(commands)
             
-            elif cmd_type == 're':  # Rectangle
-                rect = item[1]
-                center = fitz.Point((rect.x0 + rect.x1)/2, (rect.y0 + rect.y1)/2)
-                
-                if element_type != 'wall' and is_in_zones(center, exclude_zones):
-                    stats['excluded_zone'] += 1
-                    continue
-                
-                corners = [
-                    (rect.x0, rect.y0), (rect.x1, rect.y0),
-                    (rect.x1, rect.y1), (rect.x0, rect.y1)
-                ]
-                for i in range(4):
-                    p1, p2 = corners[i], corners[(i + 1) % 4]
-                    points = [
-                        p1[0], p1[1],
-                        p1[0] + (p2[0] - p1[0]) * 0.33, p1[1] + (p2[1] - p1[1]) * 0.33,
-                        p1[0] + (p2[0] - p1[0]) * 0.66, p1[1] + (p2[1] - p1[1]) * 0.66,
-                        p2[0], p2[1]
-                    ]
-                    all_primitives.append((0, points, path_idx, original_width, element_type))
+            # Normalisation et seuils de longueur par type
+            controls = controls * scale
+            lengths = primitive_lengths(controls)
+            if options.dedup:
+                # Seuils de longueur après fusion: les morceaux courts d'un mur long sont gardés
+                keep = np.ones(len(commands), dtype=bool)
+            else:
+                keep = lengths >= min_length_by_layer[layer_ids]
+            stats['excluded_length'] += int((~keep).sum())
+            
+            out_commands.extend(commands[keep])
+            out_controls.extend(controls[keep])
+            out_lengths.extend(lengths[keep])
+            out_layers.extend(layer_ids[keep])
+        record.items_out = len(out_commands)
     
-    doc.close()
-    print(f"   - Après zones: {len(all_primitives)} (exclu: {stats['excluded_zone']})")
+    commands, controls = out_commands.array(), out_controls.array()
+    lengths, layer_ids = out_lengths.array(), out_layers.array()
     
-    # Phase 3: Normalisation
-    print(f"\n🔧 Phase 3: Normalisation...")
+    if options.dedup:
+        with phase('dedup', items_in=len(commands)) as record:
+            commands, controls, layer_ids, dedup_stats = simplify_primitives(commands, controls, layer_ids)
+            lengths = primitive_lengths(controls)
+            keep = lengths >= min_length_by_layer[layer_ids]
+            stats['excluded_length'] += int((~keep).sum())
+            commands, controls, lengths, layer_ids = commands[keep], controls[keep], lengths[keep], layer_ids[keep]
+            record.items_out = len(commands)
     
-    scale = TARGET_SIZE / max(orig_width, orig_height)
+    budget_dropped = 0
+    if options.max_primitives is not None:
+        with phase('budget', items_in=len(commands)) as record:
+            keep = select_by_budget(controls, lengths, layer_ids, options.max_primitives)
+            budget_dropped = int((~keep).sum())
+            commands, controls, lengths, layer_ids = commands[keep], controls[keep], lengths[keep], layer_ids[keep]
+            record.items_out = len(commands)
     
-    commands, args, lengths, layerIds = [], [], [], []
-    
-    for cmd, points, layer_id, orig_w, elem_type in all_primitives:
-        scaled_points = [p * scale for p in points]
-        length = calculate_length(scaled_points)
-        
-        # Seuils de longueur par type
-        if elem_type == 'wall':
-            min_len = MIN_LENGTH_WALLS
-        elif elem_type == 'medium':
-            min_len = MIN_LENGTH_MEDIUM
-        else:
-            min_len = MIN_LENGTH_DETAILS
-        
-        if length >= min_len:
-            commands.append(cmd)
-            args.append(scaled_points)
-            lengths.append(length)
-            
-            if elem_type == 'wall':
-                layerIds.append(0)
-                stats['walls'] += 1
-            elif elem_type == 'medium':
-                layerIds.append(1)
-                stats['medium'] += 1
-            else:
-                layerIds.append(2)
-                stats['details'] += 1
-        else:
-            stats['excluded_length'] += 1
+    layer_counts = np.bincount(layer_ids, minlength=3)
+    stats['walls'], stats['medium'], stats['details'] = (int(c) for c in layer_counts[:3])
+    
+    print(f"   - Après zones: {after_zones} (exclu: {stats['excluded_zone']})")
+    
+    # Phase 3: Normalisation
+    print(f"\n🔧 Phase 3: Normalisation...")
     
+    if options.dedup:
+        print(f"   - Doublons supprimés: {dedup_stats['duplicates']}")
+        print(f"   - Segments colinéaires fusionnés: {dedup_stats['merged']}")
     print(f"   - Exclus par longueur: {stats['excluded_length']}")
+    if options.max_primitives is not None:
+        print(f"   - Écartées par le budget ({options.max_primitives}): {budget_dropped}")
     print(f"\n✅ Primitives finales: {len(commands)}")
     print(f"   - Murs (layer 0): {stats['walls']}")
     print(f"   - Moyens (layer 1): {stats['medium']}")
     print(f"   - Détails (layer 2): {stats['details']}")
     
-    if not commands:
+    if not len(commands):
         print("⚠️ Aucune primitive extraite!")
         return None
     
     # Statistiques finales
-    lengths_arr = np.array(lengths)
     print(f"\n📊 Statistiques:")
     print(f"   - Dimensions: {int(orig_width * scale)} x {int(orig_height * scale)}")
-    print(f"   - Lengths: min={lengths_arr.min():.2f}, max={lengths_arr.max():.2f}, mean={lengths_arr.mean():.2f}")
+    print(f"   - Lengths: min={lengths.min():.2f}, max={lengths.max():.2f}, mean={lengths.mean():.2f}")
     
     # Phase 4: Export
-    n = len(commands)
-    result = {
-        "width": int(orig_width * scale),
-        "height": int(orig_height * scale),
-        "commands": commands,
-        "args": args,
-        "lengths": lengths,
-        "layerIds": layerIds,
-        "widths": [UNIFORM_WIDTH] * n,
-        "semanticIds": [35] * n,
-        "instanceIds": [-1] * n,
-        "rgb": [[0, 0, 0]] * n,
-        "_metadata": {
-            "source": os.path.basename(pdf_path),
-            "parser_version": "universal_1.0",
-            "has_ocg": analysis.has_ocg,
-            "ocg_count": analysis.ocg_count,
-            "wall_threshold": WALL_THRESHOLD,
-            "medium_threshold": MEDIUM_THRESHOLD
-        }
+    with phase('export', items_in=len(commands)):
+        result = build_sample(int(orig_width * scale), int(orig_height * scale),
+                              commands, controls, lengths, layer_ids, UNIFORM_WIDTH, arrays=True)
+    result["_metadata"] = {
+        "source": source_name,
+        "parser_version": "universal_1.0",
+        "has_ocg": analysis.has_ocg,
+        "ocg_count": analysis.ocg_count,
+        "wall_threshold": WALL_THRESHOLD,
+        "medium_threshold": MEDIUM_THRESHOLD
     }
+    if options.ocg_layers:
+        result["_metadata"]["layer_mode"] = "ocg" if ocg_walls else "width"
+        result["_metadata"]["hidden_layers"] = sorted(set(raw.hidden_layers))
+    if analysis.threshold_method != 'percentile':
+        result["_metadata"]["threshold_method"] = analysis.threshold_method
+    if options.dedup:
+        result["_metadata"]["dedup"] = dedup_stats
+    if options.max_primitives is not None:
+        result["_metadata"]["budget"] = {"max_primitives": options.max_primitives,
+                                         "dropped": budget_dropped}
+    if page is not None:
+        result["_metadata"]["page"] = page
+    return result
+
+
+def parse_pdf(pdf_path: str, output_path: Optional[str] = None, 
+              debug: bool = False, output_format: str = 'json',
+              options: Optional[ParseOptions] = None) -> Optional[str]:
+    """
+    Parse un PDF de manière universelle.
+    
+    Args:
+        pdf_path: Chemin vers le PDF
+        output_path: Chemin de sortie (optionnel)
+        debug: Mode debug
+        output_format: 'json', 'npz' (binaire, voir sample_io.py) ou 'both'
+        options: Options de conversion (ParseOptions)
+    
+    Returns:
+        Chemin du fichier généré (le .json si écrit)
+    """
+    options = options or ParseOptions()
+    result = convert_pdf(pdf_path, debug, options=options)
+    if result is None:
+        return None
     
     if output_path is None:
         output_path = os.path.splitext(pdf_path)[0] + '_s2.json'
     
-    with open(output_path, 'w') as f:
-        json.dump(result, f)
+    profiler = active_profiler()
+    if profiler is not None:
+        result["_metadata"]["profile"] = profiler.summary()
+    
+    with phase('write', items_in=len(result['commands'])):
+        written = write_sample(result, output_path, output_format, options.float_precision)
+    
+    print(f"\n💾 Sauvegardé: {', '.join(written)}")
+    return written[0]
+
+
+# ============================================================================
+# MULTI-PAGES
+# ============================================================================
+
+def _extract_page_worker(task: Tuple[str, int, bool]) -> RawExtraction:
+    """Extrait une page dans un worker (chaque worker ouvre son propre document)."""
+    pdf_path, page_index, ocg_layers = task
+    return _load_or_extract(pdf_path, page_index, ocg_layers)
+
+
+def extract_pages(pdf_path: str, page_indices: List[int], workers: Optional[int] = None,
+                  options: Optional[ParseOptions] = None) -> List[RawExtraction]:
+    """Extrait plusieurs pages en parallèle (un processus par page, au plus workers)."""
+    options = options or ParseOptions()
+    tasks = [(pdf_path, i, options.ocg_layers) for i in page_indices]
+    workers = min(workers or os.cpu_count() or 1, len(tasks))
+    if workers <= 1:
+        return [_extract_page_worker(t) for t in tasks]
+    with multiprocessing.Pool(processes=workers, initializer=configure_cache,
+                              initargs=_cache_config) as pool:
+        return pool.map(_extract_page_worker, tasks)
+
+
+def parse_pdf_pages(pdf_path: str, pages: str = 'all', output_dir: Optional[str] = None,
+                    container: bool = False, width_stats: str = 'page',
+                    workers: Optional[int] = None, debug: bool = False,
+                    output_format: str = 'json', options: Optional[ParseOptions] = None) -> List[dict]:
+    """
+    Parse plusieurs pages d'un PDF.
+    
+    Args:
+        pdf_path: Chemin vers le PDF
+        pages: Spécification des pages ("all", "1-4,7", voir page_range.py)
+        output_dir: Dossier de sortie (défaut: à côté du PDF)
+        container: Un seul fichier <nom>_pages.json au lieu d'un _pN_s2.json par page
+        width_stats: 'page' = seuils par page, 'global' = seuils sur tout le document
+        workers: Processus d'extraction (défaut: nombre de CPUs)
+        debug: Mode debug
+        output_format: Format des fichiers par page ('json', 'npz', 'both')
+        options: Options de conversion (ParseOptions)
+    
+    Returns:
+        Une entrée par page: {'page', 'output', 'primitives'}
+    """
+    doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    doc.close()
+    page_indices = parse_page_spec(pages, page_count)
+    source_name = os.path.basename(pdf_path)
+    
+    print(f"\n{'='*60}")
+    print(f"📄 UNIVERSAL PDF PARSER - MULTI-PAGES")
+    print(f"{'='*60}")
+    print(f"Fichier: {pdf_path} ({len(page_indices)}/{page_count} pages)")
+    
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    options = options or ParseOptions()
+    with phase('extraction') as record:
+        raws = extract_pages(pdf_path, page_indices, workers, options)
+        record.items_out = sum(len(raw.kinds) for raw in raws)
+    global_analysis = analyze_document(raws, options.width_threshold) if width_stats == 'global' else None
+    
+    entries, samples = [], []
+    for raw in raws:
+        page = raw.page_index + 1
+        print(f"\n🔍 Page {page}")
+        analysis = global_analysis or analyze_extraction(raw, options.width_threshold)
+        with phase(f'page{page}', items_in=len(raw.kinds)) as record:
+            result = convert_extraction(raw, analysis, source_name, debug, page=page, options=options)
+            record.items_out = len(result['commands']) if result is not None else 0
+        entry = {'page': page, 'output': None, 'primitives': 0}
+        if result is not None:
+            entry['primitives'] = len(result['commands'])
+            if container:
+                samples.append(result)
+            else:
+                written = write_sample(result, page_output_path(pdf_path, raw.page_index, output_dir),
+                                       output_format, options.float_precision)
+                entry['output'] = written[0]
+                print(f"\n💾 Sauvegardé: {', '.join(written)}")
+        entries.append(entry)
+    
+    if container and samples:
+        container_path = os.path.join(
+            output_dir or os.path.dirname(pdf_path),
+            os.path.splitext(source_name)[0] + '_pages.json'
+        )
+        write_json({
+            "samples": samples,
+            "_metadata": {
+                "source": source_name,
+                "parser_version": "universal_1.0",
+                "pages": [sample["_metadata"]["page"] for sample in samples],
+                "width_stats": width_stats
+            }
+        }, container_path, options.float_precision)
+        for entry in entries:
+            if entry['primitives']:
+                entry['output'] = container_path
+        print(f"\n💾 Sauvegardé: {container_path} ({len(samples)} pages)")
     
-    print(f"\n💾 Sauvegardé: {output_path}")
-    return output_path
+    return entries
+
+
+# ============================================================================
+# MODE BATCH
+# ============================================================================
+
+def find_batch_inputs(batch: str) -> List[str]:
+    """Liste les PDFs d'un dossier, ou d'un motif glob ("plans/**/*.pdf")."""
+    if os.path.isdir(batch):
+        return sorted(
+            os.path.join(batch, name) for name in os.listdir(batch)
+            if name.lower().endswith('.pdf')
+        )
+    return sorted(glob.glob(batch, recursive=True))
+
+
+def _batch_output_path(pdf_path: str, output_dir: Optional[str]) -> str:
+    base = os.path.splitext(os.path.basename(pdf_path))[0] + '_s2.json'
+    if output_dir:
+        return os.path.join(output_dir, base)
+    return os.path.join(os.path.dirname(pdf_path), base)
+
+
+def _init_batch_worker(memory_mb: Optional[int], cache_config: tuple):
+    """Configure le cache et borne la mémoire d'un worker (RLIMIT_AS, Linux/macOS)."""
+    configure_cache(*cache_config)
+    if memory_mb:
+        import resource
+        limit = memory_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _batch_worker(task: Tuple[str, str, bool, Optional[dict], str, Optional[ParseOptions]]) -> dict:
+    """Convertit un PDF dans un worker. Ne lève jamais: les erreurs vont dans le manifeste."""
+    pdf_path, output_path, debug, page_options, output_format, options = task
+    entry = {'pdf': pdf_path, 'output': None, 'status': 'ok', 'primitives': 0,
+             'seconds': 0.0, 'error': None}
+    log = io.StringIO()
+    t0 = time.perf_counter()
+    if options is not None and options.profile:
+        start_profiling(pdf_path)
+    try:
+        with contextlib.redirect_stdout(log):
+            if page_options:
+                # Multi-pages: extraction séquentielle (pas de pool dans un worker)
+                pages = parse_pdf_pages(pdf_path, workers=1, debug=debug, options=options,
+                                        **page_options)
+                entry['output'] = sorted({p['output'] for p in pages if p['output']})
+                entry['primitives'] = sum(p['primitives'] for p in pages)
+                entry['pages'] = len(pages)
+                if not entry['primitives']:
+                    entry['status'] = 'empty'
+            else:
+                result = convert_pdf(pdf_path, debug, options=options)
+                if result is None:
+                    entry['status'] = 'empty'
+                else:
+                    precision = options.float_precision if options is not None else None
+                    entry['output'] = write_sample(result, output_path, output_format, precision)[0]
+                    entry['primitives'] = len(result['commands'])
+    except Exception as e:  # MemoryError, erreurs MuPDF, etc.
+        entry['status'] = 'error'
+        entry['error'] = f"{type(e).__name__}: {e}"
+        if debug:
+            entry['log'] = log.getvalue()
+    finally:
+        _extraction_cache.clear()  # Ne pas garder l'extraction entre deux fichiers
+        profiler = stop_profiling()
+    if profiler is not None:
+        entry['profile'] = profiler.summary()
+    entry['seconds'] = round(time.perf_counter() - t0, 3)
+    return entry
+
+
+def parse_batch(batch: str, output_dir: Optional[str] = None, workers: Optional[int] = None,
+                max_tasks_per_child: int = 20, worker_memory_mb: Optional[int] = None,
+                manifest_path: Optional[str] = None, debug: bool = False,
+                page_options: Optional[dict] = None, output_format: str = 'json',
+                options: Optional[ParseOptions] = None) -> dict:
+    """
+    Convertit un dossier (ou motif glob) de PDFs sur un pool de processus.
+    
+    Chaque worker est recyclé après max_tasks_per_child fichiers et peut être
+    borné en mémoire; un PDF en échec est noté dans le manifeste sans
+    interrompre le batch. page_options (pages, container, width_stats)
+    active le mode multi-pages pour chaque PDF.
+    
+    Returns:
+        Manifeste (également écrit en JSON): timings, primitives et échecs par fichier
+    """
+    pdfs = find_batch_inputs(batch)
+    workers = workers or os.cpu_count() or 1
+    
+    print(f"\n{'='*60}")
+    print(f"📦 UNIVERSAL PDF PARSER - BATCH")
+    print(f"{'='*60}")
+    print(f"Entrée: {batch} ({len(pdfs)} PDFs, {workers} workers)")
+    
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    if manifest_path is None:
+        manifest_dir = output_dir or (batch if os.path.isdir(batch) else '.')
+        manifest_path = os.path.join(manifest_dir, 'batch_manifest.json')
+    
+    if page_options:
+        page_options = dict(page_options, output_dir=output_dir, output_format=output_format)
+    tasks = [(pdf, _batch_output_path(pdf, output_dir), debug, page_options, output_format, options)
+             for pdf in pdfs]
+    entries = []
+    t0 = time.perf_counter()
+    
+    if tasks:
+        with multiprocessing.Pool(processes=min(workers, len(tasks)),
+                                  initializer=_init_batch_worker,
+                                  initargs=(worker_memory_mb, _cache_config),
+                                  maxtasksperchild=max_tasks_per_child) as pool:
+            for entry in pool.imap_unordered(_batch_worker, tasks):
+                entries.append(entry)
+                icon = {'ok': '✅', 'empty': '⚠️', 'error': '❌'}[entry['status']]
+                detail = entry['error'] or f"{entry['primitives']} primitives"
+                print(f"   [{len(entries)}/{len(tasks)}] {icon} {os.path.basename(entry['pdf'])}"
+                      f" ({entry['seconds']:.2f}s) - {detail}")
+    
+    entries.sort(key=lambda e: e['pdf'])
+    manifest = {
+        'parser_version': 'universal_1.0',
+        'input': batch,
+        'workers': workers,
+        'total': len(entries),
+        'succeeded': sum(e['status'] == 'ok' for e in entries),
+        'empty': sum(e['status'] == 'empty' for e in entries),
+        'failed': sum(e['status'] == 'error' for e in entries),
+        'elapsed_seconds': round(time.perf_counter() - t0, 3),
+        'files': entries
+    }
+    
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2)
+    
+    print(f"\n✅ {manifest['succeeded']}/{manifest['total']} convertis "
+          f"({manifest['failed']} échecs, {manifest['empty']} vides) "
+          f"en {manifest['elapsed_seconds']:.1f}s")
+    print(f"💾 Manifeste: {manifest_path}")
+    return manifest
 
 
 # ============================================================================
 # CLI
 # ============================================================================
 
+def _profiled(args, options: ParseOptions):
+    """Enveloppe d'exécution CLI: profils par phase (--profile, --profile-log) et --cprofile."""
+    def run(func, *func_args, **kwargs):
+        if options.profile:
+            start_profiling(args.pdf)
+        try:
+            if args.cprofile:
+                return profile_call(args.cprofile, func, *func_args, **kwargs)
+            return func(*func_args, **kwargs)
+        finally:
+            profiler = stop_profiling()
+            if profiler is not None:
+                profiler.print_report()
+                if args.profile_log:
+                    profiler.write_jsonl(args.profile_log, source=args.pdf)
+    return run
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Universal PDF Parser for SymPointV2',
@@ -465,21 +1045,111 @@ def main():
 Exemples:
   python universal_pdf_parser.py plan.pdf
   python universal_pdf_parser.py plan.pdf output.json --debug
+  python universal_pdf_parser.py --batch projet/ --workers 8
+  python universal_pdf_parser.py --batch "projet/**/*.pdf" --output-dir out/
+  python universal_pdf_parser.py permis.pdf --pages 1-12 --width-stats global
   
 Le parser s'adapte automatiquement aux PDFs avec ou sans calques OCG.
         """
     )
-    parser.add_argument('pdf', help='Fichier PDF à parser')
+    parser.add_argument('pdf', nargs='?', help='Fichier PDF à parser')
     parser.add_argument('output', nargs='?', help='Fichier JSON de sortie (optionnel)')
     parser.add_argument('--debug', action='store_true', help='Mode debug')
+    parser.add_argument('--batch', metavar='DIR|GLOB',
+                        help='Convertir tous les PDFs d\'un dossier ou d\'un motif glob')
+    parser.add_argument('--workers', type=int, default=None,
+                        help='Processus du pool batch (défaut: nombre de CPUs)')
+    parser.add_argument('--output-dir', help='Dossier de sortie du batch (défaut: à côté des PDFs)')
+    parser.add_argument('--manifest', help='Manifeste JSON du batch (défaut: batch_manifest.json)')
+    parser.add_argument('--max-tasks-per-child', type=int, default=20,
+                        help='Recycler un worker après N fichiers (défaut: 20)')
+    parser.add_argument('--worker-memory-mb', type=int, default=None,
+                        help='Limite mémoire par worker en Mo (RLIMIT_AS)')
+    parser.add_argument('--pages', metavar='SPEC',
+                        help='Pages à parser: "all", "3", "1-4,7" (un _pN_s2.json par page)')
+    parser.add_argument('--container', action='store_true',
+                        help='Avec --pages: un seul fichier <nom>_pages.json multi-échantillons')
+    parser.add_argument('--width-stats', choices=['page', 'global'], default='page',
+                        help='Avec --pages: seuils d\'épaisseur par page ou sur tout le document')
+    parser.add_argument('--format', choices=['json', 'npz', 'both'], default='json',
+                        help='Format de sortie: _s2.json, _s2.npz binaire (sample_io.py) ou les deux')
+    parser.add_argument('--ocg-layers', action='store_true',
+                        help='Calques OCG: murs = calques WALL_KEYWORDS (layer 0), '
+                             'calques EXCLUDE_KEYWORDS non décodés')
+    parser.add_argument('--dedup', action='store_true',
+                        help='Supprimer les primitives en double et fusionner les segments colinéaires')
+    parser.add_argument('--width-threshold', choices=THRESHOLD_METHODS, default='percentile',
+                        help='Seuils d\'épaisseur: percentile (p90/p50), otsu ou kmeans '
+                             '(histogramme des log-épaisseurs)')
+    parser.add_argument('--max-primitives', type=int, metavar='N',
+                        help='Budget de primitives: murs d\'abord, puis longueur et couverture du plan')
+    parser.add_argument('--float-precision', type=int, metavar='N',
+                        help='Décimales des floats du _s2.json (ex: 4; défaut: précision complète)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Temps, hausse du RSS max et primitives par phase (affichés et notés dans _metadata.profile)')
+    parser.add_argument('--profile-log', metavar='FILE',
+                        help='Ajouter le profil en JSON lines à FILE (une ligne par document, implique --profile)')
+    parser.add_argument('--cprofile', metavar='FILE',
+                        help='Profil cProfile (.prof) ou pyinstrument (.html, si installé) de la conversion')
+    parser.add_argument('--no-cache', action='store_true',
+                        help='Ne pas utiliser le cache disque des extractions')
+    parser.add_argument('--cache-dir', help=f'Dossier du cache (défaut: $SYMPOINT_CACHE_DIR ou {DEFAULT_CACHE_DIR})')
+    parser.add_argument('--cache-size-mb', type=int, default=DEFAULT_MAX_SIZE_MB,
+                        help=f'Taille max du cache, éviction LRU (défaut: {DEFAULT_MAX_SIZE_MB})')
     
     args = parser.parse_args()
+    if args.max_primitives is not None and args.max_primitives < 1:
+        parser.error('--max-primitives doit être >= 1')
+    if args.float_precision is not None and args.float_precision < 0:
+        parser.error('--float-precision doit être >= 0')
+    if args.pages and args.output:
+        parser.error('--pages écrit un fichier par page: utiliser --output-dir au lieu de output')
+    configure_cache(not args.no_cache, args.cache_dir, args.cache_size_mb)
+    options = ParseOptions(ocg_layers=args.ocg_layers, dedup=args.dedup,
+                           max_primitives=args.max_primitives, width_threshold=args.width_threshold,
+                           profile=args.profile or bool(args.profile_log),
+                           float_precision=args.float_precision)
+    
+    page_options = None
+    if args.pages:
+        page_options = {'pages': args.pages, 'container': args.container,
+                        'width_stats': args.width_stats}
+    
+    if args.batch:
+        manifest = parse_batch(args.batch, args.output_dir, args.workers,
+                               args.max_tasks_per_child, args.worker_memory_mb,
+                               args.manifest, args.debug, page_options, args.format, options)
+        if args.profile_log:
+            for entry in manifest['files']:
+                if 'profile' in entry:
+                    append_jsonl(args.profile_log, dict(source=entry['pdf'], status=entry['status'],
+                                                        **entry['profile']))
+        sys.exit(0 if manifest['total'] and not manifest['failed'] else 1)
+    
+    if not args.pdf:
+        parser.error('fichier PDF ou --batch requis')
+    
+    if page_options:
+        if not os.path.exists(args.pdf):
+            print(f"❌ Fichier non trouvé: {args.pdf}")
+            sys.exit(1)
+        with fitz.open(args.pdf) as doc:
+            page_count = len(doc)
+        try:
+            parse_page_spec(args.pages, page_count)
+        except ValueError as e:
+            parser.print_usage(sys.stderr)
+            parser.exit(1, f"{parser.prog}: error: --pages: {e}\n")
+        run = _profiled(args, options)
+        pages = run(parse_pdf_pages, args.pdf, output_dir=args.output_dir, workers=args.workers,
+                    debug=args.debug, output_format=args.format, options=options, **page_options)
+        sys.exit(0 if any(p['primitives'] for p in pages) else 1)
     
     if not os.path.exists(args.pdf):
         print(f"❌ Fichier non trouvé: {args.pdf}")
         sys.exit(1)
     
-    result = parse_pdf(args.pdf, args.output, args.debug)
+    result = _profiled(args, options)(parse_pdf, args.pdf, args.output, args.debug, args.format, options)
     sys.exit(0 if result else 1)
 
 
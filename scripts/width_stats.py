@@ -0,0 +1,113 @@
+#!/usr/bin/env python
+"""
+width_stats.py - Seuils d'épaisseur par histogramme (log-widths quantifiées)
+
+Les épaisseurs de trait d'un export CAO prennent peu de valeurs (0.13, 0.18,
+0.35, 0.70...). L'histogramme des log2(width) quantifiées (BINS_PER_OCTAVE
+classes par doublement, np.bincount) résume 100k paths en quelques dizaines
+de classes; les seuils sont cherchés sur l'histogramme, pas sur la liste:
+
+- 'otsu': seuil murs = Otsu sur tout l'histogramme, seuil moyen = Otsu sur
+  la partie sous le seuil murs
+- 'kmeans': k-means 1-D (k=3, pondéré par les effectifs) sur les centres de
+  classes; seuils = milieux entre centres consécutifs
+
+Le mode 'percentile' (p90 / p50, défaut du parser universel) reste calculé
+dans universal_pdf_parser.analyze_widths.
+"""
+
+import numpy as np
+from typing import Optional, Tuple
+
+THRESHOLD_METHODS = ('percentile', 'otsu', 'kmeans')
+BINS_PER_OCTAVE = 16
+KMEANS_ITERATIONS = 50
+
+
+def log_width_histogram(widths: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Histogramme des log2(width) quantifiées.
+
+    Returns:
+        counts (B,), centers (B,) centres des classes en log2
+    """
+    q = np.round(np.log2(widths) * BINS_PER_OCTAVE).astype(np.int64)
+    q_min = q.min()
+    counts = np.bincount(q - q_min)
+    centers = (np.arange(len(counts)) + q_min) / BINS_PER_OCTAVE
+    return counts, centers
+
+
+def _edge(centers: np.ndarray, i: int) -> float:
+    """Bord (en width) entre la classe i et la classe i + 1."""
+    return float(2 ** ((centers[i] + centers[i + 1]) / 2))
+
+
+def otsu_split(counts: np.ndarray) -> Optional[int]:
+    """
+    Indice i maximisant la variance inter-classes entre [0, i] et [i+1, B).
+    None si l'histogramme n'a qu'une classe non vide.
+    """
+    if np.count_nonzero(counts) < 2:
+        return None
+    bins = np.arange(len(counts), dtype=np.float64)
+    w0 = np.cumsum(counts)[:-1].astype(np.float64)
+    total = float(counts.sum())
+    w1 = total - w0
+    m0 = np.cumsum(counts * bins)[:-1]
+    m1 = (counts * bins).sum() - m0
+    with np.errstate(divide='ignore', invalid='ignore'):
+        between = w0 * w1 * (m0 / w0 - m1 / w1) ** 2
+    between[(w0 == 0) | (w1 == 0)] = -1
+    return int(np.argmax(between))
+
+
+def otsu_thresholds(counts: np.ndarray, centers: np.ndarray) -> Optional[Tuple[float, float]]:
+    """(seuil murs, seuil moyen) par Otsu à deux niveaux."""
+    wall = otsu_split(counts)
+    if wall is None:
+        return None
+    medium = otsu_split(counts[:wall + 1])
+    wall_threshold = _edge(centers, wall)
+    medium_threshold = _edge(centers, medium) if medium is not None else float(2 ** centers[0])
+    return wall_threshold, medium_threshold
+
+
+def kmeans_thresholds(counts: np.ndarray, centers: np.ndarray, k: int = 3) -> Optional[Tuple[float, float]]:
+    """(seuil murs, seuil moyen) par k-means 1-D pondéré sur les classes de l'histogramme."""
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) < 2:
+        return None
+    x, w = centers[nonzero], counts[nonzero].astype(np.float64)
+    k = min(k, len(x))
+
+    # Initialisation sur les quantiles pondérés
+    cdf = np.cumsum(w) / w.sum()
+    means = x[np.searchsorted(cdf, (np.arange(k) + 0.5) / k)].astype(np.float64)
+    for _ in range(KMEANS_ITERATIONS):
+        labels = np.argmin(np.abs(x[:, None] - means[None, :]), axis=1)
+        sums = np.bincount(labels, weights=w * x, minlength=k)
+        weights = np.bincount(labels, weights=w, minlength=k)
+        updated = np.where(weights > 0, sums / np.maximum(weights, 1e-12), means)
+        if np.allclose(updated, means):
+            break
+        means = updated
+    means = np.unique(means)
+
+    bounds = 2 ** ((means[1:] + means[:-1]) / 2)
+    if len(bounds) == 1:
+        return float(bounds[0]), float(2 ** x[0])
+    return float(bounds[-1]), float(bounds[-2])
+
+
+def histogram_thresholds(widths: np.ndarray, method: str) -> Optional[Tuple[float, float]]:
+    """
+    (seuil murs, seuil moyen) par 'otsu' ou 'kmeans' sur l'histogramme des
+    log-widths; None si les widths ne se séparent pas (une seule valeur).
+    """
+    counts, centers = log_width_histogram(widths)
+    if method == 'otsu':
+        return otsu_thresholds(counts, centers)
+    if method == 'kmeans':
+        return kmeans_thresholds(counts, centers)
+    raise ValueError(f"méthode de seuil inconnue: {method}")